@@ -4,11 +4,15 @@ from tkinter import ttk, messagebox
 from ttkbootstrap.constants import *
 import ttkbootstrap as tb
 from datetime import datetime
-import requests
-import locale
 import math
-import re # Untuk regex
+import threading
+import time
 import webbrowser # Untuk membuka URL di browser
+from array import array
+from manifest_r7_api import MANIFEST_R7_PRINT_URL, R7PageFetcher
+from manifest_r7_store import ManifestR7Store
+
+FILTER_DEBOUNCE_MS = 250
 
 class R7App(tb.Window):
     def __init__(self):
@@ -16,11 +20,18 @@ class R7App(tb.Window):
         self.title("Aplikasi Data R7 - Filter & Pagination")
         self.geometry("950x750")
 
-        self.all_data = []
+        self.store = ManifestR7Store()
+        self.query_range = None
         self.current_page = 1
         self.items_per_page = 100
+        self.jobs = []
+        self.fetching = False
+        self.fetch_thread = None
+        self._filter_job = None
+        self.fetch_stop = threading.Event()
 
         self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.load_initial_data()
 
     def create_widgets(self):
@@ -43,6 +54,9 @@ class R7App(tb.Window):
         self.fetch_button = tb.Button(control_frame, text="Ambil Data", command=self.fetch_and_process_data, bootstyle="success")
         self.fetch_button.grid(row=0, column=4, padx=10, pady=5, ipady=5)
 
+        self.retry_button = tb.Button(control_frame, text="Ulangi Halaman Gagal", command=self.retry_failed_pages, bootstyle="warning", state=DISABLED)
+        self.retry_button.grid(row=0, column=5, padx=5, pady=5, ipady=5)
+
         # --- Filter Teks ---
         ttk.Label(control_frame, text="Filter Kantor Tujuan:").grid(row=1, column=0, padx=5, pady=5, sticky=W)
         self.filter_var = tk.StringVar()
@@ -73,61 +87,107 @@ class R7App(tb.Window):
         self.page_label = tb.Label(pagination_frame, text="Halaman 1 / 1"); self.page_label.pack(side=LEFT, padx=20)
         self.next_button = tb.Button(pagination_frame, text="Berikutnya >>", command=self.next_page, bootstyle="secondary"); self.next_button.pack(side=LEFT, padx=5)
 
-    def fetch_api_data(self, date_from, date_to):
-        self.status_label.config(text="Status: Menghubungi API...", bootstyle="warning"); self.update_idletasks()
-        try: locale.setlocale(locale.LC_TIME, 'en_US.UTF-8')
-        except locale.Error: locale.setlocale(locale.LC_TIME, 'English_United States.1252')
-        date_from_str = date_from.strftime('%d %B %Y'); date_to_str = date_to.strftime('%d %B %Y')
-        locale.setlocale(locale.LC_TIME, '')
-
-        api_url = "https://posindo.mile.app/api/manifestR7-filter"
-        initial_payload = {"length": 1, "date_from": date_from_str, "date_to": date_to_str, "draw": 1, "start": 0}
+    def _ui(self, func, *args):
+        """Jalankan func di thread Tk; diabaikan jika jendela sudah ditutup."""
         try:
-            self.status_label.config(text="Status: Mengambil jumlah total data...", bootstyle="info"); self.update_idletasks()
-            initial_response = requests.post(api_url, data=initial_payload, timeout=30)
-            initial_response.raise_for_status()
-            records_total = initial_response.json().get('recordsTotal', 0)
-            if records_total == 0: return None
-
-            self.status_label.config(text=f"Status: Mengunduh {records_total} baris data...", bootstyle="info"); self.update_idletasks()
-            full_payload = {"length": records_total, "date_from": date_from_str, "date_to": date_to_str, "draw": 2, "start": 0}
-            full_response = requests.post(api_url, data=full_payload, timeout=180)
-            full_response.raise_for_status()
-            return full_response.json()
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("Koneksi Gagal", f"Tidak dapat mengambil data dari server: {e}"); return None
-
-    def process_data(self, api_response):
-        self.all_data = []
-        if not api_response or 'data' not in api_response: return
-        for item in api_response['data']:
-            if len(item) > 12: # Pastikan ada kolom untuk taskId
-                no_r7, kantor_tujuan, tgl_manifest_str = item[1], item[9], item[10]
-                action_html = item[12] # Kolom terakhir berisi HTML dengan taskId
-                
-                # Ekstrak taskId menggunakan regex
-                match = re.search(r'taskId=([a-f0-9]+)', action_html)
-                task_id = match.group(1) if match else None
-
-                if task_id:
-                    try: 
-                        tgl_manifest = datetime.strptime(tgl_manifest_str, '%Y-%m-%d %H:%M:%S')
-                        self.all_data.append((no_r7, kantor_tujuan, tgl_manifest, task_id))
-                    except (ValueError, IndexError): continue
-        self.all_data.sort(key=lambda x: x[2], reverse=True)
+            self.after(0, func, *args)
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def fetch_api_data(self, jobs):
+        """Dijalankan di thread: ambil hari-hari yang belum tersimpan, simpan per halaman ke store lokal.
+
+        Tiap job = satu rentang hari berurutan. Job yang halamannya sebagian gagal
+        tidak ditandai selesai; 'Ulangi Halaman Gagal' hanya mengambil halaman itu.
+        """
+        last_error = None
+        for job in jobs:
+            fetcher, (date_from, date_to) = job["fetcher"], job["range"]
+            try:
+                if fetcher.records_total is None:
+                    self._ui(self.set_status, f"Status: Mengambil jumlah data {date_from:%d-%m-%Y} s/d {date_to:%d-%m-%Y}...", "info")
+                    fetcher.fetch_total()
+                    starts = fetcher.page_starts()
+                else:
+                    starts = list(fetcher.failed)
+
+                done = 0
+                for start, rows, error in fetcher.fetch_pages(starts, stop_event=self.fetch_stop):
+                    done += 1
+                    if error is not None:
+                        print(f"[LOG] Halaman start={start} gagal: {error}")
+                        continue
+                    self.store.add_rows(rows, job["seen_at"])
+                    self._ui(self.refresh_results, f"Status: Memuat {date_from:%d-%m-%Y} s/d {date_to:%d-%m-%Y}, halaman {done}/{len(starts)}...")
+                if self.fetch_stop.is_set():
+                    fetcher.records_total = None  # belum lengkap: ambil ulang dari awal
+                    break
+                if not fetcher.failed:
+                    self.store.mark_fetched(date_from, date_to, job["seen_at"])
+                    job["done"] = True
+            except Exception as e:
+                print(f"[LOG] Gagal mengambil {date_from:%d-%m-%Y} s/d {date_to:%d-%m-%Y}: {e}")
+                last_error = e
+        self._ui(self.finish_fetch, last_error)
+
+    def refresh_results(self, status_text):
+        self.display_data()
+        self.set_status(status_text, "info")
+
+    def _pending_jobs(self):
+        return [job for job in self.jobs if not job["done"]]
+
+    def finish_fetch(self, error):
+        self.fetching = False
+        self.fetch_button.config(state=NORMAL)
+        pending = self._pending_jobs()
+        self.retry_button.config(state=NORMAL if pending else DISABLED)
+        self.display_data()
+        if self.fetch_stop.is_set():
+            self.set_status("Status: Dibatalkan.", "warning")
+        elif pending:
+            failed_pages = sum(len(job["fetcher"].failed) for job in pending)
+            self.set_status(f"Status: {failed_pages or len(pending)} {'halaman' if failed_pages else 'rentang'} gagal diambil, klik 'Ulangi Halaman Gagal'.", "danger")
+        if error is not None:
+            messagebox.showerror("Koneksi Gagal", f"Tidak dapat mengambil data dari server: {error}")
+
+    def set_status(self, text, bootstyle):
+        self.status_label.config(text=text, bootstyle=bootstyle)
+
+    def start_fetch(self, jobs):
+        self.fetch_stop.clear()
+        self.fetching = True
+        self.fetch_button.config(state=DISABLED)
+        self.retry_button.config(state=DISABLED)
+        self.fetch_thread = threading.Thread(target=self.fetch_api_data, args=(jobs,), daemon=True)
+        self.fetch_thread.start()
+
+    def retry_failed_pages(self):
+        if not self.fetching and self._pending_jobs():
+            self.start_fetch(self._pending_jobs())
 
     def on_filter_change(self, *args):
+        # Debounce: filter baru dijalankan setelah ketikan berhenti sebentar
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(FILTER_DEBOUNCE_MS, self.apply_filter)
+
+    def apply_filter(self):
+        self._filter_job = None
         self.current_page = 1
         self.display_data()
 
+    def current_results(self, filter_text=None):
+        """array rowid hasil filter untuk rentang aktif (di-cache oleh store)."""
+        if self.query_range is None:
+            return array("q")
+        if filter_text is None:
+            filter_text = self.filter_var.get()
+        return self.store.search(*self.query_range, filter_text)
+
     def display_data(self):
         self.tree.delete(*self.tree.get_children())
-        filter_text = self.filter_var.get().lower()
-        
-        if filter_text:
-            filtered_data = [item for item in self.all_data if filter_text in item[1].lower()]
-        else:
-            filtered_data = self.all_data
+        filtered_data = self.current_results()
 
         total_items = len(filtered_data)
         if total_items == 0:
@@ -138,16 +198,17 @@ class R7App(tb.Window):
         self.page_label.config(text=f"Halaman {self.current_page} / {total_pages}")
         start_index = (self.current_page - 1) * self.items_per_page
         end_index = start_index + self.items_per_page
-        page_data = filtered_data[start_index:end_index]
+        page_data = self.store.rows(filtered_data[start_index:end_index])
 
         for item in page_data:
-            # item sekarang berisi (no_r7, kantor_tujuan, tgl_manifest, task_id)
+            # item berisi (no_r7, kantor_tujuan, tgl_manifest, task_id)
             # Kita menampilkan 3 kolom pertama, dan menyimpan task_id sebagai tag
-            self.tree.insert("", "end", values=(item[0], item[1], item[2].strftime('%d-%m-%Y %H:%M:%S')), tags=(item[3],))
+            self.tree.insert("", "end", values=(item[0], item[1], item[2]), tags=(item[3],))
 
         self.prev_button.config(state=NORMAL if self.current_page > 1 else DISABLED)
         self.next_button.config(state=NORMAL if self.current_page < total_pages else DISABLED)
-        self.status_label.config(text=f"Status: Selesai. Menampilkan {total_items} dari {len(self.all_data)} total data.", bootstyle="success")
+        if not self.fetching:
+            self.status_label.config(text=f"Status: Selesai. Menampilkan {total_items} dari {len(self.current_results(''))} total data.", bootstyle="success")
 
     def on_tree_select(self, event):
         selected_item = self.tree.focus()
@@ -155,12 +216,11 @@ class R7App(tb.Window):
             tags = self.tree.item(selected_item, "tags")
             if tags:
                 task_id = tags[0] # taskId disimpan sebagai tag pertama
-                url = f"https://posindo.mile.app/manifestR7/print?taskId={task_id}"
+                url = MANIFEST_R7_PRINT_URL.format(task_id=task_id)
                 webbrowser.open(url)
 
     def next_page(self):
-        filter_text = self.filter_var.get().lower()
-        total_items = len([item for item in self.all_data if filter_text in item[1].lower()]) if filter_text else len(self.all_data)
+        total_items = len(self.current_results())
         total_pages = math.ceil(total_items / self.items_per_page)
         if self.current_page < total_pages: self.current_page += 1; self.display_data()
 
@@ -172,16 +232,30 @@ class R7App(tb.Window):
             start_date = datetime.strptime(self.date_from_entry.entry.get(), self.date_format)
             end_date = datetime.strptime(self.date_to_entry.entry.get(), self.date_format)
         except ValueError: messagebox.showerror("Tanggal Salah", f"Format tanggal tidak valid."); return
+        if self.fetching: return
 
-        api_response = self.fetch_api_data(start_date, end_date)
-        if api_response:
-            self.process_data(api_response)
-            self.filter_var.set("") # Hapus filter teks setelah data baru diambil
-            self.display_data()
+        self.query_range = (start_date, end_date)
+        self.current_page = 1
+        self.filter_var.set("") # Hapus filter teks setelah data baru diambil
+
+        # Hanya hari yang belum tersimpan / masih terbuka yang diambil dari API
+        ranges = self.store.missing_ranges(start_date, end_date)
+        self.jobs = [{"fetcher": R7PageFetcher(date_from, date_to), "range": (date_from, date_to),
+                      "seen_at": time.time(), "done": False} for date_from, date_to in ranges]
+        self.display_data()
+        if self.jobs:
+            self.set_status("Status: Menghubungi API...", "warning")
+            self.start_fetch(self.jobs)
+        else:
+            self.retry_button.config(state=DISABLED)
 
     def load_initial_data(self):
         self.fetch_and_process_data()
 
+    def on_close(self):
+        self.fetch_stop.set()
+        self.destroy()
+
 if __name__ == "__main__":
     app = R7App()
     app.mainloop()
@@ -5,33 +5,32 @@
 #----------------------------------------------------------------------------
 #
 import os
-import re
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from ttkbootstrap import Style, ScrolledText
 from ttkbootstrap.widgets import Button, DateEntry
 from dotenv import load_dotenv
-import mysql.connector
-import pdfplumber
+import db_pool
+import manifest_pdf
+import metrics
+import manifest_batch
+from manifest_cache import ManifestCache
 import traceback
 from datetime import datetime, timedelta
-import requests
-from bs4 import BeautifulSoup
 import threading
+import multiprocessing
 import time
 from PIL import Image
 import pystray
+from log_sink import LogSink
+from scrape_engine import ScrapeEngine
+from manifest_import import insert_manifest_rows
+from poll_schedule import POLL_TICK_SECONDS
+from virtual_table import VirtualTable
 
 # Load .env
 load_dotenv()
 
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST", ""),
-    "user": os.getenv("DB_USER", ""),
-    "password": os.getenv("DB_PASS", ""),
-    "database": os.getenv("DB_NAME", ""),
-    "use_pure": True
-}
 KODE_KANTOR = os.getenv("KODE_KANTOR", "")
 
 user_name_map = {}
@@ -40,12 +39,7 @@ def populate_user_combobox(kode_kantor):
     global user_name_map
     user_name_map = {}
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute("SELECT nama, username FROM user WHERE ktr = %s", (kode_kantor,))
-        users_data = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        users_data = db_pool.fetch_all("SELECT nama, username FROM user WHERE ktr = %s", (kode_kantor,))
         
         display_names = []
         for nama, username in users_data:
@@ -75,257 +69,146 @@ def on_user_select(event):
 # --- Global variables for tray and background thread ---
 icon = None
 background_thread_stop = threading.Event()
+pdf_thread = None
+pdf_stop = threading.Event()
+pdf_result_cancelled = False  # isi tabel dari parsing yang dibatalkan/gagal: tidak boleh di-insert
+manifest_cache = ManifestCache()
 auto_update_status_var = None
 
 # --- GUI Setup ---
-root = tk.Tk()
-root.title("Import R7 ke Database")
-root.geometry("850x750")
-style = Style("cosmo")
-
-main_frame = ttk.Frame(root, padding="10")
-main_frame.pack(fill=tk.BOTH, expand=True)
-
-# Header Frame
-header_frame = ttk.Frame(main_frame)
-header_frame.pack(fill=tk.X, pady=(0, 10))
-header_frame.columnconfigure(0, weight=1)
-header_frame.columnconfigure(1, weight=1)
-
-info_frame = ttk.Labelframe(header_frame, text="Informasi PDF", padding="10")
-info_frame.grid(row=0, column=0, sticky="nsew", padx=(0, 5))
-
-label1_var = tk.StringVar(value="Manifest Kantong: -")
-label2_var = tk.StringVar(value="Kode: -")
-ttk.Label(info_frame, textvariable=label1_var, font=["-size", "10"]).pack(anchor="w")
-ttk.Label(info_frame, textvariable=label2_var, font=["-size", "10", "-weight", "bold"]).pack(anchor="w")
-
-status_frame = ttk.Labelframe(header_frame, text="Status Sistem", padding="10")
-status_frame.grid(row=0, column=1, sticky="nsew", padx=(5, 0))
-
-label3_var = tk.StringVar(value=f"Kode Kantor (.env): {KODE_KANTOR}")
-label_koneksi_var = tk.StringVar(value="Status Koneksi: ❓")
-auto_update_status_var = tk.StringVar(value="Auto-Update: Menunggu...")
-
-koneksi_label = ttk.Label(status_frame, textvariable=label_koneksi_var, font=["-size", "10"])
-koneksi_label.pack(anchor="w")
-ttk.Label(status_frame, textvariable=label3_var, font=["-size", "10"]).pack(anchor="w")
-ttk.Label(status_frame, textvariable=auto_update_status_var, font=["-size", "10"]).pack(anchor="w", pady=(5,0))
-
-# Date Picker
-date_picker_frame = ttk.Frame(status_frame)
-date_picker_frame.pack(anchor="w", pady=(5,0))
-ttk.Label(date_picker_frame, text="Tgl NRC:", font=["-size", "10"]).pack(side="left")
-date_picker = DateEntry(date_picker_frame, bootstyle="primary", dateformat="%Y-%m-%d")
-date_picker.pack(side="left", padx=(5,0))
-
-# User Selection
-user_selection_frame = ttk.Frame(status_frame)
-user_selection_frame.pack(anchor="w", pady=(5,0))
-ttk.Label(user_selection_frame, text="Pilih User:", font=["-size", "10"]).pack(side="left")
-user_var = tk.StringVar()
-user_combobox = ttk.Combobox(user_selection_frame, textvariable=user_var, state="readonly", bootstyle="primary")
-user_combobox.pack(side="left", padx=(5,0))
-user_combobox.bind("<<ComboboxSelected>>", on_user_select)
-user_combobox.bind("<<ComboboxSelected>>", on_user_select)
-
-user_display_var = tk.StringVar(value="")
-ttk.Label(user_selection_frame, textvariable=user_display_var, font=["-size", "10", "-weight", "bold"]).pack(side="left", padx=(10,0))
-
-# Table Frame
-table_frame = ttk.Frame(main_frame)
-table_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
-
+# Kolom tabel kantong hasil parse PDF
 cols = ("No", "No Kantong", "Produk", "Berat (Kg)", "Asal Bag", "Tujuan Bag")
-tree = ttk.Treeview(table_frame, columns=cols, show="headings", height=15)
-for col in cols:
-    tree.heading(col, text=col)
-    tree.column(col, anchor='center', width=100)
-tree.column("No Kantong", width=150)
-
-vsb = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
-tree.configure(yscrollcommand=vsb.set)
-
-tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-vsb.pack(side=tk.RIGHT, fill=tk.Y)
-
-# Progressbar
-progress = ttk.Progressbar(main_frame, mode="determinate")
-progress.pack(fill=tk.X, pady=(0, 10))
-
-# Button Frame
-btn_frame = ttk.Frame(main_frame)
-btn_frame.pack(fill=tk.X, pady=(0, 10))
-btn_frame.columnconfigure((0, 1, 2, 3), weight=1)
-
-Button(btn_frame, text="📂 Buka PDF", command=lambda: browse_pdf(), bootstyle="primary").grid(row=0, column=0, sticky="ew", padx=(0, 5))
-Button(btn_frame, text="⬇️ Insert ke Database", command=lambda: insert_ke_db(), bootstyle="success").grid(row=0, column=1, sticky="ew", padx=5)
-Button(btn_frame, text="▶️ Jalankan Scrap Awal", command=lambda: jalankan_scrap_awal(), bootstyle="warning").grid(row=0, column=2, sticky="ew", padx=5)
-Button(btn_frame, text="🔄 Cek Koneksi", command=lambda: cek_koneksi(), bootstyle="info").grid(row=0, column=3, sticky="ew", padx=(5, 0))
 
-# Log Frame
-log_frame = ttk.Labelframe(main_frame, text="Log Aktivitas", padding="10")
-log_frame.pack(fill=tk.BOTH, expand=True)
-
-log_text = ScrolledText(log_frame, height=3, font=("Consolas", 9), wrap=tk.WORD)
-log_text.pack(fill=tk.BOTH, expand=True)
+root = None
+
+def build_gui():
+    """Bangun jendela utama. Dipanggil dari __main__ saja, supaya modul ini
+    bisa di-import tanpa membuka jendela Tk."""
+    global root, tree, progress, log_text, koneksi_label, date_picker, user_combobox, insert_button
+    global label1_var, label2_var, label_koneksi_var, auto_update_status_var, user_var, user_display_var
+    root = tk.Tk()
+    root.title("Import R7 ke Database")
+    root.geometry("850x750")
+    style = Style("cosmo")
+
+    main_frame = ttk.Frame(root, padding="10")
+    main_frame.pack(fill=tk.BOTH, expand=True)
+
+    # Header Frame
+    header_frame = ttk.Frame(main_frame)
+    header_frame.pack(fill=tk.X, pady=(0, 10))
+    header_frame.columnconfigure(0, weight=1)
+    header_frame.columnconfigure(1, weight=1)
+
+    info_frame = ttk.Labelframe(header_frame, text="Informasi PDF", padding="10")
+    info_frame.grid(row=0, column=0, sticky="nsew", padx=(0, 5))
+
+    label1_var = tk.StringVar(value="Manifest Kantong: -")
+    label2_var = tk.StringVar(value="Kode: -")
+    ttk.Label(info_frame, textvariable=label1_var, font=["-size", "10"]).pack(anchor="w")
+    ttk.Label(info_frame, textvariable=label2_var, font=["-size", "10", "-weight", "bold"]).pack(anchor="w")
+
+    status_frame = ttk.Labelframe(header_frame, text="Status Sistem", padding="10")
+    status_frame.grid(row=0, column=1, sticky="nsew", padx=(5, 0))
+
+    label3_var = tk.StringVar(value=f"Kode Kantor (.env): {KODE_KANTOR}")
+    label_koneksi_var = tk.StringVar(value="Status Koneksi: ❓")
+    auto_update_status_var = tk.StringVar(value="Auto-Update: Menunggu...")
+
+    koneksi_label = ttk.Label(status_frame, textvariable=label_koneksi_var, font=["-size", "10"])
+    koneksi_label.pack(anchor="w")
+    ttk.Label(status_frame, textvariable=label3_var, font=["-size", "10"]).pack(anchor="w")
+    ttk.Label(status_frame, textvariable=auto_update_status_var, font=["-size", "10"]).pack(anchor="w", pady=(5,0))
+
+    # Date Picker
+    date_picker_frame = ttk.Frame(status_frame)
+    date_picker_frame.pack(anchor="w", pady=(5,0))
+    ttk.Label(date_picker_frame, text="Tgl NRC:", font=["-size", "10"]).pack(side="left")
+    date_picker = DateEntry(date_picker_frame, bootstyle="primary", dateformat="%Y-%m-%d")
+    date_picker.pack(side="left", padx=(5,0))
+
+    # User Selection
+    user_selection_frame = ttk.Frame(status_frame)
+    user_selection_frame.pack(anchor="w", pady=(5,0))
+    ttk.Label(user_selection_frame, text="Pilih User:", font=["-size", "10"]).pack(side="left")
+    user_var = tk.StringVar()
+    user_combobox = ttk.Combobox(user_selection_frame, textvariable=user_var, state="readonly", bootstyle="primary")
+    user_combobox.pack(side="left", padx=(5,0))
+    user_combobox.bind("<<ComboboxSelected>>", on_user_select)
+    user_combobox.bind("<<ComboboxSelected>>", on_user_select)
+
+    user_display_var = tk.StringVar(value="")
+    ttk.Label(user_selection_frame, textvariable=user_display_var, font=["-size", "10", "-weight", "bold"]).pack(side="left", padx=(10,0))
+
+    # Table Frame
+    table_frame = ttk.Frame(main_frame)
+    table_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+
+    tree = VirtualTable(table_frame, columns=cols, widths={"No Kantong": 150})
+    tree.pack(fill=tk.BOTH, expand=True)
+
+    # Progressbar
+    progress = ttk.Progressbar(main_frame, mode="determinate")
+    progress.pack(fill=tk.X, pady=(0, 10))
+
+    # Button Frame
+    btn_frame = ttk.Frame(main_frame)
+    btn_frame.pack(fill=tk.X, pady=(0, 10))
+    btn_frame.columnconfigure((0, 1, 2, 3, 4, 5), weight=1)
+
+    Button(btn_frame, text="📂 Buka PDF", command=lambda: browse_pdf(), bootstyle="primary").grid(row=0, column=0, sticky="ew", padx=(0, 5))
+    Button(btn_frame, text="📚 Import Folder", command=lambda: import_folder(), bootstyle="primary-outline").grid(row=0, column=1, sticky="ew", padx=5)
+    Button(btn_frame, text="⏹️ Batal Parsing", command=lambda: batal_parsing(), bootstyle="secondary").grid(row=0, column=2, sticky="ew", padx=5)
+    insert_button = Button(btn_frame, text="⬇️ Insert ke Database", command=lambda: insert_ke_db(), bootstyle="success")
+    insert_button.grid(row=0, column=3, sticky="ew", padx=5)
+    Button(btn_frame, text="▶️ Jalankan Scrap Awal", command=lambda: jalankan_scrap_awal(), bootstyle="warning").grid(row=0, column=4, sticky="ew", padx=5)
+    Button(btn_frame, text="🔄 Cek Koneksi", command=lambda: cek_koneksi(), bootstyle="info").grid(row=0, column=5, sticky="ew", padx=(5, 0))
+
+    # Log Frame
+    log_frame = ttk.Labelframe(main_frame, text="Log Aktivitas", padding="10")
+    log_frame.pack(fill=tk.BOTH, expand=True)
+
+    log_text = ScrolledText(log_frame, height=3, font=("Consolas", 9), wrap=tk.WORD)
+    log_text.pack(fill=tk.BOTH, expand=True)
+    log_sink.attach(root, log_text)
+
+# log_sink dan engine dibuat di __main__, bukan saat import: worker PDF (spawn di
+# Windows) meng-import ulang modul ini dan tidak boleh ikut membuka logs/import_r7.log
+log_sink = None
+engine = None
 
 def log(msg):
-    root.after(0, lambda: _log_to_widget(msg))
-
-def _log_to_widget(msg):
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_text.insert('end', f"[{now}] {msg}\n")
-    log_text.see('end')
-
-def parse_and_format_date(date_str):
-    if not date_str:
-        return None
-    for fmt in ("%Y-%m-%d %H:%M:%S", "%d-%m-%Y %H:%M:%S", "%d-%m-%Y %H:%M"):
-        try:
-            return datetime.strptime(date_str, fmt).strftime("%Y-%m-%d %H:%M:%S")
-        except ValueError:
-            pass
-    return None
-
-def _perform_scraping_and_update(connotes_to_scrap, is_initial_scrap=False):
-    updated_count = 0
-    failed_count = 0
-    
-    if not connotes_to_scrap:
-        log("✅ Tidak ada data untuk di-scrap pada mode ini.")
-        return 0, 0
-
-    log(f"🔍 Ditemukan {len(connotes_to_scrap)} connote untuk diproses.")
-    if is_initial_scrap:
-        progress["maximum"] = len(connotes_to_scrap)
-
-    conn = mysql.connector.connect(**DB_CONFIG)
-
-    for i, row in enumerate(connotes_to_scrap):
-        if background_thread_stop.is_set():
-            log("🛑 Proses update dihentikan.")
-            break
-            
-        if is_initial_scrap:
-            progress["value"] = i + 1
-            root.update_idletasks()
-            
-        connote = row['connote']
-        log(f"🔄 Memproses connote: {connote}")
-        
-        url = f"https://kibana.posindonesia.co.id:4433/x123449/3.php?id={connote}&6f017f90-f299-11ec-988f-6f1763dc6f47xdsdkjshhsahsaksasjsaasldsllsdjldsjsbdaksdslssjasjaa"
-        
-        try:
-            response = requests.get(url, timeout=15, verify=False)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            data_to_update = {}
-
-            tgl_kirim_th = soup.find("th", string=re.compile(r"^\s*Tanggal Kirim\s*$"))
-            if tgl_kirim_th and tgl_kirim_th.find_next_sibling("td"):
-                tgl_kirim_raw = tgl_kirim_th.find_next_sibling("td").text.strip()
-                data_to_update['tgl_kirim'] = parse_and_format_date(tgl_kirim_raw)
-
-            pengirim_th = soup.find("th", string=re.compile(r"^\s*Pengirim\s*$"))
-            if pengirim_th and pengirim_th.find_next_sibling("td"):
-                pengirim_full = pengirim_th.find_next_sibling("td").text.strip()
-                data_to_update['pgrm'] = pengirim_full.split(',')[0].strip()
-
-            penerima_th = soup.find("th", string=re.compile(r"^\s*Penerima\s*$"))
-            if penerima_th and penerima_th.find_next_sibling("td"):
-                penerima_full = penerima_th.find_next_sibling("td").text.strip()
-                data_to_update['pnrm'] = penerima_full.split(',')[0].strip()
-                if 'Alamat :' in penerima_full:
-                    data_to_update['al_pnrm'] = penerima_full.split('Alamat :')[-1].strip()
-
-            status_akhir_th = soup.find("th", string=re.compile(r"^\s*STATUS AKHIR\s*$"))
-            if status_akhir_th and status_akhir_th.find_next_sibling("td"):
-                status_full = status_akhir_th.find_next_sibling("td").text.strip()
-                status_text = status_full.split(' Di ')[0].strip()
-                data_to_update['status'] = status_text
-                
-                if "DELIVERED" in status_text.upper():
-                    data_to_update['st'] = '99'
-
-                lokasi_part = status_full.split(',')[0]
-                kodepos_match = re.search(r"\b(\d{5})\b", lokasi_part)
-                if kodepos_match:
-                    data_to_update['lok_akhir'] = kodepos_match.group(1)
-
-                date_match = re.search(r"tgl\s*:\s*(\d{4}-\d{2}-\d{2}\s*\d{2}:\d{2}:\d{2})", status_full)
-                if date_match:
-                    data_to_update['tgl_proses'] = parse_and_format_date(date_match.group(1))
-            
-            cod_th = soup.find("th", string=re.compile(r"^\s*COD/NON COD\s*$"))
-            if cod_th and cod_th.find_next_sibling("td"):
-                cod_full = cod_th.find_next_sibling("td").text.strip()
-                data_to_update['cod'] = cod_full.split('Nilai Cod :')[0].strip()
-                match = re.search(r"Nilai Cod\s*:\s*([0-9,.]*)", cod_full)
-                if match:
-                    bsu_cod_raw = match.group(1).strip().replace(',', '').replace('.', '')
-                    data_to_update['bsu_cod'] = int(bsu_cod_raw) if bsu_cod_raw.isdigit() else 0
-                else:
-                    data_to_update['bsu_cod'] = 0
-
-            if data_to_update:
-                if is_initial_scrap and 'st' not in data_to_update:
-                    data_to_update['st'] = '33'
-                
-                set_clauses = ", ".join([f"{key}=%s" for key in data_to_update.keys()])
-                sql_update = f"UPDATE tbl_antrn SET {set_clauses} WHERE connote=%s"
-                update_values = list(data_to_update.values()) + [connote]
-                
-                update_cursor = conn.cursor()
-                update_cursor.execute(sql_update, tuple(update_values))
-                conn.commit()
-                update_cursor.close()
-                updated_count += 1
-                log(f"  ✅ Data untuk {connote} berhasil diupdate.")
-            else:
-                log(f"  ⚠️ Tidak ada data valid yang diekstrak untuk {connote}.")
-                failed_count += 1
+    """Ke log_sink (widget + logs/import_r7.log) jika sudah dibuat, selain itu ke stdout."""
+    if log_sink is not None:
+        log_sink.log(msg)
+    else:
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}", flush=True)
 
-        except requests.exceptions.RequestException as e:
-            log(f"  ❌ Gagal mengambil data untuk {connote}. Error: {e}")
-            failed_count += 1
-        except Exception as e:
-            log(f"  ❌ Terjadi error saat memproses {connote}. Error: {e}")
-            traceback.print_exc()
-            failed_count += 1
-    
-    conn.close()
-    if is_initial_scrap:
-        progress["value"] = 0
-    return updated_count, failed_count
+def _set_progress(done, total):
+    if root is not None:
+        root.after(0, lambda: progress.configure(maximum=max(total, 1), value=done))
 
 def _background_update_task():
     log("⚙️ Auto-update thread dimulai.")
+    try:
+        engine.ensure_schema()
+    except Exception as e:
+        log(f"[ERROR] Gagal menyiapkan skema database: {e}")
     while not background_thread_stop.is_set():
         try:
             root.after(0, lambda: auto_update_status_var.set("Auto-Update: 🏃‍♂️ Sedang berjalan..."))
             log(" ऑटो-अपडेट शुरू हो रहा है... (Memulai auto-update...)")
-            
-            conn = mysql.connector.connect(**DB_CONFIG)
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT connote FROM tbl_antrn WHERE st = '33'")
-            connotes_to_update = cursor.fetchall()
-            cursor.close()
-            conn.close()
-
-            if connotes_to_update:
-                updated, failed = _perform_scraping_and_update(connotes_to_update, is_initial_scrap=False)
+
+            updated, failed = engine.run_cycle('33')
+            if updated or failed:
                 log(f"🤖 Auto-Update Selesai. Berhasil: {updated}, Gagal: {failed}")
-            else:
-                log("🤖 Auto-Update: Tidak ada data (st=33) untuk diperbarui.")
 
-            next_run_time = datetime.now() + timedelta(minutes=30)
+            next_run_time = datetime.now() + timedelta(seconds=POLL_TICK_SECONDS)
             status_msg = f"Auto-Update: Idle. Cek berikutnya: {next_run_time.strftime('%H:%M:%S')}"
             root.after(0, lambda: auto_update_status_var.set(status_msg))
-            log(f"😴 Menunggu 30 menit untuk siklus berikutnya.")
+            log(f"😴 Menunggu {POLL_TICK_SECONDS // 60} menit untuk siklus berikutnya.")
             
-            background_thread_stop.wait(1800)
+            background_thread_stop.wait(POLL_TICK_SECONDS)
 
         except Exception as e:
             log(f"[ERROR] Kesalahan fatal di background thread: {e}")
@@ -340,19 +223,14 @@ def jalankan_scrap_awal():
         def run():
             try:
                 log("🚀 Memulai proses scraping awal...")
-                conn = mysql.connector.connect(**DB_CONFIG)
-                cursor = conn.cursor(dictionary=True)
-                cursor.execute("SELECT connote FROM tbl_antrn WHERE st = '0'")
-                connotes_to_scrap = cursor.fetchall()
-                cursor.close()
-                conn.close()
+                connotes_to_scrap = db_pool.fetch_all("SELECT connote FROM tbl_antrn WHERE st = '0'", dictionary=True)
                 
                 if not connotes_to_scrap:
                     log("✅ Tidak ada data baru (st=0) untuk di-scrap.")
                     messagebox.showinfo("Selesai", "Tidak ada data baru untuk di-scrap.")
                     return
 
-                updated, failed = _perform_scraping_and_update(connotes_to_scrap, is_initial_scrap=True)
+                updated, failed = engine.scrape(connotes_to_scrap, is_initial_scrap=True)
                 
                 log(f"🎉 Scraping Awal Selesai. Berhasil: {updated}, Gagal: {failed}")
                 messagebox.showinfo("Scraping Selesai", f"Proses scraping awal selesai.\nBerhasil update: {updated}\nGagal: {failed}")
@@ -362,7 +240,7 @@ def jalankan_scrap_awal():
                 traceback.print_exc()
                 messagebox.showerror("Error Scraping", f"Terjadi kesalahan fatal:\n{e}")
             finally:
-                progress["value"] = 0
+                _set_progress(0, 0)
         
         threading.Thread(target=run, daemon=True).start()
 
@@ -372,11 +250,9 @@ def run_manual_update_from_tray():
 
 def cek_koneksi():
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        if conn.is_connected():
+        if db_pool.check_connection():
             label_koneksi_var.set("🟢 Koneksi DB: Berhasil")
             koneksi_label.config(bootstyle="success")
-            conn.close()
         else:
             label_koneksi_var.set("🔴 Gagal koneksi DB")
             koneksi_label.config(bootstyle="danger")
@@ -391,12 +267,7 @@ def populate_user_combobox(kode_kantor):
     global user_name_map
     user_name_map = {}
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute("SELECT nama, username FROM user WHERE status2 = 'Pengantar' AND ktr = %s", (kode_kantor,))
-        users_data = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        users_data = db_pool.fetch_all("SELECT nama, username FROM user WHERE status2 = 'Pengantar' AND ktr = %s", (kode_kantor,))
         
         display_names = []
         for nama, username in users_data:
@@ -423,54 +294,114 @@ def on_user_select(event):
     user_display_var.set(username)
     log(f"User terpilih: {selected_name} (Username: {username})")
 
+def _show_header(manifest, kode):
+    label1_var.set(f"Manifest Kantong: {manifest}")
+    label2_var.set(kode)
+    populate_user_combobox(kode) # Populate combobox after kode is set
+
+def _append_rows(rows):
+    padded = []
+    for row_data in rows:
+        display_row = list(row_data)
+        while len(display_row) < len(cols):
+            display_row.append("-")
+        padded.append(display_row[:len(cols)])
+    tree.append_rows(padded)
+
+def _set_pdf_result_cancelled(cancelled):
+    """Tandai isi tabel sebagai hasil parsing tidak lengkap; tombol Insert ikut dimatikan."""
+    global pdf_result_cancelled
+    pdf_result_cancelled = cancelled
+    root.after(0, lambda: insert_button.configure(state=tk.DISABLED if cancelled else tk.NORMAL))
+
 def browse_pdf():
+    if pdf_thread is not None and pdf_thread.is_alive():
+        messagebox.showwarning("Sedang Parsing", "PDF sebelumnya masih diproses. Batalkan dulu atau tunggu selesai.")
+        return
+
     filepath = filedialog.askopenfilename(filetypes=[("PDF Files", "*.pdf")])
     if not filepath:
         return
 
-    tree.delete(*tree.get_children())
+    tree.clear()
     label1_var.set("Manifest Kantong: -")
     label2_var.set("Kode: -")
     user_combobox.set("") # Clear user selection
     log(f"📄 Membuka file: {filepath}")
+    _start_pdf_parse(filepath)
 
-    try:
-        with pdfplumber.open(filepath) as pdf:
-            first_page_text = pdf.pages[0].extract_text()
-            for line in first_page_text.splitlines():
-                if "Manifest Kantong" in line:
-                    full_text = line.split(":")[-1].strip()
-                    label1_var.set(f"Manifest Kantong: {full_text}")
-                    kode = full_text.split()[-1]
-                    label2_var.set(kode)
-                    populate_user_combobox(kode) # Populate combobox after kode is set
-
-            all_data = []
-            for page in pdf.pages:
-                tables = page.extract_tables()
-                for table in tables:
-                    for row in table:
-                        if row and row[0] and isinstance(row[0], str) and row[0].strip().isdigit():
-                            all_data.append(row)
-            
-            if not all_data:
-                log("❗ Tidak ditemukan data tabel yang valid.")
+def _start_pdf_parse(filepath):
+    global pdf_thread
+    pdf_stop.clear()
+    # Sampai parsing selesai lengkap, isi tabel belum boleh di-insert
+    _set_pdf_result_cancelled(True)
+
+    def run():
+        total_rows = 0
+        try:
+            digest = manifest_cache.digest(filepath)
+            cached = manifest_cache.get(digest)
+            if cached is not None:
+                if cached['manifest'] is not None:
+                    root.after(0, lambda: _show_header(cached['manifest'], cached['kode']))
+                root.after(0, lambda: _append_rows(cached['rows']))
+                total_rows = len(cached['rows'])
+                _set_pdf_result_cancelled(False)
+                log(f"⚡ Manifest diambil dari cache ({total_rows} baris).")
                 return
 
-            for row_data in all_data:
-                display_row = row_data
-                while len(display_row) < len(cols):
-                    display_row.append("-")
-                tree.insert("", "end", values=display_row[:len(cols)])
+            page_count, manifest, kode = manifest_pdf.read_header(filepath)
+            if manifest is not None:
+                root.after(0, lambda: _show_header(manifest, kode))
+            log(f"📑 {page_count} halaman, parsing paralel...")
+
+            all_rows = []
+            pages_done = 0
+            for page_no, rows in manifest_pdf.iter_page_rows(filepath, page_count, stop_event=pdf_stop):
+                all_rows.extend(rows)
+                total_rows += len(rows)
+                pages_done += 1
+                root.after(0, lambda rows=rows: _append_rows(rows))
+                _set_progress(page_no + 1, page_count)
+
+            # Lengkap = semua halaman terbaca, meskipun Batal diklik setelah halaman terakhir
+            complete = pages_done == page_count
+            if complete and all_rows:
+                manifest_cache.put(digest, {'manifest': manifest, 'kode': kode, 'rows': all_rows})
+            _set_pdf_result_cancelled(not complete)
+
+            if not complete:
+                log(f"⏹️ Parsing PDF dibatalkan ({total_rows} baris sudah dimuat, tidak bisa di-insert).")
+            elif not total_rows:
+                log("❗ Tidak ditemukan data tabel yang valid.")
+            else:
+                log(f"✅ Berhasil parsing {total_rows} baris dari PDF.")
 
-            log(f"✅ Berhasil parsing {len(all_data)} baris dari PDF.")
+        except Exception as e:
+            log(f"[ERROR] Gagal parsing PDF: {e}")
+            err_msg = f"Gagal memproses file PDF.\nError: {e}"
+            root.after(0, lambda: messagebox.showerror("Error Parsing", err_msg))
+        finally:
+            _set_progress(0, 0)
 
-    except Exception as e:
-        log(f"[ERROR] Gagal parsing PDF: {e}")
-        messagebox.showerror("Error Parsing", f"Gagal memproses file PDF.\nError: {e}")
+    pdf_thread = threading.Thread(target=run, daemon=True)
+    pdf_thread.start()
+
+def batal_parsing():
+    if pdf_thread is not None and pdf_thread.is_alive():
+        pdf_stop.set()
+        log("⏹️ Membatalkan parsing PDF...")
 
 def insert_ke_db():
-    if not tree.get_children():
+    if pdf_thread is not None and pdf_thread.is_alive():
+        messagebox.showwarning("Sedang Parsing", "Tunggu parsing PDF selesai sebelum insert ke database.")
+        return
+
+    if pdf_result_cancelled:
+        messagebox.showwarning("Parsing Tidak Lengkap", "Parsing PDF dibatalkan atau gagal, data belum lengkap.\nBuka ulang PDF-nya sebelum insert.")
+        return
+
+    if not len(tree):
         messagebox.showwarning("Data Kosong", "Tidak ada data untuk di-insert.")
         return
 
@@ -488,47 +419,95 @@ def insert_ke_db():
         messagebox.showerror("Tanggal Tidak Valid", f"Format tanggal tidak valid (YYYY-MM-DD).\nError: {e}")
         return
 
+    rows = [(values[1], values[2]) for values in tree.rows]
+    user_input, pic = user_var.get(), user_display_var.get()
+
+    def set_progress(done, total):
+        root.after(0, lambda: progress.configure(maximum=total, value=done))
+
+    def run():
+        try:
+            conn = db_pool.connect()
+            try:
+                total, pid_dilewati, duplikat = insert_manifest_rows(
+                    conn, rows, kode_label2, tgl_nrc, user_input, pic, progress=set_progress)
+            finally:
+                conn.close()
+
+            msg = f"✅ Insert Selesai. Baru: {total}, PID dilewati: {pid_dilewati}, Duplikat: {duplikat}"
+            log(msg)
+            root.after(0, lambda: messagebox.showinfo("Sukses", msg))
+
+        except Exception as e:
+            log(f"[ERROR] {e}")
+            traceback.print_exc()
+            err_msg = f"Terjadi kesalahan saat insert ke DB:\n{e}"
+            root.after(0, lambda: messagebox.showerror("Error Database", err_msg))
+        finally:
+            root.after(0, lambda: progress.configure(value=0))
+
+    log(f"⬇️ Memulai insert {len(rows)} kantong ke database...")
+    threading.Thread(target=run, daemon=True).start()
+
+def import_folder():
+    global pdf_thread
+    if pdf_thread is not None and pdf_thread.is_alive():
+        messagebox.showwarning("Sedang Parsing", "PDF sebelumnya masih diproses. Batalkan dulu atau tunggu selesai.")
+        return
+
+    if not KODE_KANTOR:
+        messagebox.showwarning("KODE_KANTOR Kosong", "Isi KODE_KANTOR di .env terlebih dahulu.")
+        return
+
+    if not user_var.get():
+        populate_user_combobox(KODE_KANTOR)
+        messagebox.showinfo("Pilih User", "Pilih user terlebih dahulu, lalu klik Import Folder lagi.")
+        return
+
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        
-        total, pid_dilewati, duplikat = 0, 0, 0
-        all_items = tree.get_children()
-        progress["maximum"] = len(all_items)
-        
-        for i, item in enumerate(all_items):
-            progress["value"] = i + 1
-            root.update_idletasks()
-            
-            values = tree.item(item)['values']
-            no_kantong, produk = values[1], values[2]
-
-            if str(no_kantong).startswith("PID"):
-                pid_dilewati += 1
-                continue
-
-            cursor.execute("SELECT COUNT(*) FROM tbl_antrn WHERE connote=%s", (no_kantong,))
-            if cursor.fetchone()[0] > 0:
-                duplikat += 1
-                continue
-
-            sql = "INSERT INTO tbl_antrn (connote, produk, ktr_antrn, tgl_nrc, user_input, pic) VALUES (%s, %s, %s, %s, %s, %s)"
-            val = (no_kantong, produk, kode_label2, tgl_nrc, user_var.get(), user_display_var.get())
-            cursor.execute(sql, val)
-            total += 1
-        
-        conn.commit()
-        conn.close()
-        
-        msg = f"✅ Insert Selesai. Baru: {total}, PID dilewati: {pid_dilewati}, Duplikat: {duplikat}"
-        log(msg)
-        messagebox.showinfo("Sukses", msg)
-        progress["value"] = 0
-        
-    except Exception as e:
-        log(f"[ERROR] {e}")
-        traceback.print_exc()
-        messagebox.showerror("Error Database", f"Terjadi kesalahan saat insert ke DB:\n{e}")
+        tgl_nrc = date_picker.entry.get()
+        datetime.strptime(tgl_nrc, "%Y-%m-%d")
+    except (ValueError, Exception) as e:
+        messagebox.showerror("Tanggal Tidak Valid", f"Format tanggal tidak valid (YYYY-MM-DD).\nError: {e}")
+        return
+
+    folder = filedialog.askdirectory(title="Pilih folder PDF manifest")
+    if not folder:
+        return
+    pdfs = manifest_batch.list_pdfs([folder])
+    if not pdfs:
+        messagebox.showwarning("Folder Kosong", "Tidak ada file PDF di folder tersebut.")
+        return
+
+    user_input, pic = user_var.get(), user_display_var.get()
+    if not messagebox.askyesno("Konfirmasi Import Folder",
+                               f"Import {len(pdfs)} PDF manifest dari:\n{folder}\n\nTgl NRC: {tgl_nrc}\nUser: {user_input} ({pic})\n\nLanjutkan?"):
+        return
+
+    def run():
+        try:
+            reports = manifest_batch.import_manifests(
+                pdfs, tgl_nrc, user_input, pic, kode_kantor=KODE_KANTOR, cache=manifest_cache,
+                log=log, progress=_set_progress, stop_event=pdf_stop)
+            gagal = [r for r in reports if r['status'] != "OK"]
+            lines = [f"File OK: {len(reports) - len(gagal)}/{len(reports)}",
+                     f"Kantong baru: {sum(r['baru'] for r in reports)}"]
+            lines += [f"- {r['file']}: {r['status']}" for r in gagal[:15]]
+            if len(gagal) > 15:
+                lines.append(f"... dan {len(gagal) - 15} file lain (lihat log)")
+            msg = "\n".join(lines)
+            root.after(0, lambda: messagebox.showinfo("Import Folder Selesai", msg))
+        except Exception as e:
+            log(f"[ERROR] {e}")
+            traceback.print_exc()
+            err_msg = f"Terjadi kesalahan saat import folder:\n{e}"
+            root.after(0, lambda: messagebox.showerror("Error Import Folder", err_msg))
+        finally:
+            _set_progress(0, 0)
+
+    pdf_stop.clear()
+    pdf_thread = threading.Thread(target=run, daemon=True)
+    pdf_thread.start()
 
 # --- System Tray Functions ---
 
@@ -546,6 +525,8 @@ def run_manual_update_thread():
 def quit_app(icon, item):
     log("👋 Aplikasi akan ditutup.")
     background_thread_stop.set()
+    pdf_stop.set()
+    manifest_pdf.shutdown_executor()
     if icon:
         icon.stop()
     root.quit()
@@ -576,7 +557,12 @@ def on_closing():
     root.withdraw()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    log_sink = LogSink("import_r7")
+    engine = ScrapeEngine(log=log, progress=_set_progress, stop_event=background_thread_stop)
+    build_gui()
     cek_koneksi()
+    metrics.start_server(log=log)
     
     update_thread = threading.Thread(target=_background_update_task, daemon=True)
     update_thread.start()
@@ -0,0 +1,313 @@
+#
+# run_bench.py - benchmark throughput scrape, import manifest, upload pensiun dan PDF
+#----------------------------------------------------------------------------
+#
+# Semua jalan offline: halaman kibana/pid dilayani stub_server.py dari
+# fixture HTML, tabel MySQL dibuat di database sekali pakai bench_* (seed.py)
+# di server BENCH_DB_HOST (wajib, bukan server .env) lalu dihapus lagi.
+# Yang diukur adalah modul non-GUI yang dipanggil aplikasi:
+#
+#   kibana  fetch + parse_kibana (TrackingFetcher)           connote/s
+#   pid     fetch + regex SLA (seperti update_sla)           connote/s
+#   scrape  fetch_due + ScrapeEngine.scrape -> tbl_antrn     connote/s  (IMPORT_R7 _perform_scraping_and_update)
+#   import  manifest_import.insert_manifest_rows             baris/s    (IMPORT_R7 insert_ke_db)
+#   upload  sheet_reader + pens_upload.upload_new/sync_rows  baris/s    (up_db-pensiun _upload_worker)
+#   pdf     manifest_pdf.parse_manifest                      halaman/s  (IMPORT_R7 browse_pdf, butuh --pdf)
+#
+# Hasil ditulis ke bench/results/<waktu>.json; --compare membandingkan
+# dengan hasil sebelumnya. Jika MySQL tidak bisa dihubungi, benchmark DB
+# dilewati dan sisanya tetap jalan.
+#
+#   python bench/run_bench.py --connotes 2000 --latency-ms 80 --error-rate 0.01
+#   python bench/run_bench.py --pdf manifest.pdf --compare bench/results/20250101-080000.json
+#
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from openpyxl import Workbook  # noqa: E402
+import db_pool  # noqa: E402
+import manifest_import  # noqa: E402
+import manifest_pdf  # noqa: E402
+import metrics  # noqa: E402
+import pens_upload  # noqa: E402
+import sheet_reader  # noqa: E402
+import seed  # noqa: E402
+from poll_schedule import fetch_due  # noqa: E402
+from scrape_engine import ScrapeEngine, TrackingFetcher  # noqa: E402
+from stub_server import start_stub  # noqa: E402
+from tracking_parser import parse_kibana  # noqa: E402
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+SLA_RE = re.compile(r"SLA\s*:\s*(\d+)\s*hari")  # sama dengan update_sla.get_sla_from_web
+
+
+def _quiet(msg):
+    pass
+
+
+class Result(dict):
+    """Satu baris laporan: nama, jumlah item, durasi, laju dan jumlah error."""
+
+    def __init__(self, name, unit, items, seconds, errors=0, **extra):
+        super().__init__(name=name, unit=unit, items=items, seconds=round(seconds, 4),
+                         rate=round(items / seconds, 2) if seconds > 0 else 0.0, errors=errors, **extra)
+
+
+def _stub_fetcher(template, sumber, workers):
+    # Tanpa cache dan arsip: setiap connote benar-benar lewat HTTP
+    return TrackingFetcher(workers, timeout=15, url_template=template, verify=False,
+                           cache=None, sumber=sumber, archive=None)
+
+
+def bench_kibana(stub, connotes, workers):
+    fetcher = _stub_fetcher(stub.kibana_template, "kibana", workers)
+    errors = 0
+    start = time.perf_counter()
+    for _, html, error in fetcher.fetch_many(connotes):
+        if error is not None:
+            errors += 1
+            continue
+        with metrics.stage("parse", source="kibana"):
+            parse_kibana(html).to_update()
+    return Result("kibana", "connote/s", len(connotes), time.perf_counter() - start, errors, workers=workers)
+
+
+def bench_pid(stub, connotes, workers):
+    fetcher = _stub_fetcher(stub.pid_template, "pid", workers)
+    errors = 0
+    start = time.perf_counter()
+    for _, html, error in fetcher.fetch_many(connotes):
+        if error is not None:
+            errors += 1
+            continue
+        with metrics.stage("parse", source="pid"):
+            SLA_RE.search(html)
+    return Result("pid", "connote/s", len(connotes), time.perf_counter() - start, errors, workers=workers)
+
+
+def bench_scrape(stub, count, workers, batch_size):
+    conn = db_pool.connect()
+    try:
+        seed.truncate(conn, "tbl_antrn", "tracking_fp")
+        seed.seed_antrn(conn, count, st="33")
+    finally:
+        conn.close()
+
+    engine = ScrapeEngine(workers, batch_size=batch_size, log=_quiet)
+    engine.fetcher = _stub_fetcher(stub.kibana_template, "kibana", workers)
+    # Sama dengan satu siklus auto-update: ambil yang jatuh jadwal, scrape, tulis batch
+    start = time.perf_counter()
+    rows = fetch_due("33", limit=count)
+    _, failed = engine.scrape(rows)
+    seconds = time.perf_counter() - start
+    return Result("scrape", "connote/s", len(rows), seconds, failed, workers=workers, batch_size=batch_size)
+
+
+def manifest_rows(count, existing, seed_value=2):
+    """Baris (no_kantong, produk) mirip isi PDF: ada kantong PID, ganda, dan yang sudah di DB."""
+    rng = random.Random(seed_value)
+    rows = [(c, "PKH") for c in seed.connotes(count, prefix="P26", seed=seed_value)]
+    for i in range(0, count, 50):
+        rows[i] = (f"PID{rng.randrange(10**9, 10**10)}", "PKH")
+    rows.extend((c, "PKH") for c in existing[:count // 20])
+    rows.extend(rows[:count // 50])
+    rng.shuffle(rows)
+    return rows
+
+
+def bench_import(count):
+    conn = db_pool.connect()
+    try:
+        seed.truncate(conn, "tbl_antrn")
+        existing = seed.seed_antrn(conn, count // 10 or 1)
+        rows = manifest_rows(count, existing)
+        start = time.perf_counter()
+        with metrics.stage("db_write", items=len(rows), table="tbl_antrn"):
+            new, pid, dup = manifest_import.insert_manifest_rows(
+                conn, rows, "67271", datetime.now().date(), "bench", "bench")
+        seconds = time.perf_counter() - start
+    finally:
+        conn.close()
+    return Result("import", "baris/s", len(rows), seconds, inserted=new, pid=pid, duplicate=dup)
+
+
+def write_pens_sheet(path, count, changed_every=10):
+    """db_pens.xlsx sintetis: kolom REQUIRED_COLUMNS, sebagian baris berubah dari seed."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(pens_upload.REQUIRED_COLUMNS))
+    for i, row in enumerate(seed.pens_rows(count)):
+        if i % changed_every == 0:
+            row = row[:5] + (row[5] + " BARU",) + row[6:]
+        ws.append(row)
+    wb.save(path)
+
+
+def bench_upload(count):
+    results = []
+    fd, path = tempfile.mkstemp(suffix=".xlsx", prefix="bench_pens_")
+    os.close(fd)
+    try:
+        write_pens_sheet(path, count)
+        for mode in ("upload_new", "sync_rows"):
+            conn = db_pool.connect()
+            try:
+                seed.truncate(conn, "pens_tblpens")
+                seed.seed_pens(conn, count // 2)
+                chunks = sheet_reader.iter_chunks(path)
+                start = time.perf_counter()
+                if mode == "upload_new":
+                    inserted, skipped = pens_upload.upload_new(conn, chunks)
+                    extra = {"inserted": inserted, "skipped": skipped}
+                else:
+                    extra = pens_upload.sync_rows(conn, chunks, flag_missing=True, log=_quiet)
+                seconds = time.perf_counter() - start
+            finally:
+                conn.close()
+            results.append(Result(f"upload.{mode}", "baris/s", count, seconds, **extra))
+    finally:
+        os.remove(path)
+    return results
+
+
+def bench_pdf(path, repeat):
+    page_count, _, _ = manifest_pdf.read_header(path)
+    rows = 0
+    start = time.perf_counter()
+    try:
+        for _ in range(repeat):
+            with metrics.stage("parse", items=page_count, source="pdf"):
+                rows += len(manifest_pdf.parse_manifest(path)["rows"])
+    finally:
+        manifest_pdf.shutdown_executor()
+    return Result("pdf", "halaman/s", page_count * repeat, time.perf_counter() - start,
+                  pages=page_count, rows=rows, workers=manifest_pdf.PDF_WORKERS)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_table(results, baseline=None):
+    previous = {r["name"]: r for r in (baseline or {}).get("results", [])}
+    print(f"{'benchmark':<18} {'item':>8} {'detik':>9} {'laju':>12} {'unit':<10} {'error':>5}  banding")
+    for r in results:
+        line = f"{r['name']:<18} {r['items']:>8} {r['seconds']:>9.2f} {r['rate']:>12.1f} {r['unit']:<10} {r['errors']:>5}"
+        old = previous.get(r["name"])
+        if old and old.get("rate"):
+            line += f"  {(r['rate'] - old['rate']) / old['rate'] * 100:+.1f}% (dulu {old['rate']:.1f})"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline pipeline scrape/import/upload/PDF.")
+    parser.add_argument("--connotes", type=int, default=1000, help="jumlah connote untuk kibana/pid/scrape")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--import-rows", type=int, default=20000)
+    parser.add_argument("--upload-rows", type=int, default=50000)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--pdf", help="file PDF manifest untuk benchmark parse")
+    parser.add_argument("--pdf-repeat", type=int, default=3)
+    parser.add_argument("--schema", default="bench_app_kantor", help="database sekali pakai (wajib bench_*)")
+    parser.add_argument("--keep-schema", action="store_true", help="jangan hapus database setelah selesai")
+    parser.add_argument("--no-db", action="store_true", help="lewati benchmark yang butuh MySQL")
+    parser.add_argument("--compare", help="file JSON hasil sebelumnya untuk dibandingkan")
+    parser.add_argument("--output", help="file JSON hasil (default bench/results/<waktu>.json)")
+    args = parser.parse_args(argv)
+
+    stub = start_stub(args.latency_ms, args.jitter_ms, args.error_rate)
+    connotes = seed.connotes(args.connotes)
+    bench_start = metrics.REGISTRY.snapshot()
+    results = []
+    skipped = []
+
+    try:
+        print(f"🌐 Stub server {stub.base_url} (latensi {args.latency_ms:g}±{args.jitter_ms:g} ms, "
+              f"error {args.error_rate:.0%})")
+        results.append(bench_kibana(stub, connotes, args.workers))
+        results.append(bench_pid(stub, connotes, args.workers))
+
+        db_ready = False
+        if args.no_db:
+            skipped.append("db: --no-db")
+        else:
+            try:
+                seed.create_schema(args.schema)
+                db_ready = True
+                print(f"🗄️ Database benchmark {args.schema} dibuat.")
+            except Exception as e:
+                skipped.append(f"db: {e}")
+                print(f"⚠️ MySQL tidak bisa dipakai, benchmark scrape/import/upload dilewati: {e}")
+
+        if db_ready:
+            try:
+                results.append(bench_scrape(stub, args.connotes, args.workers, args.batch_size))
+                results.append(bench_import(args.import_rows))
+                results.extend(bench_upload(args.upload_rows))
+            finally:
+                if not args.keep_schema:
+                    seed.drop_schema(args.schema)
+
+        if args.pdf:
+            results.append(bench_pdf(args.pdf, args.pdf_repeat))
+        else:
+            skipped.append("pdf: --pdf tidak diberikan")
+    finally:
+        stub.shutdown()
+
+    report = {
+        "meta": {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+            "stub_requests": stub.requests,
+            "stub_errors": stub.errors,
+            "skipped": skipped,
+        },
+        "results": results,
+        "metrics": metrics.summary(bench_start),
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print()
+    print_table(results, baseline)
+    for reason in skipped:
+        print(f"⏭️ Dilewati: {reason}")
+    print(report["metrics"])
+    print(f"💾 Hasil disimpan di {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,164 @@
+#
+# seed.py - skema MySQL sekali pakai untuk benchmark (bench_*)
+#----------------------------------------------------------------------------
+#
+# Membuat database baru bernama bench_<sesuatu> di server MySQL KHUSUS
+# benchmark (BENCH_DB_HOST wajib diisi, plus BENCH_DB_USER/BENCH_DB_PASS/
+# BENCH_DB_PORT), mengisi tbl_antrn dan pens_tblpens dengan volume mirip
+# produksi, lalu dihapus lagi setelah benchmark. Server dari .env tidak
+# pernah dipakai untuk CREATE/DROP; dari sana hanya dibaca definisi tabel
+# (SHOW CREATE TABLE) supaya tipe kolom sama persis dengan produksi. Nama
+# database wajib diawali "bench_".
+#
+import os
+import random
+import re
+from datetime import datetime, timedelta
+import mysql.connector
+from dotenv import load_dotenv
+import db_pool
+from db_schema import ensure_fingerprint_table, ensure_poll_schedule_columns, migrate_jatuh_tempo_column
+
+load_dotenv()
+
+BENCH_SCHEMA_PREFIX = "bench_"
+SEED_CHUNK_SIZE = 1000
+
+# Dibaca sekali saat import, sebelum create_schema mengarahkan DB_* ke bench_*
+SOURCE_DB_CONFIG = db_pool.load_db_config()
+
+# Disalin dari database produksi (.env) apa adanya
+SOURCE_TABLES = ("tbl_antrn", "pens_tblpens")
+RE_AUTO_INCREMENT = re.compile(r"\s+AUTO_INCREMENT=\d+")
+
+
+def bench_db_config():
+    """Konfigurasi koneksi server benchmark (tanpa database)."""
+    host = os.getenv("BENCH_DB_HOST")
+    if not host:
+        raise RuntimeError("BENCH_DB_HOST belum diisi; benchmark tidak memakai server MySQL dari .env")
+    config = {
+        "host": host,
+        "port": int(os.getenv("BENCH_DB_PORT", "3306")),
+        "user": os.getenv("BENCH_DB_USER", "root"),
+        "password": os.getenv("BENCH_DB_PASS", ""),
+        "connection_timeout": 15,
+        "use_pure": True,
+    }
+    if (config["host"], config["port"]) == (SOURCE_DB_CONFIG["host"], SOURCE_DB_CONFIG["port"]):
+        raise RuntimeError(f"BENCH_DB_HOST {host}:{config['port']} sama dengan server produksi di .env")
+    return config
+
+
+def source_table_definitions(tables=SOURCE_TABLES):
+    """CREATE TABLE dari database produksi (.env), hanya dibaca.
+
+    Koneksi dibuka langsung, bukan lewat db_pool: pool default nanti dipakai
+    benchmark dan harus menunjuk ke database bench_*.
+    """
+    conn = mysql.connector.connect(**SOURCE_DB_CONFIG)
+    try:
+        cursor = conn.cursor()
+        statements = []
+        for table in tables:
+            cursor.execute(f"SHOW CREATE TABLE `{table}`")
+            statements.append(RE_AUTO_INCREMENT.sub("", cursor.fetchone()[1]))
+        return statements
+    finally:
+        conn.close()
+
+
+def _check_name(schema):
+    if not schema.startswith(BENCH_SCHEMA_PREFIX) or not schema.replace("_", "").isalnum():
+        raise ValueError(f"Nama database benchmark harus diawali '{BENCH_SCHEMA_PREFIX}': {schema!r}")
+
+
+def create_schema(schema):
+    """Buat database kosong + salinan tabel produksi, lalu arahkan db_pool ke database itu."""
+    _check_name(schema)
+    server = bench_db_config()
+    statements = source_table_definitions()
+    conn = mysql.connector.connect(**server)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{schema}`")
+        cursor.execute(f"CREATE DATABASE `{schema}` CHARACTER SET utf8mb4")
+        cursor.execute(f"USE `{schema}`")
+        for statement in statements:
+            cursor.execute(statement)
+        conn.commit()
+        ensure_poll_schedule_columns(conn)
+        ensure_fingerprint_table(conn)
+        try:
+            migrate_jatuh_tempo_column(conn)
+        except RuntimeError as e:
+            # Sama dengan yang akan dilaporkan jatuh_tempo.py --check di produksi
+            print(f"⚠️ Kolom jatuh_tempo tidak dibuat di {schema}: {e}")
+    finally:
+        conn.close()
+
+    # db_pool membaca env saat pool pertama dibuat
+    os.environ.update({"DB_HOST": server["host"], "DB_PORT": str(server["port"]), "DB_USER": server["user"],
+                       "DB_PASS": server["password"], "DB_NAME": schema})
+
+
+def drop_schema(schema):
+    _check_name(schema)
+    conn = mysql.connector.connect(**bench_db_config())
+    try:
+        conn.cursor().execute(f"DROP DATABASE IF EXISTS `{schema}`")
+    finally:
+        conn.close()
+
+
+def connotes(count, prefix="P25", seed=1):
+    rng = random.Random(seed)
+    return [f"{prefix}{rng.randrange(10**9, 10**10)}{i:05d}" for i in range(count)]
+
+
+def _insert(conn, sql, rows):
+    cursor = conn.cursor()
+    try:
+        for i in range(0, len(rows), SEED_CHUNK_SIZE):
+            cursor.executemany(sql, rows[i:i + SEED_CHUNK_SIZE])
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def seed_antrn(conn, count, st="33", seed=1):
+    """Isi tbl_antrn dengan `count` connote; mengembalikan daftar connote."""
+    today = datetime.now().date()
+    keys = connotes(count, seed=seed)
+    rows = [(c, "PKH", "67271", today - timedelta(days=i % 14), "bench", "bench", st, "PROCESSING")
+            for i, c in enumerate(keys)]
+    _insert(conn, "INSERT INTO tbl_antrn (connote, produk, ktr_antrn, tgl_nrc, user_input, pic, st, status) "
+                  "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)", rows)
+    return keys
+
+
+def pens_rows(count, seed=1):
+    """Baris sheet roster pensiun (kolom seperti db_pens.xlsx)."""
+    rng = random.Random(seed)
+    jenis = ("PNS", "TNI", "POLRI", "JANDA", "DUDA")
+    return [(100000 + i, f"0{rng.randrange(10**11, 10**12)}", f"{rng.randrange(10**14, 10**15)}",
+             f"PENERIMA {i:06d}", rng.choice(jenis), f"DSN KRAJAN RT {i % 20:02d} RW {i % 7:02d} SUKOREJO",
+             f"KTB{i % 500:04d}")
+            for i in range(count)]
+
+
+def seed_pens(conn, count, seed=1):
+    rows = [(str(nP), norek2, norek, nm, jp, ad, ktb, 1)
+            for nP, norek2, norek, nm, jp, ad, ktb in pens_rows(count, seed)]
+    _insert(conn, "INSERT INTO pens_tblpens (nP, norek2, norek, nmP, jP, adP, ktby, sts) "
+                  "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)", rows)
+
+
+def truncate(conn, *tables):
+    cursor = conn.cursor()
+    try:
+        for table in tables:
+            cursor.execute(f"TRUNCATE TABLE `{table}`")
+        conn.commit()
+    finally:
+        cursor.close()
@@ -0,0 +1,147 @@
+#
+# stub_server.py - server HTTP lokal pengganti kibana / pid untuk benchmark
+#----------------------------------------------------------------------------
+#
+# Menjawab URL yang sama bentuknya dengan server asli dari fixture HTML:
+#
+#   /3.php?id=<connote>                       -> fixtures/kibana/*.html
+#   /detail_lacak_banyak.php?id=<connote_b64> -> fixtures/pid/*.html
+#
+# Fixture dipilih dari hash connote (stabil antar run). Latensi, jitter dan
+# rasio error (HTTP 500) bisa diatur supaya mirip kondisi produksi.
+#
+#   python bench/stub_server.py --port 8099 --latency-ms 150 --error-rate 0.02
+#
+import argparse
+import os
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+
+
+def load_fixtures(sumber, directory=FIXTURES_DIR):
+    folder = os.path.join(directory, sumber)
+    pages = []
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(".html"):
+            with open(os.path.join(folder, name), "rb") as f:
+                pages.append(f.read())
+    if not pages:
+        raise FileNotFoundError(f"Tidak ada fixture .html di {folder}")
+    return pages
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Antrian accept lebih panjang dari default 5 supaya worker banyak tidak ditolak
+    request_queue_size = 128
+
+    def __init__(self, address, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=1):
+        super().__init__(address, _Handler)
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.pages = {"kibana": load_fixtures("kibana"), "pid": load_fixtures("pid")}
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def kibana_template(self):
+        return self.base_url + "/3.php?id={connote}"
+
+    @property
+    def pid_template(self):
+        return self.base_url + "/detail_lacak_banyak.php?id={connote_b64}"
+
+    def draw(self):
+        """(delay detik, gagal?) untuk satu request; random bersama dikunci agar bisa direproduksi."""
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        return delay, failed
+
+    def page_for(self, sumber, key):
+        pages = self.pages[sumber]
+        return pages[zlib.crc32(key.encode()) % len(pages)]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="stub-server", daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, seperti server asli
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        key = parse_qs(url.query).get("id", [""])[0]
+        if url.path.endswith("/3.php"):
+            sumber = "kibana"
+        elif url.path.endswith("/detail_lacak_banyak.php"):
+            sumber = "pid"
+        else:
+            self._reply(404, b"not found")
+            return
+
+        delay, failed = self.server.draw()
+        if delay:
+            time.sleep(delay)
+        if failed:
+            self._reply(500, b"stub error")
+            return
+        self._reply(200, self.server.page_for(sumber, key))
+
+    def _reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(latency_ms=0, jitter_ms=0, error_rate=0.0, seed=1, port=0):
+    """Jalankan stub di thread daemon pada 127.0.0.1; panggil .shutdown() setelah selesai."""
+    return StubServer(("127.0.0.1", port), latency_ms, jitter_ms, error_rate, seed).start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stub server kibana/pid dari fixture HTML.")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    server = StubServer(("127.0.0.1", args.port), args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    print(f"Stub kibana: {server.kibana_template}")
+    print(f"Stub pid   : {server.pid_template}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"{server.requests} request, {server.errors} error")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
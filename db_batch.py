@@ -0,0 +1,129 @@
+#
+# db_batch.py - penulis UPDATE per batch untuk hasil scraping
+#----------------------------------------------------------------------------
+#
+import os
+from dotenv import load_dotenv
+import metrics
+
+load_dotenv()
+
+DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", "200"))
+
+
+class BatchWriteError(Exception):
+    """Flush satu batch gagal dan sudah di-rollback. `keys` berisi key yang gagal ditulis."""
+
+    def __init__(self, keys, cause):
+        super().__init__(f"Gagal menulis batch ({len(keys)} baris): {cause}")
+        self.keys = keys
+        self.cause = cause
+
+
+class BatchWriter:
+    """Menampung update per key lalu menulisnya sebagai satu transaksi per batch.
+
+    Setiap kelompok baris dengan kolom yang sama ditulis dengan satu
+    statement UPDATE ... JOIN ke tabel turunan (SELECT ... UNION ALL ...),
+    jadi satu batch hanya butuh beberapa round trip dan satu commit.
+    Bekerja dengan koneksi mysql.connector maupun pymysql (paramstyle %s).
+
+    `extra_where` (dengan alias `t` untuk tabel target) dan `extra_params`
+    ditambahkan ke setiap UPDATE. `after_flush(cursor, batch)` dipanggil
+    sebelum commit, untuk statement set-based lain di transaksi yang sama.
+    `before_flush(cursor, batch)` sama, tapi sebelum UPDATE, jadi masih
+    melihat isi baris yang dicek `extra_where`.
+    """
+
+    def __init__(self, conn, table="tbl_antrn", key="connote", batch_size=DB_BATCH_SIZE,
+                 extra_where="", extra_params=(), after_flush=None, log=None, before_flush=None):
+        self.conn = conn
+        self.table = table
+        self.key = key
+        self.batch_size = max(1, int(batch_size))
+        self.extra_where = extra_where
+        self.extra_params = tuple(extra_params)
+        self.after_flush = after_flush
+        self.before_flush = before_flush
+        self.log = log
+        self.pending = {}
+        self.written = 0
+        self.affected = 0
+
+    def add(self, key_value, data):
+        """Masukkan satu baris; flush otomatis jika batch sudah penuh."""
+        self.pending[key_value] = dict(data)
+        if len(self.pending) >= self.batch_size:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        """Tulis semua baris yang tertunda dalam satu transaksi. Mengembalikan jumlah baris terpengaruh."""
+        if not self.pending:
+            return 0
+        batch, self.pending = self.pending, {}
+
+        cursor = self.conn.cursor()
+        try:
+            with metrics.stage("db_write", items=len(batch), table=self.table):
+                affected = self._write(cursor, batch)
+        except Exception as e:
+            self.conn.rollback()
+            raise BatchWriteError(list(batch), e) from e
+        finally:
+            cursor.close()
+
+        self.written += len(batch)
+        self.affected += affected
+        if self.log:
+            self.log(f"💾 Batch {len(batch)} baris ditulis ke {self.table} ({affected} berubah).")
+        return affected
+
+    def _write(self, cursor, batch):
+        affected = 0
+        if self.before_flush:
+            self.before_flush(cursor, batch)
+        for columns, items in self._group_by_columns(batch):
+            sql, params = self._build_update(columns, items)
+            cursor.execute(sql, params)
+            affected += max(cursor.rowcount, 0)
+        if self.after_flush:
+            self.after_flush(cursor, batch)
+        self.conn.commit()
+        return affected
+
+    def close(self):
+        return self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        return False
+
+    @staticmethod
+    def _group_by_columns(batch):
+        groups = {}
+        for key_value, data in batch.items():
+            groups.setdefault(tuple(data.keys()), []).append((key_value, data))
+        return groups.items()
+
+    def _build_update(self, columns, items):
+        first = ", ".join([f"%s AS `{self.key}`"] + [f"%s AS `{col}`" for col in columns])
+        rest = "SELECT " + ", ".join(["%s"] * (len(columns) + 1))
+        derived = " UNION ALL ".join([f"SELECT {first}"] + [rest] * (len(items) - 1))
+
+        set_clauses = ", ".join(f"t.`{col}` = v.`{col}`" for col in columns)
+        sql = (f"UPDATE `{self.table}` t JOIN ({derived}) v ON t.`{self.key}` = v.`{self.key}` "
+               f"SET {set_clauses}")
+        if self.extra_where:
+            sql += f" WHERE {self.extra_where}"
+
+        params = []
+        for key_value, data in items:
+            params.append(key_value)
+            params.extend(data[col] for col in columns)
+        params.extend(self.extra_params)
+        return sql, tuple(params)
@@ -0,0 +1,102 @@
+#
+# db_pool.py - pool koneksi MySQL bersama untuk semua aplikasi kantor
+#----------------------------------------------------------------------------
+#
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def load_db_config(env_file=None):
+    """Membaca konfigurasi DB dari .env (atau env_file lain).
+
+    Nama variabel password di skrip lama tidak seragam, jadi DB_PASS dan
+    DB_PASSWORD sama-sama diterima (DB_PASS didahulukan).
+
+    .env baru dibaca di sini, bukan saat import: aplikasi yang memakai file
+    env sendiri (mis. conn_pens.env) tidak boleh ketimpa nilai .env utama.
+    """
+    if env_file:
+        load_dotenv(dotenv_path=env_file, override=True)
+    else:
+        load_dotenv()
+    return {
+        "host": os.getenv("DB_HOST", ""),
+        "port": int(os.getenv("DB_PORT", "3306")),
+        "user": os.getenv("DB_USER", ""),
+        "password": os.getenv("DB_PASS") or os.getenv("DB_PASSWORD") or "",
+        "database": os.getenv("DB_NAME", ""),
+        "connection_timeout": 15,
+        "use_pure": True,
+    }
+
+
+def get_pool(env_file=None):
+    """Pool per file konfigurasi, dibuat saat pertama kali dipakai.
+
+    Koneksi dibuka semua saat pool dibuat (warm). Setiap kali koneksi
+    diambil, mysql.connector mengecek is_connected() dan reconnect jika
+    koneksinya sudah putus, dan sesi di-reset saat dikembalikan.
+    """
+    with _pools_lock:
+        pool = _pools.get(env_file)
+        if pool is None:
+            config = load_db_config(env_file)
+            pool = pooling.MySQLConnectionPool(
+                pool_name=f"app_kantor_{len(_pools)}",
+                pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+                pool_reset_session=True,
+                **config,
+            )
+            _pools[env_file] = pool
+        return pool
+
+
+def connect(env_file=None, timeout=None):
+    """Ambil koneksi dari pool; conn.close() mengembalikannya ke pool.
+
+    Jika semua koneksi sedang dipakai, tunggu sampai ada yang kembali
+    (maksimal `timeout` detik, default DB_POOL_TIMEOUT) alih-alih langsung gagal.
+    """
+    pool = get_pool(env_file)
+    if timeout is None:
+        timeout = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return pool.get_connection()
+        except PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+
+
+def fetch_all(sql, params=(), dictionary=False, env_file=None):
+    """Jalankan satu SELECT dengan koneksi pool dan kembalikan semua barisnya."""
+    conn = connect(env_file)
+    try:
+        cursor = conn.cursor(dictionary=dictionary)
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+
+
+def check_connection(env_file=None):
+    """Health check: ambil satu koneksi dari pool dan ping server."""
+    conn = connect(env_file)
+    try:
+        conn.ping(reconnect=True, attempts=2, delay=1)
+        return conn.is_connected()
+    finally:
+        conn.close()
+
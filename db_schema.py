@@ -0,0 +1,136 @@
+#
+# db_schema.py - tambahan kolom/index/tabel yang dibutuhkan aplikasi Python
+#----------------------------------------------------------------------------
+#
+# Semua fungsi idempotent: cek information_schema dulu, baru ALTER/CREATE
+# jika belum ada. Fungsi ensure_* aman dipanggil setiap aplikasi start;
+# migrate_jatuh_tempo_column hanya dijalankan manual (jatuh_tempo.py --migrate).
+#
+
+# Tanggal batas SLA: lewat jatuh tempo jika CURDATE() > DATE(tgl_kirim) + sla hari,
+# sama dengan DATEDIFF(CURDATE(), tgl_kirim) > sla di get_jatuh_tempo.php lama
+JATUH_TEMPO_EXPR = "DATE(tgl_kirim) + INTERVAL sla DAY"
+JATUH_TEMPO_DATE_TYPES = ("date", "datetime", "timestamp")
+JATUH_TEMPO_SLA_TYPES = ("tinyint", "smallint", "mediumint", "int", "bigint")
+
+
+def column_exists(cursor, table, column):
+    cursor.execute(
+        "SELECT 1 FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column))
+    return cursor.fetchone() is not None
+
+
+def index_exists(cursor, table, index):
+    cursor.execute(
+        "SELECT 1 FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1",
+        (table, index))
+    return cursor.fetchone() is not None
+
+
+def add_column_if_missing(cursor, table, column, definition):
+    if column_exists(cursor, table, column):
+        return False
+    cursor.execute(f"ALTER TABLE `{table}` ADD COLUMN `{column}` {definition}")
+    return True
+
+
+def add_index_if_missing(cursor, table, index, columns):
+    if index_exists(cursor, table, index):
+        return False
+    cols = ", ".join(f"`{c}`" for c in columns)
+    cursor.execute(f"ALTER TABLE `{table}` ADD INDEX `{index}` ({cols})")
+    return True
+
+
+def ensure_poll_schedule_columns(conn):
+    """Kolom jadwal cek per connote di tbl_antrn plus index (st, next_check_at)."""
+    cursor = conn.cursor()
+    try:
+        changed = add_column_if_missing(cursor, "tbl_antrn", "next_check_at", "DATETIME NULL DEFAULT NULL")
+        changed |= add_column_if_missing(cursor, "tbl_antrn", "last_change_at", "DATETIME NULL DEFAULT NULL")
+        changed |= add_index_if_missing(cursor, "tbl_antrn", "idx_antrn_st_next_check", ("st", "next_check_at"))
+        conn.commit()
+        return changed
+    finally:
+        cursor.close()
+
+
+def jatuh_tempo_problems(cursor):
+    """Alasan kolom jatuh_tempo belum aman ditambahkan ke tbl_antrn (list kosong = aman).
+
+    Kolom generated dihitung MySQL di setiap INSERT/UPDATE. Dengan strict SQL
+    mode, satu nilai tgl_kirim/sla yang tidak bisa dihitung membuat ALTER gagal
+    dan sesudahnya membuat tulis ke baris itu gagal, dari aplikasi mana pun.
+    """
+    cursor.execute(
+        "SELECT COLUMN_NAME, DATA_TYPE, COLUMN_TYPE FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'tbl_antrn' AND COLUMN_NAME IN ('tgl_kirim', 'sla')")
+    types = {row[0].lower(): (row[1].lower(), row[2]) for row in cursor.fetchall()}
+    problems = []
+    for column, allowed in (("tgl_kirim", JATUH_TEMPO_DATE_TYPES), ("sla", JATUH_TEMPO_SLA_TYPES)):
+        if column not in types:
+            problems.append(f"kolom {column} tidak ada")
+        elif types[column][0] not in allowed:
+            problems.append(f"tipe {column} adalah {types[column][1]}, harus {'/'.join(allowed).upper()}")
+    if problems:
+        return problems
+
+    # Tipe sudah benar; sisa risiko tinggal tanggal nol/tidak valid
+    cursor.execute(
+        "SELECT COUNT(*) FROM tbl_antrn "
+        f"WHERE tgl_kirim IS NOT NULL AND sla IS NOT NULL AND ({JATUH_TEMPO_EXPR}) IS NULL")
+    bad = cursor.fetchone()[0]
+    if bad:
+        problems.append(f"{bad} baris dengan tgl_kirim/sla yang tidak bisa dihitung "
+                        "(mis. tgl_kirim '0000-00-00'), perbaiki dulu datanya")
+    return problems
+
+
+def migrate_jatuh_tempo_column(conn):
+    """Tambah kolom jatuh_tempo di tbl_antrn plus index (st, jatuh_tempo).
+
+    Bukan bagian start aplikasi: dijalankan sekali lewat
+    `python jatuh_tempo.py --migrate`. Kolom dibuat VIRTUAL (tanpa rebuild
+    tabel) dan index dibangun online dengan LOCK=NONE, jadi tulis ke tbl_antrn
+    tetap jalan selama migrasi. Raise RuntimeError jika jatuh_tempo_problems
+    menemukan masalah; tidak ada yang diubah.
+    """
+    cursor = conn.cursor()
+    try:
+        if column_exists(cursor, "tbl_antrn", "jatuh_tempo"):
+            changed = False
+        else:
+            problems = jatuh_tempo_problems(cursor)
+            if problems:
+                raise RuntimeError("; ".join(problems))
+            cursor.execute(f"ALTER TABLE tbl_antrn ADD COLUMN jatuh_tempo DATE AS ({JATUH_TEMPO_EXPR}) VIRTUAL, "
+                           "ALGORITHM=INPLACE, LOCK=NONE")
+            changed = True
+        if not index_exists(cursor, "tbl_antrn", "idx_antrn_st_jatuh_tempo"):
+            cursor.execute("ALTER TABLE tbl_antrn ADD INDEX idx_antrn_st_jatuh_tempo (st, jatuh_tempo), "
+                           "ALGORITHM=INPLACE, LOCK=NONE")
+            changed = True
+        conn.commit()
+        return changed
+    finally:
+        cursor.close()
+
+
+def ensure_fingerprint_table(conn):
+    """Tabel tracking_fp untuk sidik jari hasil scrape terakhir (lihat fingerprint.py)."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS tracking_fp ("
+            " sumber VARCHAR(16) NOT NULL,"
+            " connote VARCHAR(64) NOT NULL,"
+            " fp CHAR(40) NOT NULL,"
+            " updated_at DATETIME NOT NULL,"
+            " PRIMARY KEY (sumber, connote)"
+            ")")
+        conn.commit()
+    finally:
+        cursor.close()
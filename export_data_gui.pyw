@@ -1,13 +1,17 @@
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import filedialog, messagebox
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 import mysql.connector
 mysql.connector.connect = __import__('pymysql').connect
+import pymysql.cursors
+import threading
 import pandas as pd
 from dotenv import load_dotenv
-import os
 import traceback
+import db_pool
+from virtual_table import VirtualTable
+from stream_export import ExportCancelled, export_cursor
 
 # --- Console Logging ---
 # Menambahkan fungsi ini untuk memastikan print() muncul di konsol
@@ -17,7 +21,7 @@ sys.stdout = sys.__stdout__
 sys.stderr = sys.__stderr__
 print("---" + "-" * 10 + " Log Start " + "-" * 10 + "---")
 
-load_dotenv(dotenv_path='conn_pens.env')
+load_dotenv(dotenv_path='conn_pens.env', override=True)
 
 class ExportApp:
     def __init__(self, root):
@@ -42,23 +46,21 @@ class ExportApp:
         self.export_button = ttk.Button(self.top_frame, text="Export ke Excel", command=self.export_data, style="success.TButton", state=DISABLED)
         self.export_button.pack(side=LEFT, padx=5)
 
+        self.stream_export_button = ttk.Button(self.top_frame, text="Export Langsung (xlsx/csv)", command=self.stream_export, style="info.TButton")
+        self.stream_export_button.pack(side=LEFT, padx=5)
+
+        self.cancel_export_button = ttk.Button(self.top_frame, text="Batal Export", command=self.cancel_export, style="secondary.TButton", state=DISABLED)
+        self.cancel_export_button.pack(side=LEFT, padx=5)
+        self.export_stop = threading.Event()
+
         # Treeview frame
         self.tree_frame = ttk.Frame(self.frame)
         self.tree_frame.pack(fill=BOTH, expand=YES, pady=10)
 
         self.columns = ("nP", "norek", "nmP", "ktb")
-        self.tree = ttk.Treeview(self.tree_frame, columns=self.columns, show="headings", height=15)
-        
-        for col in self.columns:
-            self.tree.heading(col, text=col.upper())
-            self.tree.column(col, width=150)
-
-        self.vsb = ttk.Scrollbar(self.tree_frame, orient="vertical", command=self.tree.yview)
-        self.hsb = ttk.Scrollbar(self.tree_frame, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=self.vsb.set, xscrollcommand=self.hsb.set)
-
-        self.vsb.pack(side=RIGHT, fill=Y)
-        self.hsb.pack(side=BOTTOM, fill=X)
+        self.tree = VirtualTable(self.tree_frame, columns=self.columns,
+                                 widths={col: 150 for col in self.columns},
+                                 headings=[col.upper() for col in self.columns], xscroll=True)
         self.tree.pack(fill=BOTH, expand=YES)
         
         # Bottom frame for progress bar
@@ -68,6 +70,19 @@ class ExportApp:
         self.progress = ttk.Progressbar(self.bottom_frame, orient=HORIZONTAL, length=300, mode='determinate')
         self.progress.pack(pady=5)
 
+        self.progress_label = ttk.Label(self.bottom_frame, text="")
+        self.progress_label.pack()
+
+    def _db_credentials(self):
+        """Parameter pymysql dari conn_pens.env (DB_PASS atau DB_PASSWORD)."""
+        config = db_pool.load_db_config('conn_pens.env')
+        if not (config["host"] and config["user"] and config["database"]):
+            return None
+        # SSCursor: baris dikirim server bertahap, tidak di-buffer semua di client
+        return {"host": config["host"], "port": config["port"], "user": config["user"],
+                "password": config["password"], "database": config["database"],
+                "connect_timeout": config["connection_timeout"], "cursorclass": pymysql.cursors.SSCursor}
+
     def show_data(self):
         print("\n[LOG] Tombol 'Tampilkan Data' diklik.")
         conn = None
@@ -77,15 +92,15 @@ class ExportApp:
             self.root.update_idletasks()
             
             print("[LOG] Membersihkan data Treeview lama.")
-            for i in self.tree.get_children():
-                self.tree.delete(i)
+            self.tree.clear()
             self.db_data = []
             self.export_button.config(state=DISABLED)
 
-            db_host = os.getenv("DB_HOST")
-            db_user = os.getenv("DB_USER")
-            db_password = os.getenv("DB_PASSWORD")
-            db_name = os.getenv("DB_NAME")
+            db_config = db_pool.load_db_config('conn_pens.env')
+            db_host = db_config["host"]
+            db_user = db_config["user"]
+            db_password = db_config["password"]
+            db_name = db_config["database"]
             
             print(f"[LOG] Kredensial DB: HOST={db_host}, USER={db_user}, DB={db_name}, PASS_LEN={len(db_password) if db_password else 0}")
 
@@ -119,13 +134,11 @@ class ExportApp:
             self.root.update_idletasks()
 
             if self.db_data:
-                print(f"[LOG] Contoh baris data pertama (sebelum konversi): {self.db_data[0]}")
-                print("[LOG] Memulai proses memasukkan data ke Treeview...")
-                for i, row in enumerate(self.db_data):
-                    # Konversi setiap item di baris menjadi string untuk mencegah error
-                    str_row = [str(item) if item is not None else "" for item in row]
-                    self.tree.insert("", END, values=str_row)
-                print(f"[LOG] Selesai memasukkan {len(self.db_data)} baris ke Treeview.")
+                print(f"[LOG] Contoh baris data pertama: {self.db_data[0]}")
+                # Konversi ke string hanya untuk baris yang sedang terlihat (lihat virtual_table.py)
+                self.tree.set_rows(self.db_data)
+                self.db_data = self.tree.rows
+                print(f"[LOG] {len(self.db_data)} baris dimuat ke tabel.")
 
             self.progress['value'] = 100
             self.root.update_idletasks()
@@ -173,6 +186,68 @@ class ExportApp:
             print("--- END TRACEBACK ---")
             messagebox.showerror("Error Export", f"Gagal export data: {e}")
 
+    def stream_export(self):
+        print("\n[LOG] Tombol 'Export Langsung' diklik.")
+        creds = self._db_credentials()
+        if not creds:
+            messagebox.showerror("Error", "Pastikan file .env sudah terisi dengan benar (DB_HOST, DB_USER, DB_PASS, DB_NAME)")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Simpan export", initialfile="data_pensiun.xlsx", defaultextension=".xlsx",
+            filetypes=[("Excel", "*.xlsx"), ("CSV", "*.csv")])
+        if not path:
+            return
+
+        self.export_stop.clear()
+        self.stream_export_button.config(state=DISABLED)
+        self.cancel_export_button.config(state=NORMAL)
+        self.progress['value'] = 0
+        threading.Thread(target=self._stream_export_worker, args=(creds, path), daemon=True).start()
+
+    def cancel_export(self):
+        print("[LOG] Export dibatalkan oleh user.")
+        self.export_stop.set()
+
+    def _set_export_progress(self, done, total):
+        def apply():
+            self.progress['maximum'] = max(total or done, 1)
+            self.progress['value'] = done
+            self.progress_label.config(text=f"{done}/{total} baris ditulis" if total else f"{done} baris ditulis")
+        self.root.after(0, apply)
+
+    def _stream_export_worker(self, creds, path):
+        conn = None
+        try:
+            conn = pymysql.connect(**creds)
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM pens_tblpens")
+                total = cursor.fetchone()[0]
+            print(f"[LOG] Export streaming {total} baris ke {path}")
+
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT nP, norek, nmP, ktb FROM pens_tblpens")
+                written = export_cursor(cursor, path, self.columns, total=total,
+                                        progress=self._set_export_progress, stop_event=self.export_stop)
+            print(f"[LOG] Export selesai: {written} baris.")
+            self.root.after(0, lambda: messagebox.showinfo("Sukses", f"{written} baris berhasil di-export ke {path}"))
+        except ExportCancelled:
+            print("[LOG] Export dibatalkan, file setengah jadi dihapus.")
+            self.root.after(0, lambda: messagebox.showinfo("Dibatalkan", "Export dibatalkan."))
+        except Exception as e:
+            print("\n--- TRACEBACK ERROR (Export Streaming) ---")
+            traceback.print_exc()
+            print("--- END TRACEBACK ---")
+            err_msg = f"Gagal export data: {e}"
+            self.root.after(0, lambda: messagebox.showerror("Error Export", err_msg))
+        finally:
+            if conn is not None and conn.open:
+                conn.close()
+            def reset():
+                self.progress['value'] = 0
+                self.progress_label.config(text="")
+                self.stream_export_button.config(state=NORMAL)
+                self.cancel_export_button.config(state=DISABLED)
+            self.root.after(0, reset)
 
 if __name__ == "__main__":
     root = ttk.Window(themename="cosmo")
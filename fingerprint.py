@@ -0,0 +1,51 @@
+#
+# fingerprint.py - sidik jari hasil parse terakhir per connote
+#----------------------------------------------------------------------------
+#
+# Dipakai updater untuk melewati UPDATE jika hasil scrape sama persis dengan
+# scrape sebelumnya. Disimpan di tabel kecil tracking_fp per sumber
+# (mis. 'tbl_antrn', 'tbl_db'), jadi tabel utama tidak perlu diubah.
+#
+import hashlib
+import json
+
+FP_CHUNK_SIZE = 500
+
+SQL_SAVE_FP = ("INSERT INTO tracking_fp (sumber, connote, fp, updated_at) VALUES (%s, %s, %s, NOW()) "
+               "ON DUPLICATE KEY UPDATE fp = VALUES(fp), updated_at = VALUES(updated_at)")
+
+
+def fingerprint(data):
+    """SHA-1 dari dict hasil parse (urutan key tidak berpengaruh)."""
+    payload = json.dumps(data, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class FingerprintStore:
+    """Baca/tulis tracking_fp untuk satu sumber."""
+
+    def __init__(self, sumber):
+        self.sumber = sumber
+
+    def load(self, conn, connotes):
+        """{connote: fp} untuk connote yang sudah punya sidik jari, dibaca per chunk."""
+        connotes = list(connotes)
+        known = {}
+        cursor = conn.cursor()
+        try:
+            for i in range(0, len(connotes), FP_CHUNK_SIZE):
+                chunk = connotes[i:i + FP_CHUNK_SIZE]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(
+                    f"SELECT connote, fp FROM tracking_fp WHERE sumber = %s AND connote IN ({placeholders})",
+                    (self.sumber, *chunk))
+                known.update(cursor.fetchall())
+        finally:
+            cursor.close()
+        return known
+
+    def save(self, cursor, items):
+        """Simpan [(connote, fp), ...] memakai cursor pemanggil (ikut transaksi yang sama)."""
+        rows = [(self.sumber, connote, fp) for connote, fp in items]
+        if rows:
+            cursor.executemany(SQL_SAVE_FP, rows)
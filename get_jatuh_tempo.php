@@ -5,6 +5,15 @@ require 'koneksi.php'; // Diasumsikan file ini menangani koneksi ke database
 // Kriteria untuk query
 // Anda bisa mengubah atau menambah kondisi di dalam klausa WHERE di bawah ini
 // DATEDIFF(CURDATE(), tgl_kirim) digunakan untuk menghitung selisih hari antara tanggal saat ini dan tgl_kirim
+// jatuh_tempo = DATE(tgl_kirim) + sla hari, kolom generated yang ditambahkan manual lewat
+// `python jatuh_tempo.py --migrate`; filter jatuh_tempo < CURDATE() sama dengan
+// DATEDIFF(CURDATE(), tgl_kirim) > sla tapi bisa memakai index (st, jatuh_tempo).
+// Selama migrasi belum dijalankan, tetap pakai filter DATEDIFF lama.
+$cek = $conn->query("SHOW COLUMNS FROM tbl_antrn LIKE 'jatuh_tempo'");
+$filter_jatuh_tempo = ($cek && $cek->num_rows > 0)
+    ? "jatuh_tempo < CURDATE()"
+    : "DATEDIFF(CURDATE(), tgl_kirim) > sla";
+
 $sql = "SELECT 
             connote, 
             pnrm, 
@@ -17,7 +26,7 @@ $sql = "SELECT
             tbl_antrn 
         WHERE 
             st = '33' AND
-            DATEDIFF(CURDATE(), tgl_kirim) > sla";
+            $filter_jatuh_tempo";
 
 $result = $conn->query($sql);
 
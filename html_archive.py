@@ -0,0 +1,271 @@
+#
+# html_archive.py - arsip HTML mentah halaman tracking + re-parse offline
+#----------------------------------------------------------------------------
+#
+# Jika HTML_ARCHIVE=1, setiap halaman yang benar-benar diambil dari server
+# (bukan dari cache) ditambahkan ke segmen gzip JSONL append-only:
+#
+#   arsip_html/<sumber>-<YYYYMMDD>-<pid>.jsonl.gz
+#   {"connote": ..., "fetched_at": "YYYY-mm-dd HH:MM:SS", "html": ...}
+#
+# Saat aturan ekstraksi di tracking_parser berubah, kolom yang terdampak
+# bisa diisi ulang dari arsip tanpa scrape ulang:
+#
+#   python html_archive.py reparse --fields al_pnrm,bsu_cod --since 2024-05-01
+#
+# Arsip bisa lebih lama dari isi DB: connote yang tgl_proses-nya di DB (waktu
+# event terakhir) lebih baru dari fetched_at halaman arsip dilewati, dan baris
+# yang sudah DELIVERED tidak ditimpa. last_change_at tidak dipakai karena bisa
+# berisi waktu scrape (sedikit setelah fetched_at halaman yang sama).
+#
+import argparse
+import atexit
+import gzip
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from dotenv import load_dotenv
+import db_pool
+from db_batch import DB_BATCH_SIZE, BatchWriter, BatchWriteError
+from tracking_parser import UPDATE_FIELDS, parse_kibana
+
+load_dotenv()
+
+HTML_ARCHIVE = os.getenv("HTML_ARCHIVE", "0") == "1"
+HTML_ARCHIVE_DIR = os.getenv(
+    "HTML_ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "arsip_html"))
+# Record ditahan di memori lalu ditulis sebagai satu member gzip: saat
+# HTML_ARCHIVE_FLUSH record terkumpul, setiap HTML_ARCHIVE_FLUSH_SECONDS detik,
+# di akhir setiap putaran fetch_many, dan saat proses keluar
+HTML_ARCHIVE_FLUSH = int(os.getenv("HTML_ARCHIVE_FLUSH", "200"))
+HTML_ARCHIVE_FLUSH_SECONDS = float(os.getenv("HTML_ARCHIVE_FLUSH_SECONDS", "30"))
+REPARSE_CHECK_CHUNK = 500
+
+# Sama dengan guard update scrape di update_app_v2: status akhir tidak ditimpa halaman lama
+NOT_DELIVERED_WHERE = "(t.status IS NULL OR t.status NOT IN ('DELIVERED', 'DELIVERED (RETURN DELIVERY)'))"
+
+
+class HtmlArchive:
+    """Penulis arsip per proses; satu file segmen per sumber per hari."""
+
+    def __init__(self, directory=HTML_ARCHIVE_DIR, flush_every=HTML_ARCHIVE_FLUSH,
+                 flush_seconds=HTML_ARCHIVE_FLUSH_SECONDS):
+        self.directory = directory
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self._pending = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        atexit.register(self.close)
+        if flush_seconds > 0:
+            # Daemon jalan berjam-jam: proses yang mati mendadak hanya kehilangan
+            # halaman beberapa detik terakhir
+            threading.Thread(target=self._flush_periodically, name="html-archive-flush", daemon=True).start()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"⚠️ Gagal menulis arsip HTML: {e}", file=sys.stderr)
+
+    def close(self):
+        self._closed.set()
+        self.flush()
+
+    def add(self, sumber, connote, html):
+        record = {"connote": connote, "fetched_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "html": html}
+        with self._lock:
+            self._pending.setdefault(sumber, []).append(record)
+            self._count += 1
+            if self._count >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._count:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        day = datetime.now().strftime("%Y%m%d")
+        for sumber, records in self._pending.items():
+            if not records:
+                continue
+            path = os.path.join(self.directory, f"{sumber}-{day}-{os.getpid()}.jsonl.gz")
+            payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+            # Mode "ab" menambah member gzip baru; gzip.open bisa membaca multi-member
+            with gzip.open(path, "ab") as f:
+                f.write(payload.encode("utf-8"))
+        self._pending = {}
+        self._count = 0
+
+
+_default_archive = None
+
+
+def default_archive():
+    """Arsip bersama untuk proses ini, atau None jika HTML_ARCHIVE tidak aktif."""
+    global _default_archive
+    if HTML_ARCHIVE and _default_archive is None:
+        _default_archive = HtmlArchive()
+    return _default_archive
+
+
+def segment_paths(sumber, directory=HTML_ARCHIVE_DIR, since=None):
+    """Segmen arsip suatu sumber, urut tanggal; `since` = 'YYYY-MM-DD' (opsional)."""
+    if not os.path.isdir(directory):
+        return []
+    since_key = since.replace("-", "") if since else ""
+    paths = []
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith(f"{sumber}-") and name.endswith(".jsonl.gz")):
+            continue
+        day = name[len(sumber) + 1:].split("-")[0]
+        if day >= since_key:
+            paths.append(os.path.join(directory, name))
+    return paths
+
+
+def iter_records(sumber, directory=HTML_ARCHIVE_DIR, since=None):
+    for path in segment_paths(sumber, directory, since):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except (OSError, EOFError, ValueError) as e:
+            # Segmen yang sedang ditulis/terpotong: ambil yang terbaca saja
+            print(f"⚠️ Segmen {os.path.basename(path)} tidak terbaca penuh: {e}")
+
+
+def latest_pages(sumber, directory=HTML_ARCHIVE_DIR, since=None):
+    """{connote: (fetched_at, html)} hanya halaman terbaru per connote."""
+    latest = {}
+    for record in iter_records(sumber, directory, since):
+        connote, fetched_at = record["connote"], record["fetched_at"]
+        if connote not in latest or fetched_at >= latest[connote][0]:
+            latest[connote] = (fetched_at, record["html"])
+    return latest
+
+
+def _as_text(value):
+    return value.strftime("%Y-%m-%d %H:%M:%S") if isinstance(value, datetime) else (str(value) if value else "")
+
+
+def fetch_db_tgl_proses(conn, connotes, chunk_size=REPARSE_CHECK_CHUNK):
+    """{connote: tgl_proses di DB sebagai teks 'YYYY-mm-dd HH:MM:SS'} ('' jika kosong)."""
+    tgl_proses = {}
+    connotes = list(connotes)
+    cursor = conn.cursor()
+    try:
+        for i in range(0, len(connotes), chunk_size):
+            chunk = connotes[i:i + chunk_size]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"SELECT connote, tgl_proses FROM tbl_antrn WHERE connote IN ({placeholders})",
+                           tuple(chunk))
+            for connote, value in cursor.fetchall():
+                tgl_proses[str(connote)] = _as_text(value)
+    finally:
+        cursor.close()
+    return tgl_proses
+
+
+def _parse_kibana_item(item):
+    connote, html = item
+    return connote, parse_kibana(html).to_update()
+
+
+def reparse_kibana(since=None, fields=None, workers=None, batch_size=None, dry_run=False, log=print):
+    """Parse ulang halaman kibana terbaru per connote dan tulis kolom hasilnya ke tbl_antrn.
+
+    Parse dibagi ke semua core (ProcessPoolExecutor); penulisan lewat BatchWriter.
+    `fields` membatasi kolom yang ditulis. Connote yang di DB sudah lebih baru dari
+    halaman arsipnya dilewati, baris DELIVERED tidak ditimpa.
+    Mengembalikan (connote diparse, baris berubah).
+    """
+    pages = latest_pages("kibana", since=since)
+    log(f"📦 {len(pages)} connote di arsip kibana{f' sejak {since}' if since else ''}.")
+    if not pages:
+        return 0, 0
+
+    conn = None if dry_run else db_pool.connect()
+    writer = None if dry_run else BatchWriter(conn, batch_size=batch_size or DB_BATCH_SIZE,
+                                              extra_where=NOT_DELIVERED_WHERE, log=log)
+    parsed = 0
+    try:
+        if conn is not None:
+            # Halaman arsip yang sudah kalah baru dari isi DB tidak dipakai sama sekali
+            db_tgl_proses = fetch_db_tgl_proses(conn, pages)
+            stale = [c for c, (fetched_at, _) in pages.items() if db_tgl_proses.get(c, "") > fetched_at]
+            for connote in stale:
+                del pages[connote]
+            if stale:
+                log(f"⏭️ {len(stale)} connote dilewati: data di DB lebih baru dari arsip.")
+        items = [(connote, html) for connote, (_, html) in pages.items()]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for connote, data in executor.map(_parse_kibana_item, items, chunksize=64):
+                if fields:
+                    data = {k: v for k, v in data.items() if k in fields}
+                if not data:
+                    continue
+                parsed += 1
+                if dry_run:
+                    if parsed <= 20:
+                        log(f"  {connote}: {data}")
+                else:
+                    try:
+                        writer.add(connote, data)
+                    except BatchWriteError as e:
+                        log(f"  ❌ {e}")
+        if writer is not None:
+            try:
+                writer.flush()
+            except BatchWriteError as e:
+                log(f"  ❌ {e}")
+    finally:
+        if conn is not None:
+            conn.close()
+    affected = writer.affected if writer is not None else 0
+    log(f"📊 Re-parse selesai. Diparse: {parsed}, baris berubah: {affected}{' (dry run)' if dry_run else ''}")
+    return parsed, affected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Arsip HTML tracking dan re-parse offline ke tbl_antrn.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rp = sub.add_parser("reparse", help="parse ulang arsip kibana dengan parser saat ini")
+    rp.add_argument("--since", help="hanya segmen sejak tanggal ini (YYYY-MM-DD)")
+    rp.add_argument("--fields", required=True,
+                    help=f"kolom yang ditulis, pisahkan dengan koma ({', '.join(UPDATE_FIELDS)})")
+    rp.add_argument("--workers", type=int, help="jumlah proses parse (default semua core)")
+    rp.add_argument("--batch-size", type=int, help="baris per transaksi DB")
+    rp.add_argument("--dry-run", action="store_true", help="tampilkan hasil tanpa menulis ke DB")
+    sub.add_parser("stat", help="ringkasan isi arsip")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "stat":
+        for sumber in ("kibana", "pid"):
+            paths = segment_paths(sumber)
+            size = sum(os.path.getsize(p) for p in paths)
+            print(f"{sumber}: {len(paths)} segmen, {size / 1024 / 1024:.1f} MB")
+        return 0
+
+    fields = {f.strip() for f in args.fields.split(",") if f.strip()}
+    if not fields:
+        parser.error("--fields tidak boleh kosong")
+    if not fields <= set(UPDATE_FIELDS):
+        parser.error(f"kolom tidak dikenal: {', '.join(sorted(fields - set(UPDATE_FIELDS)))}")
+    reparse_kibana(args.since, fields, args.workers, args.batch_size, args.dry_run)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#
+# jatuh_tempo.py - kolom jatuh_tempo di tbl_antrn + laporan connote lewat SLA
+#----------------------------------------------------------------------------
+#
+# jatuh_tempo = DATE(tgl_kirim) + sla hari, kolom generated di tbl_antrn
+# dengan index (st, jatuh_tempo), jadi laporan cukup range scan
+# `st = '33' AND jatuh_tempo < CURDATE()`, bukan DATEDIFF per baris.
+#
+# Kolom ini TIDAK dibuat otomatis oleh aplikasi. Migrasinya satu langkah
+# manual, sekali, oleh admin DB:
+#
+#   python jatuh_tempo.py --check           # cek tipe tgl_kirim/sla + data rusak
+#   python jatuh_tempo.py --migrate         # tambah kolom + index (online)
+#
+# Selama kolom belum ada, laporan ini dan get_jatuh_tempo.php tetap memakai
+# filter DATEDIFF lama.
+#
+# Dashboard polling terus, jadi hasil laporan di-cache JATUH_TEMPO_CACHE_TTL
+# detik; request yang datang bersamaan saat cache kosong menunggu satu query
+# yang sama.
+#
+#   python jatuh_tempo.py                   # cetak JSON sekali
+#   python jatuh_tempo.py --serve           # http://127.0.0.1:8089/jatuh_tempo
+#
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+import db_pool
+import metrics
+from db_schema import column_exists, jatuh_tempo_problems, migrate_jatuh_tempo_column
+
+load_dotenv()
+
+JATUH_TEMPO_PORT = int(os.getenv("JATUH_TEMPO_PORT", "8089"))
+JATUH_TEMPO_CACHE_TTL = float(os.getenv("JATUH_TEMPO_CACHE_TTL", "30"))
+
+# Kolom sama dengan get_jatuh_tempo.php
+SQL_OVERDUE = ("SELECT connote, pnrm, produk, tgl_kirim, cod, bsu_cod, "
+               "DATEDIFF(CURDATE(), tgl_kirim) AS umur "
+               "FROM tbl_antrn WHERE st = '33' AND {filter}")
+FILTER_INDEXED = "jatuh_tempo < CURDATE()"
+FILTER_DATEDIFF = "DATEDIFF(CURDATE(), tgl_kirim) > sla"
+
+_has_column = False
+
+
+def overdue_filter():
+    """Filter indexed jika kolom jatuh_tempo sudah dimigrasi, selain itu DATEDIFF lama."""
+    global _has_column
+    if not _has_column:
+        conn = db_pool.connect()
+        try:
+            cursor = conn.cursor()
+            try:
+                _has_column = column_exists(cursor, "tbl_antrn", "jatuh_tempo")
+            finally:
+                cursor.close()
+        finally:
+            conn.close()
+    return FILTER_INDEXED if _has_column else FILTER_DATEDIFF
+
+
+def fetch_overdue():
+    """Connote st=33 yang sudah lewat jatuh tempo, sebagai list dict."""
+    with metrics.stage("db_read", table="tbl_antrn") as read:
+        rows = db_pool.fetch_all(SQL_OVERDUE.format(filter=overdue_filter()), dictionary=True)
+        read.items = len(rows)
+    return rows
+
+
+def migrate(check_only=False):
+    """Langkah migrasi manual kolom jatuh_tempo; mengembalikan exit code."""
+    conn = db_pool.connect()
+    try:
+        cursor = conn.cursor()
+        try:
+            if column_exists(cursor, "tbl_antrn", "jatuh_tempo"):
+                problems = []
+                print("✅ Kolom jatuh_tempo sudah ada di tbl_antrn.")
+            else:
+                problems = jatuh_tempo_problems(cursor)
+        finally:
+            cursor.close()
+        for problem in problems:
+            print(f"❌ {problem}", file=sys.stderr)
+        if problems or check_only:
+            if not problems:
+                print("✅ tgl_kirim/sla aman untuk kolom jatuh_tempo.")
+            return 1 if problems else 0
+        if migrate_jatuh_tempo_column(conn):
+            print("🛠️ Kolom jatuh_tempo dan index (st, jatuh_tempo) ditambahkan ke tbl_antrn.")
+        return 0
+    finally:
+        conn.close()
+
+
+class OverdueReport:
+    """Hasil fetch_overdue dalam bentuk JSON siap kirim, di-cache `ttl` detik.
+
+    Cache juga kedaluwarsa saat tanggal berganti karena CURDATE() ikut berubah.
+    """
+
+    def __init__(self, ttl=JATUH_TEMPO_CACHE_TTL, fetch=fetch_overdue):
+        self.ttl = ttl
+        self.fetch = fetch
+        self._lock = threading.Lock()
+        self._entry = None  # (hari, waktu dibuat, body, etag)
+
+    def _fresh(self):
+        entry = self._entry
+        if entry and entry[0] == date.today() and time.monotonic() - entry[1] < self.ttl:
+            return entry
+        return None
+
+    def get(self):
+        """(body JSON bytes, etag, umur cache dalam detik)."""
+        entry = self._fresh()
+        if entry is None:
+            with self._lock:
+                entry = self._fresh()
+                if entry is None:
+                    body = json.dumps(self.fetch(), default=str, ensure_ascii=False).encode("utf-8")
+                    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                    entry = self._entry = (date.today(), time.monotonic(), body, etag)
+        return entry[2], entry[3], time.monotonic() - entry[1]
+
+    def invalidate(self):
+        self._entry = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    report = None
+
+    def do_GET(self):
+        if self.path.split("?")[0].rstrip("/") not in ("", "/jatuh_tempo"):
+            self.send_error(404)
+            return
+        try:
+            body, etag, age = self.report.get()
+        except Exception as e:
+            self.send_error(503, f"Query jatuh tempo gagal: {e}")
+            return
+
+        remaining = max(0, int(self.report.ttl - age))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", f"max-age={remaining}")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", f"max-age={remaining}")
+        self.send_header("Access-Control-Allow-Origin", "*")  # dashboard di host/port lain
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=JATUH_TEMPO_PORT, host="127.0.0.1", ttl=JATUH_TEMPO_CACHE_TTL):
+    """Jalankan endpoint laporan sampai dihentikan (Ctrl+C)."""
+    handler = type("Handler", (_Handler,), {"report": OverdueReport(ttl)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    print(f"📅 Laporan jatuh tempo di http://{host}:{server.server_address[1]}/jatuh_tempo "
+          f"(cache {ttl:g} detik)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Laporan connote st=33 yang lewat jatuh tempo SLA.")
+    parser.add_argument("--serve", action="store_true", help="jalankan endpoint HTTP JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=JATUH_TEMPO_PORT)
+    parser.add_argument("--ttl", type=float, default=JATUH_TEMPO_CACHE_TTL, help="umur cache laporan (detik)")
+    parser.add_argument("--check", action="store_true", help="cek kesiapan migrasi kolom jatuh_tempo tanpa mengubah apa pun")
+    parser.add_argument("--migrate", action="store_true", help="tambah kolom jatuh_tempo + index ke tbl_antrn (sekali)")
+    args = parser.parse_args(argv)
+
+    if args.check or args.migrate:
+        return migrate(check_only=args.check)
+    if args.serve:
+        metrics.start_server()
+        serve(args.port, args.host, args.ttl)
+        return 0
+    json.dump(fetch_overdue(), sys.stdout, default=str, ensure_ascii=False)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+#
+# log_sink.py - log bersama untuk aplikasi GUI: antrian + widget terbatas + file rotasi
+#----------------------------------------------------------------------------
+#
+# Thread worker cukup memanggil sink.log(msg). Record masuk ke ring buffer
+# (deque maxlen) dan langsung ditulis ke file log berotasi; thread Tk
+# mengosongkan buffer per batch lewat satu timer root.after, bukan satu
+# root.after per pesan. Widget hanya menyimpan LOG_MAX_LINES baris terakhir,
+# jadi tetap ringan walau aplikasi jalan berhari-hari di tray.
+#
+#   logs/<nama>.log, logs/<nama>.log.1, ...
+#
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_DIR = os.getenv("LOG_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs"))
+LOG_MAX_LINES = int(os.getenv("LOG_MAX_LINES", "2000"))
+LOG_FLUSH_MS = int(os.getenv("LOG_FLUSH_MS", "250"))
+LOG_FILE_MAX_MB = int(os.getenv("LOG_FILE_MAX_MB", "5"))
+LOG_FILE_BACKUPS = int(os.getenv("LOG_FILE_BACKUPS", "5"))
+
+
+def file_logger(name, directory=LOG_DIR):
+    """logging.Logger yang menulis ke <directory>/<name>.log dengan rotasi ukuran."""
+    logger = logging.getLogger(f"log_sink.{name}")
+    if not logger.handlers:
+        os.makedirs(directory, exist_ok=True)
+        # delay: file baru dibuka saat record pertama ditulis, bukan saat logger dibuat
+        handler = RotatingFileHandler(os.path.join(directory, f"{name}.log"), encoding="utf-8", delay=True,
+                                      maxBytes=LOG_FILE_MAX_MB * 1024 * 1024, backupCount=LOG_FILE_BACKUPS)
+        handler.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s %(message)s", "%Y-%m-%d %H:%M:%S"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+class LogSink:
+    """Tujuan log satu aplikasi. log() aman dipanggil dari thread mana saja.
+
+    Sebelum attach() (atau tanpa GUI) pesan juga dicetak ke stdout; yang sudah
+    masuk ring buffer tetap tampil di widget begitu attach() dipanggil.
+    """
+
+    def __init__(self, name, max_lines=LOG_MAX_LINES, flush_ms=LOG_FLUSH_MS, directory=LOG_DIR):
+        self.max_lines = max_lines
+        self.flush_ms = flush_ms
+        self.logger = file_logger(name, directory)
+        # Record (waktu, level, pesan); yang paling lama terbuang jika UI tertinggal
+        self.records = deque(maxlen=max_lines)
+        self.widget = None
+        self.root = None
+        self.dropped = 0
+
+    def log(self, msg, level=logging.INFO):
+        self.logger.log(level, msg)
+        if self.widget is None:
+            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}", flush=True)
+        if len(self.records) == self.records.maxlen:
+            self.dropped += 1
+        self.records.append((time.time(), level, msg))
+
+    __call__ = log
+
+    def error(self, msg):
+        self.log(msg, logging.ERROR)
+
+    def attach(self, root, widget):
+        """Mulai menampilkan log di widget Text; dipanggil dari thread Tk."""
+        self.root = root
+        # ScrolledText ttkbootstrap adalah Frame; widget Text-nya ada di .text
+        self.widget = getattr(widget, "text", widget)
+        self.root.after(self.flush_ms, self._drain)
+
+    def _drain(self):
+        if self.root is None:
+            return
+        batch = []
+        while self.records:
+            try:
+                batch.append(self.records.popleft())
+            except IndexError:
+                break
+        if batch:
+            self._write(batch)
+        try:
+            self.root.after(self.flush_ms, self._drain)
+        except Exception:
+            self.root = None  # jendela sudah ditutup
+
+    def _write(self, batch):
+        lines = []
+        if self.dropped:
+            lines.append(f"... {self.dropped} baris log dilewati (lihat file log)\n")
+            self.dropped = 0
+        lines.extend(f"[{datetime.fromtimestamp(created).strftime('%Y-%m-%d %H:%M:%S')}] {msg}\n"
+                     for created, _, msg in batch)
+
+        widget = self.widget
+        at_end = widget.yview()[1] >= 0.999
+        state = str(widget.cget("state"))
+        if state == "disabled":
+            widget.configure(state="normal")
+        widget.insert("end", "".join(lines))
+        # Buang baris paling lama agar widget tidak tumbuh tanpa batas
+        line_count = int(widget.index("end-1c").split(".")[0]) - 1  # teks selalu diakhiri newline
+        if line_count > self.max_lines:
+            widget.delete("1.0", f"{line_count - self.max_lines + 1}.0")
+        if state == "disabled":
+            widget.configure(state="disabled")
+        if at_end:
+            widget.see("end")
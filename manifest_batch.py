@@ -0,0 +1,150 @@
+#
+# manifest_batch.py - import banyak PDF manifest R7 sekaligus
+#----------------------------------------------------------------------------
+#
+# Beberapa PDF diparse bersamaan (halaman-halamannya berbagi process pool
+# manifest_pdf), lalu setiap manifest yang kodenya cocok dengan KODE_KANTOR
+# di-insert dalam satu transaksi. Hasil per file dikembalikan sebagai laporan.
+#
+#   python manifest_batch.py D:\manifest\pagi --tgl-nrc 2024-05-01 --user "Nama" --pic user01
+#
+import argparse
+import csv
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from dotenv import load_dotenv
+import db_pool
+import manifest_pdf
+from manifest_cache import ManifestCache
+from manifest_import import insert_manifest_rows
+
+load_dotenv()
+
+KODE_KANTOR = os.getenv("KODE_KANTOR", "")
+# Jumlah PDF yang diparse bersamaan
+BATCH_PDF_FILES = int(os.getenv("BATCH_PDF_FILES", "4"))
+
+REPORT_FIELDS = ("file", "manifest", "kode", "status", "baris", "baru", "pid_dilewati", "duplikat", "cache", "keterangan")
+
+
+def list_pdfs(paths):
+    """Daftar file PDF dari campuran folder dan file (folder tidak dibaca rekursif)."""
+    result = []
+    for path in paths:
+        if os.path.isdir(path):
+            result.extend(os.path.join(path, n) for n in sorted(os.listdir(path)) if n.lower().endswith(".pdf"))
+        elif path.lower().endswith(".pdf"):
+            result.append(path)
+    return result
+
+
+def _report(path, **kwargs):
+    report = dict.fromkeys(REPORT_FIELDS, "")
+    report.update(file=os.path.basename(path), baris=0, baru=0, pid_dilewati=0, duplikat=0)
+    report.update(kwargs)
+    return report
+
+
+def import_manifests(paths, tgl_nrc, user_input, pic, kode_kantor=KODE_KANTOR,
+                     files=BATCH_PDF_FILES, cache=None, log=print, progress=None, stop_event=None):
+    """Parse dan insert semua PDF di `paths`. Mengembalikan list laporan per file (urutan input).
+
+    `progress(selesai, total)` dipanggil setiap satu file selesai.
+    """
+    pdfs = list_pdfs(paths)
+    stop_event = stop_event or threading.Event()
+    reports = {}
+    if not pdfs:
+        log("❗ Tidak ada file PDF yang ditemukan.")
+        return []
+
+    log(f"📚 Import {len(pdfs)} PDF manifest ({files} file paralel)...")
+    with ThreadPoolExecutor(max_workers=max(1, files), thread_name_prefix="manifest") as executor:
+        futures = {executor.submit(manifest_pdf.parse_manifest, path, stop_event, cache): path for path in pdfs}
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                path = futures[future]
+                reports[path] = _import_one(path, future, tgl_nrc, user_input, pic, kode_kantor, stop_event)
+                r = reports[path]
+                log(f"  {'✅' if r['status'] == 'OK' else '⚠️'} {r['file']}: {r['status']} "
+                    f"(baru {r['baru']}, PID {r['pid_dilewati']}, duplikat {r['duplikat']}) {r['keterangan']}".rstrip())
+                if progress:
+                    progress(done, len(pdfs))
+        finally:
+            for future in futures:
+                future.cancel()
+
+    result = [reports.get(path) or _report(path, status="DIBATALKAN") for path in pdfs]
+    ok = sum(1 for r in result if r['status'] == "OK")
+    log(f"📊 Import folder selesai. File OK: {ok}/{len(result)}, kantong baru: {sum(r['baru'] for r in result)}")
+    return result
+
+
+def _import_one(path, future, tgl_nrc, user_input, pic, kode_kantor, stop_event):
+    try:
+        parsed = future.result()
+    except Exception as e:
+        return _report(path, status="ERROR", keterangan=f"Gagal parsing: {e}")
+
+    report = _report(path, manifest=parsed['manifest'] or "", kode=parsed['kode'] or "",
+                     baris=len(parsed['rows']), cache="ya" if parsed['cached'] else "")
+    if parsed['cancelled'] or stop_event.is_set():
+        report.update(status="DIBATALKAN")
+    elif not parsed['rows']:
+        report.update(status="KOSONG", keterangan="Tidak ditemukan data tabel yang valid.")
+    elif not kode_kantor or parsed['kode'] != kode_kantor:
+        report.update(status="KODE_BEDA", keterangan=f"Kode manifest tidak sama dengan KODE_KANTOR ({kode_kantor}).")
+    else:
+        rows = [(row[1], row[2] if len(row) > 2 else "-") for row in parsed['rows']]
+        try:
+            conn = db_pool.connect()
+            try:
+                baru, pid_dilewati, duplikat = insert_manifest_rows(
+                    conn, rows, parsed['kode'], tgl_nrc, user_input, pic)
+            finally:
+                conn.close()
+            report.update(status="OK", baru=baru, pid_dilewati=pid_dilewati, duplikat=duplikat)
+        except Exception as e:
+            report.update(status="ERROR", keterangan=f"Gagal insert: {e}")
+    return report
+
+
+def write_report(reports, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(reports)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import banyak PDF manifest R7 ke tbl_antrn.")
+    parser.add_argument("paths", nargs="+", help="folder dan/atau file PDF")
+    parser.add_argument("--tgl-nrc", required=True, help="tanggal NRC (YYYY-MM-DD)")
+    parser.add_argument("--user", required=True, help="nama user input")
+    parser.add_argument("--pic", required=True, help="username PIC")
+    parser.add_argument("--files", type=int, default=BATCH_PDF_FILES, help="jumlah PDF diparse bersamaan")
+    parser.add_argument("--report", help="simpan laporan per file ke CSV")
+    parser.add_argument("--no-cache", action="store_true", help="jangan pakai cache hasil parse")
+    args = parser.parse_args(argv)
+
+    try:
+        datetime.strptime(args.tgl_nrc, "%Y-%m-%d")
+    except ValueError:
+        parser.error("format --tgl-nrc harus YYYY-MM-DD")
+
+    try:
+        reports = import_manifests(args.paths, args.tgl_nrc, args.user, args.pic, files=args.files,
+                                   cache=None if args.no_cache else ManifestCache())
+    finally:
+        manifest_pdf.shutdown_executor()
+    if args.report:
+        write_report(reports, args.report)
+        print(f"📝 Laporan disimpan ke {args.report}")
+    return 0 if all(r['status'] == "OK" for r in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
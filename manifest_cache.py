@@ -0,0 +1,94 @@
+#
+# manifest_cache.py - cache hasil parse PDF manifest di disk
+#----------------------------------------------------------------------------
+#
+# Kunci cache = SHA-256 isi file + versi parser, jadi file yang diganti nama
+# tetap kena cache, sedangkan perubahan logika parser otomatis membuat entri
+# lama tidak terpakai. Satu entri = satu file JSON berisi header dan baris.
+# Jika total ukuran melewati batas, entri yang paling lama tidak dipakai dihapus.
+#
+import hashlib
+import json
+import os
+import threading
+from dotenv import load_dotenv
+from manifest_pdf import MANIFEST_PARSER_VERSION
+
+load_dotenv()
+
+MANIFEST_CACHE_DIR = os.getenv(
+    "MANIFEST_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "manifest"))
+MANIFEST_CACHE_MAX_MB = int(os.getenv("MANIFEST_CACHE_MAX_MB", "50"))
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ManifestCache:
+    """Cache {'manifest', 'kode', 'rows'} per isi PDF."""
+
+    def __init__(self, directory=MANIFEST_CACHE_DIR, max_bytes=MANIFEST_CACHE_MAX_MB * 1024 * 1024,
+                 version=MANIFEST_PARSER_VERSION):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = version
+        self._lock = threading.Lock()
+
+    def _path(self, digest):
+        return os.path.join(self.directory, f"{digest}-v{self.version}.json")
+
+    def digest(self, path):
+        return file_digest(path)
+
+    def get(self, digest):
+        path = self._path(digest)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)  # tandai baru dipakai untuk urutan eviction
+        except OSError:
+            pass
+        return entry
+
+    def put(self, digest, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(digest)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """Hapus entri paling lama dipakai sampai total ukuran <= max_bytes."""
+        with self._lock:
+            try:
+                names = [n for n in os.listdir(self.directory) if n.endswith(".json")]
+            except OSError:
+                return
+            entries = []
+            for name in names:
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
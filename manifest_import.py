@@ -0,0 +1,74 @@
+#
+# manifest_import.py - insert kantong manifest R7 ke tbl_antrn secara bulk
+#----------------------------------------------------------------------------
+#
+IMPORT_CHUNK_SIZE = 500
+
+SQL_INSERT_KANTONG = ("INSERT INTO tbl_antrn (connote, produk, ktr_antrn, tgl_nrc, user_input, pic) "
+                      "VALUES (%s, %s, %s, %s, %s, %s)")
+
+
+def connote_key(connote):
+    """Bentuk pembanding connote: collation tbl_antrn tidak peka huruf besar/kecil
+    dan spasi di belakang, jadi perbandingan di Python harus sama."""
+    return str(connote).strip().upper()
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def fetch_existing_connotes(cursor, connotes, chunk_size=IMPORT_CHUNK_SIZE):
+    """Mengembalikan set connote_key yang sudah ada di tbl_antrn, dicek per chunk dengan IN (...)."""
+    existing = set()
+    for chunk in _chunks(list(connotes), chunk_size):
+        placeholders = ", ".join(["%s"] * len(chunk))
+        cursor.execute(f"SELECT connote FROM tbl_antrn WHERE connote IN ({placeholders})", tuple(chunk))
+        existing.update(connote_key(row[0]) for row in cursor.fetchall())
+    return existing
+
+
+def insert_manifest_rows(conn, rows, kode, tgl_nrc, user_input, pic, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """Insert baris (no_kantong, produk) ke tbl_antrn dalam satu transaksi.
+
+    Kantong PID dilewati, connote yang sudah ada (di DB atau muncul dua kali
+    di manifest) dihitung sebagai duplikat. Mengembalikan (baru, pid_dilewati, duplikat).
+    `progress(selesai, total)` dipanggil setiap satu chunk selesai di-insert.
+    """
+    pid_dilewati, duplikat = 0, 0
+    candidates = []
+    seen = set()
+    for no_kantong, produk in rows:
+        no_kantong = str(no_kantong).strip()
+        if no_kantong.startswith("PID"):
+            pid_dilewati += 1
+            continue
+        key = connote_key(no_kantong)
+        if key in seen:
+            duplikat += 1
+            continue
+        seen.add(key)
+        candidates.append((no_kantong, produk))
+
+    cursor = conn.cursor()
+    try:
+        existing = fetch_existing_connotes(cursor, [c for c, _ in candidates], chunk_size)
+        new_rows = [(c, p, kode, tgl_nrc, user_input, pic) for c, p in candidates
+                    if connote_key(c) not in existing]
+        duplikat += len(candidates) - len(new_rows)
+
+        done = 0
+        for chunk in _chunks(new_rows, chunk_size):
+            cursor.executemany(SQL_INSERT_KANTONG, chunk)
+            done += len(chunk)
+            if progress:
+                progress(done, len(new_rows))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    return len(new_rows), pid_dilewati, duplikat
@@ -0,0 +1,139 @@
+#
+# manifest_pdf.py - parsing PDF manifest R7 per halaman, paralel
+#----------------------------------------------------------------------------
+#
+# extract_tables() pdfplumber berat dan murni CPU, jadi halaman dibagi ke
+# process pool (bukan thread, karena GIL). Hasil dikembalikan per halaman
+# sesuai urutan halaman supaya GUI bisa mengisi tabel sambil jalan.
+#
+# Catatan Windows: worker di-spawn dan meng-import ulang script utama, jadi
+# script yang memakai modul ini tidak boleh membuat jendela Tk di level modul.
+#
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+import pdfplumber
+
+load_dotenv()
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# PDF dengan halaman sebanyak ini atau kurang diparse langsung tanpa process pool
+PDF_POOL_MIN_PAGES = int(os.getenv("PDF_POOL_MIN_PAGES", "3"))
+# Halaman berurutan per task worker; PDF dibuka dan ditutup lagi di setiap task
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+# Naikkan jika logika parse_header/rows_from_tables berubah, supaya cache lama tidak dipakai
+MANIFEST_PARSER_VERSION = 1
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def parse_header(first_page_text):
+    """(teks Manifest Kantong, kode) dari teks halaman pertama; baris terakhir yang cocok dipakai."""
+    manifest, kode = None, None
+    for line in (first_page_text or "").splitlines():
+        if "Manifest Kantong" in line:
+            manifest = line.split(":")[-1].strip()
+            kode = manifest.split()[-1] if manifest else None
+    return manifest, kode
+
+
+def rows_from_tables(tables):
+    """Baris tabel kantong: kolom pertama berisi nomor urut."""
+    rows = []
+    for table in tables:
+        for row in table:
+            if row and row[0] and isinstance(row[0], str) and row[0].strip().isdigit():
+                rows.append(row)
+    return rows
+
+
+def extract_page_range(path, start, stop):
+    """Dijalankan di proses worker: list baris kantong per halaman untuk halaman start..stop-1.
+
+    File dibuka dan ditutup di task ini saja, jadi worker tidak menahan file
+    (di Windows file yang masih terbuka tidak bisa dipindah/dihapus/ditimpa).
+    """
+    with pdfplumber.open(path) as pdf:
+        return [rows_from_tables(pdf.pages[page_no].extract_tables()) for page_no in range(start, stop)]
+
+
+def read_header(path):
+    """(jumlah halaman, teks Manifest Kantong, kode)."""
+    with pdfplumber.open(path) as pdf:
+        manifest, kode = parse_header(pdf.pages[0].extract_text())
+        return len(pdf.pages), manifest, kode
+
+
+def get_executor():
+    """Process pool bersama, dibuat saat pertama dipakai (spawn di Windows lambat)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+        return _executor
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def iter_page_rows(path, page_count, stop_event=None):
+    """Generator (nomor halaman, baris) sesuai urutan halaman.
+
+    Jika stop_event di-set, halaman yang belum mulai dibatalkan dan generator berhenti.
+    """
+    if page_count <= PDF_POOL_MIN_PAGES:
+        with pdfplumber.open(path) as pdf:
+            for page_no, page in enumerate(pdf.pages):
+                if stop_event is not None and stop_event.is_set():
+                    return
+                yield page_no, rows_from_tables(page.extract_tables())
+        return
+
+    executor = get_executor()
+    # Cukup kecil supaya semua worker kebagian dan hasil awal cepat tampil
+    per_task = max(1, min(PDF_PAGES_PER_TASK, -(-page_count // PDF_WORKERS)))
+    futures = [(start, executor.submit(extract_page_range, path, start, min(start + per_task, page_count)))
+               for start in range(0, page_count, per_task)]
+    try:
+        for start, future in futures:
+            if stop_event is not None and stop_event.is_set():
+                return
+            for offset, rows in enumerate(future.result()):
+                yield start + offset, rows
+    finally:
+        for _, future in futures:
+            future.cancel()
+
+
+def parse_manifest(path, stop_event=None, cache=None):
+    """Parse satu PDF manifest lengkap: {'manifest', 'kode', 'rows', 'cached', 'cancelled'}.
+
+    Jika `cache` (ManifestCache) diberikan, hasil diambil/disimpan berdasarkan isi file.
+    """
+    digest = None
+    if cache is not None:
+        digest = cache.digest(path)
+        entry = cache.get(digest)
+        if entry is not None:
+            return dict(entry, cached=True, cancelled=False)
+
+    page_count, manifest, kode = read_header(path)
+    rows = []
+    pages_done = 0
+    for _, page_rows in iter_page_rows(path, page_count, stop_event):
+        rows.extend(page_rows)
+        pages_done += 1
+    entry = {'manifest': manifest, 'kode': kode, 'rows': rows}
+    cancelled = pages_done < page_count
+    # Hasil batal/kosong tidak di-cache, supaya buka ulang PDF yang sama di-parse lagi
+    if cache is not None and not cancelled and rows:
+        cache.put(digest, entry)
+    return dict(entry, cached=False, cancelled=cancelled)
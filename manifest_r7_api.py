@@ -0,0 +1,255 @@
+#
+# manifest_r7_api.py - ambil daftar manifest R7 dari API mile.app per halaman
+#----------------------------------------------------------------------------
+#
+# Endpoint manifestR7-filter (DataTables server-side) dipanggil per halaman
+# dengan start/length, beberapa halaman sekaligus lewat thread pool. Hasil
+# tiap halaman di-yield begitu selesai sehingga GUI bisa langsung menampilkan
+# data. Halaman yang gagal dicoba ulang sendiri tanpa mengulang yang lain.
+#
+# Respons halaman dibaca sebagai stream dan array "data" di-decode per baris
+# (iter_json_array), jadi respons mentah tidak pernah dimuat utuh; dari tiap
+# baris hanya kolom no R7, kantor tujuan, tgl dan taskId yang disimpan.
+#
+import codecs
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MANIFEST_R7_URL = "https://posindo.mile.app/api/manifestR7-filter"
+MANIFEST_R7_PRINT_URL = "https://posindo.mile.app/manifestR7/print?taskId={task_id}"
+
+R7_PAGE_SIZE = int(os.getenv("R7_PAGE_SIZE", "500"))
+R7_FETCH_WORKERS = int(os.getenv("R7_FETCH_WORKERS", "4"))
+R7_PAGE_TIMEOUT = int(os.getenv("R7_PAGE_TIMEOUT", "60"))
+R7_PAGE_RETRIES = int(os.getenv("R7_PAGE_RETRIES", "3"))
+
+# API butuh nama bulan bahasa Inggris ('01 May 2024'); tidak lewat locale
+# karena setlocale berlaku global untuk semua thread.
+_MONTHS = ("January", "February", "March", "April", "May", "June", "July",
+           "August", "September", "October", "November", "December")
+
+_TASK_ID_RE = re.compile(r'taskId=([a-f0-9]+)')
+_WS = " \t\r\n"
+_NUMBER_CHARS = "0123456789.eE+-"
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+class _JsonStream:
+    """Buffer teks dari potongan bytes untuk iter_json_array."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self):
+        """Tambah satu potongan ke buffer; False jika stream sudah habis."""
+        if self.eof:
+            return False
+        if self.pos > STREAM_CHUNK_BYTES:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.eof = True
+            self.buf += self.decoder.decode(b"", final=True)
+        else:
+            self.buf += self.decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        return True
+
+    def peek(self):
+        """Karakter non-spasi berikutnya (tanpa maju), '' jika habis."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"JSON tidak valid: diharapkan {char!r} di posisi {self.pos}")
+        self.pos += 1
+
+    def value(self, decoder=json.JSONDecoder()):
+        """Decode satu nilai JSON utuh; tambah buffer selama nilainya belum lengkap."""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.more():
+                    continue
+                raise
+            # Angka bisa saja terpotong di ujung buffer ('12.' dari '12.25')
+            if not self.eof and (end >= len(self.buf) - 1 or self.buf[end] in _NUMBER_CHARS) and self.more():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(chunks, key="data"):
+    """Generator elemen array `key` di objek JSON level atas, di-decode satu per satu.
+
+    `chunks` = iterable bytes/str (mis. response.iter_content()). Nilai lain di
+    objek itu di-decode lalu dibuang; elemen array tidak pernah dimuat sekaligus.
+    """
+    stream = _JsonStream(chunks)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        name = stream.value()
+        stream.expect(":")
+        if name == key and stream.peek() == "[":
+            stream.pos += 1
+            if stream.peek() == "]":
+                stream.pos += 1
+            else:
+                while True:
+                    yield stream.value()
+                    if stream.peek() == "]":
+                        stream.pos += 1
+                        break
+                    stream.expect(",")
+        else:
+            stream.value()
+        if stream.peek() == "}":
+            return
+        stream.expect(",")
+
+
+def format_date(date):
+    return f"{date.day:02d} {_MONTHS[date.month - 1]} {date.year}"
+
+
+def parse_rows(data):
+    """Baris mentah API -> list (no_r7, kantor_tujuan, tgl 'YYYY-mm-dd HH:MM:SS', task_id)."""
+    rows = []
+    for item in data or []:
+        if len(item) <= 12:  # Pastikan ada kolom untuk taskId
+            continue
+        action_html = item[12] or ""
+        idx = action_html.find("taskId=")
+        match = _TASK_ID_RE.match(action_html, idx) if idx >= 0 else None
+        if not match:
+            continue
+        tgl_manifest = item[10]
+        try:
+            datetime.fromisoformat(tgl_manifest)  # hanya validasi, disimpan sebagai teks
+        except (TypeError, ValueError):
+            continue
+        rows.append((item[1], item[9], tgl_manifest, match.group(1)))
+    return rows
+
+
+class R7PageFetcher:
+    """Mengambil semua halaman manifest R7 untuk satu rentang tanggal.
+
+    Setiap thread worker memakai requests.Session miliknya sendiri. Halaman
+    yang gagal dicoba ulang hingga `retries` kali dengan jeda bertambah;
+    yang tetap gagal dicatat di `failed` (list nilai start) dan bisa diambil
+    lagi lewat fetch_pages(starts=...).
+    """
+
+    def __init__(self, date_from, date_to, page_size=R7_PAGE_SIZE, workers=R7_FETCH_WORKERS,
+                 timeout=R7_PAGE_TIMEOUT, retries=R7_PAGE_RETRIES, url=MANIFEST_R7_URL):
+        self.date_from = format_date(date_from)
+        self.date_to = format_date(date_to)
+        self.page_size = max(1, int(page_size))
+        self.workers = max(1, int(workers))
+        self.timeout = timeout
+        self.retries = max(0, int(retries))
+        self.url = url
+        self.records_total = None
+        self.failed = []
+        self._draw = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            session.mount("https://", adapter)
+            self._local.session = session
+        return session
+
+    def _post(self, start, length, timeout, stream=False):
+        with self._lock:
+            self._draw += 1
+            draw = self._draw
+        payload = {"length": length, "date_from": self.date_from, "date_to": self.date_to,
+                   "draw": draw, "start": start}
+        response = self._session().post(self.url, data=payload, timeout=timeout, stream=stream)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            response.close()
+            raise
+        return response if stream else response.json()
+
+    def fetch_total(self):
+        """Jumlah baris di rentang tanggal (recordsTotal)."""
+        self.records_total = int(self._post(0, 1, 30).get("recordsTotal", 0) or 0)
+        return self.records_total
+
+    def page_starts(self):
+        return list(range(0, self.records_total or 0, self.page_size))
+
+    def fetch_page(self, start, stop_event=None):
+        """Satu halaman, dengan retry. Mengembalikan list baris hasil parse_rows."""
+        for attempt in range(self.retries + 1):
+            try:
+                with self._post(start, self.page_size, self.timeout, stream=True) as response:
+                    return parse_rows(iter_json_array(response.iter_content(STREAM_CHUNK_BYTES)))
+            except (requests.exceptions.RequestException, ValueError):
+                if attempt == self.retries or (stop_event is not None and stop_event.is_set()):
+                    raise
+                time.sleep(2 ** attempt)
+
+    def fetch_pages(self, starts=None, stop_event=None):
+        """Generator (start, rows, error) dalam urutan selesai.
+
+        Default semua halaman dari recordsTotal (fetch_total dipanggil jika
+        belum). Halaman yang tetap gagal setelah retry di-yield dengan error
+        dan dicatat di `failed`; halaman lain tetap jalan.
+        """
+        if starts is None:
+            if self.records_total is None:
+                self.fetch_total()
+            starts = self.page_starts()
+        starts = list(starts)
+        self.failed = [s for s in self.failed if s not in starts]
+        if not starts:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="r7page") as executor:
+            futures = {executor.submit(self.fetch_page, start, stop_event): start for start in starts}
+            try:
+                for future in as_completed(futures):
+                    start = futures[future]
+                    if stop_event is not None and stop_event.is_set():
+                        break
+                    try:
+                        yield start, future.result(), None
+                    except Exception as e:
+                        self.failed.append(start)
+                        yield start, None, e
+            finally:
+                for future in futures:
+                    future.cancel()
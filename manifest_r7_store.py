@@ -0,0 +1,226 @@
+#
+# manifest_r7_store.py - simpanan lokal manifest R7 (SQLite) + indeks filter kantor
+#----------------------------------------------------------------------------
+#
+# Dipakai App_cari_manifestR7.pyw. Manifest yang sudah diambil dari API
+# disimpan per hari; pencarian berikutnya hanya mengambil hari yang belum
+# ada atau yang masih "terbuka" (belum lewat R7_OPEN_DAYS hari saat diambil,
+# karena manifest hari itu bisa masih bertambah).
+#
+# Filter kantor tujuan memakai indeks trigram atas nama kantor yang sudah
+# dinormalisasi (huruf kecil, tanda baca jadi spasi). Hasil filter berupa
+# array rowid yang sudah urut tanggal dan di-cache per (rentang, teks).
+#
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+R7_STORE_PATH = os.getenv(
+    "R7_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "manifest_r7.sqlite3"))
+# Hari yang diambil kurang dari sekian hari setelah tanggalnya diambil ulang
+R7_OPEN_DAYS = int(os.getenv("R7_OPEN_DAYS", "1"))
+R7_FILTER_CACHE = 32
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS kantor ("
+    " id INTEGER PRIMARY KEY, nama TEXT NOT NULL UNIQUE, norm TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS kantor_gram ("
+    " gram TEXT NOT NULL, kantor_id INTEGER NOT NULL, PRIMARY KEY (gram, kantor_id)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS manifest ("
+    " id INTEGER PRIMARY KEY, task_id TEXT NOT NULL UNIQUE, no_r7 TEXT,"
+    " kantor_id INTEGER NOT NULL, tgl TEXT NOT NULL, seen_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_manifest_tgl ON manifest (tgl)",
+    "CREATE INDEX IF NOT EXISTS idx_manifest_kantor_tgl ON manifest (kantor_id, tgl)",
+    "CREATE TABLE IF NOT EXISTS fetched_day (day TEXT PRIMARY KEY, fetched_at TEXT NOT NULL)",
+)
+
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    """'KCU Jakarta-Pusat 10000' -> 'kcu jakarta pusat 10000'."""
+    return _NON_ALNUM_RE.sub(" ", (text or "").lower()).strip()
+
+
+def grams(norm, n=3):
+    return {norm[i:i + n] for i in range(len(norm) - n + 1)}
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _day_bounds(date_from, date_to):
+    return f"{_as_date(date_from):%Y-%m-%d} 00:00:00", f"{_as_date(date_to):%Y-%m-%d} 23:59:59"
+
+
+class ManifestR7Store:
+    """Manifest R7 per hari di SQLite lokal. Tulis boleh dari thread fetch, baca dari thread GUI."""
+
+    def __init__(self, path=R7_STORE_PATH, open_days=R7_OPEN_DAYS):
+        self.path = path
+        self.open_days = open_days
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._kantor_ids = {}
+        self._version = 0
+        self._filter_cache = OrderedDict()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+            self._local.conn = conn
+        return conn
+
+    # --- hari yang perlu diambil ------------------------------------------
+
+    def missing_ranges(self, date_from, date_to):
+        """Rentang hari berurutan [(dari, sampai), ...] yang belum tersimpan atau masih terbuka."""
+        date_from, date_to = _as_date(date_from), _as_date(date_to)
+        fetched = dict(self._conn().execute(
+            "SELECT day, fetched_at FROM fetched_day WHERE day BETWEEN ? AND ?",
+            (f"{date_from:%Y-%m-%d}", f"{date_to:%Y-%m-%d}")).fetchall())
+
+        ranges, start = [], None
+        day = date_from
+        while day <= date_to:
+            fetched_at = fetched.get(f"{day:%Y-%m-%d}")
+            closed_at = f"{day + timedelta(days=self.open_days + 1):%Y-%m-%d} 00:00:00"
+            final = fetched_at is not None and fetched_at >= closed_at
+            if not final and start is None:
+                start = day
+            elif final and start is not None:
+                ranges.append((start, day - timedelta(days=1)))
+                start = None
+            day += timedelta(days=1)
+        if start is not None:
+            ranges.append((start, date_to))
+        return ranges
+
+    # --- tulis ---------------------------------------------------------------
+
+    def _kantor_id(self, conn, nama):
+        kantor_id = self._kantor_ids.get(nama)
+        if kantor_id is not None:
+            return kantor_id
+        norm = normalize(nama)
+        conn.execute("INSERT OR IGNORE INTO kantor (nama, norm) VALUES (?, ?)", (nama, norm))
+        kantor_id = conn.execute("SELECT id FROM kantor WHERE nama = ?", (nama,)).fetchone()[0]
+        conn.executemany("INSERT OR IGNORE INTO kantor_gram (gram, kantor_id) VALUES (?, ?)",
+                         [(g, kantor_id) for g in grams(norm)])
+        self._kantor_ids[nama] = kantor_id
+        return kantor_id
+
+    def add_rows(self, rows, seen_at):
+        """Simpan baris (no_r7, kantor_tujuan, tgl 'YYYY-mm-dd HH:MM:SS', task_id) dari satu halaman API."""
+        if not rows:
+            return
+        conn = self._conn()
+        with self._lock:
+            conn.execute("BEGIN")
+            try:
+                values = [(task_id, no_r7, self._kantor_id(conn, kantor or ""), tgl, seen_at)
+                          for no_r7, kantor, tgl, task_id in rows]
+                # Upsert, bukan REPLACE: rowid tetap sama untuk hasil filter yang di-cache
+                conn.executemany(
+                    "INSERT INTO manifest (task_id, no_r7, kantor_id, tgl, seen_at) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT(task_id) DO UPDATE SET no_r7 = excluded.no_r7,"
+                    " kantor_id = excluded.kantor_id, tgl = excluded.tgl, seen_at = excluded.seen_at",
+                    values)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._version += 1
+
+    def mark_fetched(self, date_from, date_to, seen_at, fetched_at=None):
+        """Rentang selesai diambil utuh: hapus manifest yang sudah tidak ada di API, catat harinya."""
+        fetched_at = (fetched_at or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
+        date_from, date_to = _as_date(date_from), _as_date(date_to)
+        days = []
+        day = date_from
+        while day <= date_to:
+            days.append((f"{day:%Y-%m-%d}", fetched_at))
+            day += timedelta(days=1)
+        conn = self._conn()
+        with self._lock:
+            conn.execute("BEGIN")
+            try:
+                conn.execute("DELETE FROM manifest WHERE tgl BETWEEN ? AND ? AND seen_at < ?",
+                             (*_day_bounds(date_from, date_to), seen_at))
+                conn.executemany("INSERT OR REPLACE INTO fetched_day (day, fetched_at) VALUES (?, ?)", days)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._version += 1
+
+    # --- baca ----------------------------------------------------------------
+
+    def matching_kantor_ids(self, text):
+        """Id kantor yang nama ternormalisasinya memuat `text`, atau None jika tanpa filter."""
+        norm = normalize(text)
+        if not norm:
+            return None
+        conn = self._conn()
+        query_grams = grams(norm)
+        if query_grams:
+            placeholders = ", ".join("?" * len(query_grams))
+            candidates = conn.execute(
+                f"SELECT k.id, k.norm FROM kantor k JOIN ("
+                f" SELECT kantor_id FROM kantor_gram WHERE gram IN ({placeholders})"
+                f" GROUP BY kantor_id HAVING COUNT(*) = ?) g ON g.kantor_id = k.id",
+                (*query_grams, len(query_grams))).fetchall()
+        else:
+            # Kurang dari 3 huruf: daftar kantor kecil, cukup dipindai
+            candidates = conn.execute("SELECT id, norm FROM kantor").fetchall()
+        return [kantor_id for kantor_id, kantor_norm in candidates if norm in kantor_norm]
+
+    def search(self, date_from, date_to, text=""):
+        """array rowid manifest dalam rentang yang cocok dengan filter, urut tanggal terbaru dulu."""
+        key = (_as_date(date_from), _as_date(date_to), normalize(text), self._version)
+        result = self._filter_cache.get(key)
+        if result is not None:
+            self._filter_cache.move_to_end(key)
+            return result
+
+        sql = "SELECT id FROM manifest WHERE tgl BETWEEN ? AND ?"
+        params = list(_day_bounds(date_from, date_to))
+        kantor_ids = self.matching_kantor_ids(text)
+        if kantor_ids is not None:
+            if not kantor_ids:
+                result = array("q")
+            sql += f" AND kantor_id IN ({', '.join('?' * len(kantor_ids))})"
+            params.extend(kantor_ids)
+        if result is None:
+            result = array("q", (row[0] for row in self._conn().execute(sql + " ORDER BY tgl DESC, id", params)))
+
+        self._filter_cache[key] = result
+        while len(self._filter_cache) > R7_FILTER_CACHE:
+            self._filter_cache.popitem(last=False)
+        return result
+
+    def rows(self, ids):
+        """Baris tampilan (no_r7, kantor_tujuan, tgl 'dd-mm-YYYY HH:MM:SS', task_id) sesuai urutan ids."""
+        ids = list(ids)
+        if not ids:
+            return []
+        found = {row[0]: row[1:] for row in self._conn().execute(
+            "SELECT m.id, m.no_r7, k.nama, strftime('%d-%m-%Y %H:%M:%S', m.tgl), m.task_id"
+            " FROM manifest m JOIN kantor k ON k.id = m.kantor_id"
+            f" WHERE m.id IN ({', '.join('?' * len(ids))})", ids)}
+        return [found[i] for i in ids if i in found]
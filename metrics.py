@@ -0,0 +1,216 @@
+#
+# metrics.py - timing per tahap pipeline + counter, endpoint teks Prometheus lokal
+#----------------------------------------------------------------------------
+#
+# Tahap yang diukur: fetch (HTTP), parse, db_read, db_write. Setiap tahap
+# dicatat sebagai histogram latensi, jumlah item dan jumlah error; request
+# HTTP juga per host dan status. Dipakai scrape_engine, update_sla,
+# update_app_v2 dan pens_upload.
+#
+#   with metrics.stage("parse", source="kibana"):
+#       data = parse_kibana(html)
+#
+# Jika METRICS_PORT > 0, start_server() membuka http://127.0.0.1:<port>/metrics
+# (port berikutnya dicoba bila sudah dipakai aplikasi lain). summary() memberi
+# satu baris ringkasan per siklus untuk log.
+#
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+load_dotenv()
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 = endpoint mati
+METRICS_PORT_TRIES = 10
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STAGES = ("fetch", "parse", "db_read", "db_write")
+
+_HELP = {
+    "pipeline_stage_seconds": ("histogram", "Latensi satu pemanggilan tahap pipeline."),
+    "pipeline_stage_errors_total": ("counter", "Pemanggilan tahap yang berakhir dengan exception."),
+    "pipeline_items_total": ("counter", "Item (connote/baris) yang diproses per tahap."),
+    "http_request_seconds": ("histogram", "Latensi request HTTP per host."),
+    "http_requests_total": ("counter", "Request HTTP per host dan status (kode, error, cache)."),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Registry:
+    """Counter dan histogram dalam memori proses, aman untuk banyak thread."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}    # (nama, label) -> nilai
+        self._histograms = {}  # (nama, label) -> [count per bucket..., count, sum]
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [0] * (len(self.buckets) + 2) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[-3] += 1  # +Inf
+            hist[-2] += 1  # count
+            hist[-1] += seconds
+
+    def snapshot(self):
+        """Salinan nilai saat ini, untuk dibandingkan di summary()."""
+        with self._lock:
+            return {"time": time.time(), "counters": dict(self._counters),
+                    "histograms": {k: list(v) for k, v in self._histograms.items()}}
+
+    def render(self):
+        """Format teks exposition Prometheus."""
+        snap = self.snapshot()
+        series = {}
+        for (name, key), value in sorted(snap["counters"].items()):
+            series.setdefault(name, []).append(f"{name}{_format_labels(key)} {value}")
+        for (name, key), hist in sorted(snap["histograms"].items()):
+            lines = series.setdefault(name, [])
+            for bound, count in zip(self.buckets, hist):
+                lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {hist[-3]}")
+            lines.append(f"{name}_count{_format_labels(key)} {hist[-2]}")
+            lines.append(f"{name}_sum{_format_labels(key)} {hist[-1]:.6f}")
+        out = []
+        for name in sorted(series):
+            kind, help_text = _HELP.get(name, ("untyped", name))
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(series[name])
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Stage:
+    __slots__ = ("items",)
+
+    def __init__(self, items):
+        self.items = items
+
+
+@contextmanager
+def stage(name, items=1, registry=REGISTRY, **labels):
+    """Ukur satu pemanggilan tahap. `items` bisa diubah di dalam blok (mis. jumlah baris)."""
+    record = _Stage(items)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        registry.inc("pipeline_stage_errors_total", stage=name, **labels)
+        raise
+    finally:
+        registry.observe("pipeline_stage_seconds", time.perf_counter() - start, stage=name, **labels)
+        if record.items:
+            registry.inc("pipeline_items_total", record.items, stage=name, **labels)
+
+
+def observe_http(host, status, seconds, registry=REGISTRY):
+    """Catat satu request HTTP; status = kode HTTP, 'error' atau 'cache'."""
+    registry.inc("http_requests_total", host=host, status=status)
+    if status != "cache":
+        registry.observe("http_request_seconds", seconds, host=host)
+
+
+def _stage_totals(snap):
+    """{stage: [count, sum detik, error, item]} dijumlah dari semua label lain."""
+    totals = {}
+    for (metric, key), hist in snap["histograms"].items():
+        if metric == "pipeline_stage_seconds":
+            row = totals.setdefault(dict(key).get("stage"), [0, 0.0, 0, 0])
+            row[0] += hist[-2]
+            row[1] += hist[-1]
+    for (metric, key), value in snap["counters"].items():
+        if metric in ("pipeline_stage_errors_total", "pipeline_items_total"):
+            row = totals.setdefault(dict(key).get("stage"), [0, 0.0, 0, 0])
+            row[2 if metric == "pipeline_stage_errors_total" else 3] += value
+    return totals
+
+
+def summary(since=None, registry=REGISTRY):
+    """Satu baris ringkasan per tahap sejak snapshot `since` (None = sejak proses mulai)."""
+    now = registry.snapshot()
+    current = _stage_totals(now)
+    previous = _stage_totals(since) if since else {}
+    elapsed = max(now["time"] - since["time"], 1e-9) if since else None
+
+    parts = []
+    for name in sorted(current, key=lambda s: (STAGES.index(s) if s in STAGES else len(STAGES), s)):
+        count, seconds, errors, items = (c - p for c, p in zip(current[name], previous.get(name, [0, 0.0, 0, 0])))
+        if not count:
+            continue
+        part = f"{name} {count}x avg {seconds / count * 1000:.0f}ms"
+        if elapsed:
+            part += f" {items / elapsed:.1f}/s"
+        if errors:
+            part += f" err {errors}"
+        parts.append(part)
+    return "⏱️ " + (" | ".join(parts) if parts else "tidak ada aktivitas")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+def start_server(port=METRICS_PORT, host="127.0.0.1", log=print):
+    """Jalankan endpoint /metrics di thread daemon (sekali per proses). Mengembalikan port, atau None."""
+    global _server
+    if _server is not None:
+        return _server.server_address[1]
+    if not port:
+        return None
+    for candidate in range(port, port + METRICS_PORT_TRIES):
+        try:
+            _server = ThreadingHTTPServer((host, candidate), _Handler)
+            break
+        except OSError:
+            continue
+    else:
+        log(f"⚠️ Endpoint metrics tidak bisa dibuka di port {port}-{port + METRICS_PORT_TRIES - 1}.")
+        return None
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    log(f"📈 Metrics tersedia di http://{host}:{_server.server_address[1]}/metrics")
+    return _server.server_address[1]
@@ -0,0 +1,227 @@
+#
+# pens_upload.py - upload roster pensiun (db_pens.xlsx) ke pens_tblpens
+#----------------------------------------------------------------------------
+#
+# Dipakai oleh up_db-pensiun_xlsx.py. NOTAS yang sudah ada di DB diambil
+# sekali sebagai set, dicocokkan (anti-join) di pandas, lalu baris baru
+# di-insert per chunk dengan executemany dalam satu transaksi.
+#
+# Mode sync juga membandingkan hash isi per baris (sheet vs DB): hanya baris
+# yang berubah di-update (BatchWriter), NOTAS yang hilang dari sheet bisa
+# ditandai sts=0. Tidak perlu hapus-lalu-upload ulang seluruh tabel.
+#
+# Data boleh berupa satu DataFrame atau iterable DataFrame per chunk
+# (sheet_reader.iter_chunks), jadi file besar tidak perlu dimuat utuh.
+#
+import hashlib
+import pandas as pd
+import metrics
+from db_batch import DB_BATCH_SIZE, BatchWriter
+
+TABLE_NAME = "pens_tblpens"
+UPLOAD_CHUNK_SIZE = 1000
+
+# Kolom Excel yang wajib ada
+REQUIRED_COLUMNS = ("NOTAS", "NOMOR_REKENING_POS", "NOREK BARU", "NAMA PENERIMA", "JNS", "ALAMAT", "KTB")
+
+# (kolom Excel, kolom DB) yang ditulis, sama dengan mapping lama di _upload_worker
+INSERT_COLUMNS = (
+    ("NOTAS", "nP"), ("NOMOR_REKENING_POS", "norek2"), ("NOREK BARU", "norek"),
+    ("NAMA PENERIMA", "nmP"), ("JNS", "jP"), ("ALAMAT", "adP"), ("KTB", "ktby"),
+)
+
+
+# Kolom yang dibandingkan saat sync (semua kecuali kunci nP)
+SYNC_COLUMNS = INSERT_COLUMNS[1:]
+
+
+def missing_columns(df):
+    return [col for col in REQUIRED_COLUMNS if col not in df.columns]
+
+
+def normalize_key(value):
+    """NOTAS sebagai string: 123.0 (float dari Excel) -> '123', spasi dibuang."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _clean(value):
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    if hasattr(value, "item"):  # numpy scalar -> tipe Python
+        return value.item()
+    return value
+
+
+def fetch_existing_keys(conn, table=TABLE_NAME):
+    """Semua nP yang sudah ada di tabel, sebagai set string."""
+    cursor = conn.cursor()
+    try:
+        with metrics.stage("db_read", table=table) as read:
+            cursor.execute(f"SELECT nP FROM `{table}`")
+            keys = {normalize_key(row[0]) for row in cursor.fetchall()}
+            read.items = len(keys)
+        return keys
+    finally:
+        cursor.close()
+
+
+def _as_chunks(data):
+    if isinstance(data, pd.DataFrame):
+        yield data
+        return
+    # Waktu baca tiap chunk dari file dicatat sebagai tahap parse
+    chunks = iter(data)
+    while True:
+        with metrics.stage("parse", source="sheet") as read:
+            df = next(chunks, None)
+            read.items = 0 if df is None else len(df)
+        if df is None:
+            return
+        yield df
+
+
+def prepare_frame(df, seen=None):
+    """Tambah kolom _key (NOTAS ternormalisasi); baris tanpa NOTAS dibuang,
+    NOTAS ganda di sheet hanya baris pertama yang dipakai. `seen` (set) dipakai
+    untuk membuang NOTAS yang sudah muncul di chunk sebelumnya, dan diperbarui."""
+    df = df.assign(_key=df["NOTAS"].map(normalize_key))
+    df = df[df["_key"].notna() & (df["_key"] != "")]
+    df = df.drop_duplicates(subset="_key", keep="first")
+    if seen is not None:
+        df = df[~df["_key"].isin(seen)]
+        seen.update(df["_key"])
+    return df
+
+
+def insert_rows(conn, df, table=TABLE_NAME, chunk_size=UPLOAD_CHUNK_SIZE, progress=None):
+    """executemany per chunk dalam transaksi pemanggil (df dari prepare_frame).
+    `progress(selesai, total)` dipanggil per chunk."""
+    db_columns = [db_col for _, db_col in INSERT_COLUMNS] + ["sts"]
+    placeholders = ", ".join(["%s"] * len(db_columns))
+    sql = f"INSERT INTO `{table}` (`" + "`, `".join(db_columns) + f"`) VALUES ({placeholders})"
+    # NOTAS ditulis dalam bentuk ternormalisasi (bukan 123.0 dari kolom float)
+    excel_columns = ["_key" if excel_col == "NOTAS" else excel_col for excel_col, _ in INSERT_COLUMNS]
+
+    rows = [tuple(_clean(v) for v in values) + (1,)
+            for values in df[excel_columns].itertuples(index=False, name=None)]
+    cursor = conn.cursor()
+    try:
+        for i in range(0, len(rows), chunk_size):
+            with metrics.stage("db_write", items=len(rows[i:i + chunk_size]), table=table):
+                cursor.executemany(sql, rows[i:i + chunk_size])
+            if progress:
+                progress(min(i + chunk_size, len(rows)), len(rows))
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+def upload_new(conn, data, table=TABLE_NAME, chunk_size=UPLOAD_CHUNK_SIZE, progress=None):
+    """Insert baris yang NOTAS-nya belum ada, dalam satu transaksi. Mengembalikan (inserted, skipped).
+
+    `progress(baris dibaca, baris di-insert)` dipanggil setiap chunk data selesai.
+    """
+    existing = fetch_existing_keys(conn, table)
+    seen = set()
+    read, inserted = 0, 0
+    try:
+        for df in _as_chunks(data):
+            read += len(df)
+            prepared = prepare_frame(df, seen)
+            inserted += insert_rows(conn, prepared[~prepared["_key"].isin(existing)], table, chunk_size)
+            if progress:
+                progress(read, inserted)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return inserted, read - inserted
+
+
+def _text(value):
+    """Bentuk teks untuk hash: None/NaN -> '', 12.0 -> '12', spasi di tepi dibuang."""
+    value = _clean(value)
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def row_hash(values):
+    return hashlib.sha1("\x1f".join(_text(v) for v in values).encode("utf-8")).hexdigest()
+
+
+def fetch_existing_rows(conn, table=TABLE_NAME):
+    """{key: (nP asli, hash isi, sts)} untuk semua baris di tabel."""
+    db_columns = [db_col for _, db_col in SYNC_COLUMNS]
+    cursor = conn.cursor()
+    try:
+        with metrics.stage("db_read", table=table) as read:
+            cursor.execute(f"SELECT `nP`, `" + "`, `".join(db_columns) + f"`, `sts` FROM `{table}`")
+            rows = {normalize_key(row[0]): (row[0], row_hash(row[1:-1]), row[-1]) for row in cursor.fetchall()}
+            read.items = len(rows)
+        return rows
+    finally:
+        cursor.close()
+
+
+def sync_rows(conn, data, table=TABLE_NAME, flag_missing=False, chunk_size=UPLOAD_CHUNK_SIZE,
+              batch_size=DB_BATCH_SIZE, progress=None, log=None):
+    """Insert baris baru, update baris yang isinya berubah, opsional sts=0 untuk NOTAS yang hilang.
+
+    Baris baru di-insert dalam satu transaksi, update ditulis per batch lewat BatchWriter.
+    Mengembalikan dict jumlah: inserted, updated, unchanged, flagged.
+    `progress(baris dibaca, baris ditulis)` dipanggil setiap chunk data selesai.
+    """
+    existing = fetch_existing_rows(conn, table)
+    existing_keys = set(existing)
+    excel_columns = [excel_col for excel_col, _ in SYNC_COLUMNS]
+    changes = []
+    seen = set()
+    read, inserted, unchanged = 0, 0, 0
+
+    try:
+        for df in _as_chunks(data):
+            read += len(df)
+            prepared = prepare_frame(df, seen)
+            is_new = ~prepared["_key"].isin(existing_keys)
+            inserted += insert_rows(conn, prepared[is_new], table, chunk_size)
+
+            old_rows = prepared[~is_new]
+            for key, values in zip(old_rows["_key"], old_rows[excel_columns].itertuples(index=False, name=None)):
+                raw_key, db_hash, _ = existing[key]
+                if row_hash(values) == db_hash:
+                    unchanged += 1
+                    continue
+                changes.append((raw_key, {db_col: _clean(v) for (_, db_col), v in zip(SYNC_COLUMNS, values)}))
+            if progress:
+                progress(read, inserted + len(changes))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    missing = []
+    if flag_missing:
+        missing = [raw_key for key, (raw_key, _, sts) in existing.items()
+                   if key not in seen and str(sts) != "0"]
+
+    # Update ditulis setelah insert selesai di-commit, per batch
+    writer = BatchWriter(conn, table=table, key="nP", batch_size=batch_size, log=log)
+    for raw_key, data_row in changes:
+        writer.add(raw_key, data_row)
+    for raw_key in missing:
+        writer.add(raw_key, {"sts": 0})
+    writer.flush()
+
+    return {"inserted": inserted, "updated": len(changes), "unchanged": unchanged, "flagged": len(missing)}
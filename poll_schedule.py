@@ -0,0 +1,98 @@
+#
+# poll_schedule.py - jadwal cek adaptif per connote untuk auto-update
+#----------------------------------------------------------------------------
+#
+# Setiap connote menyimpan next_check_at dan last_change_at di tbl_antrn.
+# Siklus auto-update hanya mengambil connote yang sudah jatuh waktunya
+# (index st, next_check_at), bukan semua st='33'.
+#
+#   - status antaran (DELIVERYRUNSHEET dst.)  : dicek tiap 15 menit
+#   - status lain                             : makin lama tidak berubah, makin jarang dicek
+#   - DELIVERED (st=99)                       : tidak dicek lagi
+#
+import os
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+import db_pool
+
+load_dotenv()
+
+POLL_TICK_SECONDS = int(os.getenv("POLL_TICK_SECONDS", "300"))
+POLL_BATCH_LIMIT = int(os.getenv("POLL_BATCH_LIMIT", "5000"))
+
+STATUS_ANTARAN = ("DELIVERYRUNSHEET", "ANTARAN", "ONDELIVERY")
+
+INTERVAL_ANTARAN = timedelta(minutes=15)
+INTERVAL_GAGAL = timedelta(minutes=15)
+INTERVAL_BASI = timedelta(hours=12)
+# (umur sejak perubahan status terakhir, interval cek)
+INTERVAL_BACKOFF = (
+    (timedelta(hours=6), timedelta(minutes=30)),
+    (timedelta(hours=24), timedelta(hours=1)),
+    (timedelta(days=3), timedelta(hours=3)),
+    (timedelta(days=7), timedelta(hours=6)),
+)
+
+SQL_DUE = ("SELECT connote, status, last_change_at FROM tbl_antrn "
+           "WHERE st = %s AND (next_check_at IS NULL OR next_check_at <= NOW()) "
+           "ORDER BY next_check_at LIMIT %s")
+
+
+def fetch_due(st='33', limit=POLL_BATCH_LIMIT):
+    """Connote dengan st tertentu yang jadwal ceknya sudah lewat (belum pernah dijadwalkan = paling awal)."""
+    return db_pool.fetch_all(SQL_DUE, (st, limit), dictionary=True)
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if value:
+        try:
+            return datetime.strptime(str(value), "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return None
+    return None
+
+
+def is_antaran(status):
+    status = (status or "").upper()
+    return any(s in status for s in STATUS_ANTARAN)
+
+
+def next_interval(status, last_change_at, now):
+    """Jeda sampai cek berikutnya berdasarkan status dan umur perubahan terakhir."""
+    if is_antaran(status):
+        return INTERVAL_ANTARAN
+    age = now - (last_change_at or now)
+    for max_age, interval in INTERVAL_BACKOFF:
+        if age < max_age:
+            return interval
+    return INTERVAL_BASI
+
+
+def schedule_fields(previous, data, now=None):
+    """Kolom next_check_at/last_change_at untuk ditulis bersama hasil scrape satu connote.
+
+    `previous` adalah baris dari fetch_due (boleh kosong untuk scrap awal).
+    Jika status berubah, last_change_at diambil dari tgl_proses halaman
+    (waktu event terakhir), atau sekarang jika tidak ada.
+    """
+    now = now or datetime.now()
+    previous = previous or {}
+    old_status = previous.get('status')
+    new_status = data.get('status', old_status)
+    last_change_at = _to_datetime(previous.get('last_change_at'))
+    if last_change_at is None or new_status != old_status:
+        last_change_at = _to_datetime(data.get('tgl_proses')) or now
+
+    fields = {'last_change_at': last_change_at}
+    if data.get('st') == '99':
+        fields['next_check_at'] = None
+    else:
+        fields['next_check_at'] = now + next_interval(new_status, last_change_at, now)
+    return fields
+
+
+def retry_fields(now=None):
+    """Jadwal ulang untuk connote yang gagal di-fetch atau di-parse."""
+    return {'next_check_at': (now or datetime.now()) + INTERVAL_GAGAL}
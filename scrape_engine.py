@@ -0,0 +1,327 @@
+#
+# scrape_engine.py - mesin scraping tracking kibana -> tbl_antrn (tanpa GUI)
+#----------------------------------------------------------------------------
+#
+# Dipakai oleh IMPORT_R7_to_MySQL_FINAL.py (GUI + tray), tapi juga bisa
+# dijalankan sendiri di server tanpa display:
+#
+#   python scrape_engine.py --workers 32 --batch-size 500 --st 33 --loop
+#   python scrape_engine.py --st 0 --once          # scrap awal data baru
+#
+import argparse
+import base64
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+import db_pool
+import metrics
+from db_batch import DB_BATCH_SIZE, BatchWriter, BatchWriteError
+from db_schema import ensure_poll_schedule_columns, ensure_fingerprint_table
+from fingerprint import FingerprintStore, fingerprint
+from html_archive import default_archive
+from poll_schedule import POLL_TICK_SECONDS, fetch_due, schedule_fields, retry_fields
+from tracking_cache import TrackingCache
+from tracking_parser import parse_kibana
+
+load_dotenv()
+
+KIBANA_URL = "https://kibana.posindonesia.co.id:4433/x123449/3.php?id={connote}&6f017f90-f299-11ec-988f-6f1763dc6f47xdsdkjshhsahsaksasjsaasldsllsdjldsjsbdaksdslssjasjaa"
+PID_URL = "https://pid.posindonesia.co.id/lacak/admin/detail_lacak_banyak.php?id={connote_b64}"
+
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "16"))
+SCRAPE_TIMEOUT = int(os.getenv("SCRAPE_TIMEOUT", "15"))
+
+
+class TrackingFetcher:
+    """Mengambil banyak halaman tracking sekaligus lewat thread pool terbatas.
+
+    Setiap thread worker memakai requests.Session miliknya sendiri sehingga
+    koneksi keep-alive ke server kibana dipakai ulang antar connote.
+    Jika `cache` (TrackingCache) diberikan, halaman yang masih dalam TTL
+    diambil dari cache bersama dengan kunci (sumber, connote). Jika `archive`
+    (HtmlArchive) diberikan, setiap halaman yang diambil dari server diarsipkan.
+    """
+
+    def __init__(self, workers=SCRAPE_WORKERS, timeout=SCRAPE_TIMEOUT, url_template=KIBANA_URL, verify=False,
+                 cache=None, sumber="kibana", archive=None):
+        self.workers = max(1, int(workers))
+        self.timeout = timeout
+        self.url_template = url_template
+        self.verify = verify
+        self.cache = cache
+        self.sumber = sumber
+        self.archive = archive
+        self.host = urlsplit(url_template).hostname
+        self._local = threading.local()
+        if not verify:
+            requests.packages.urllib3.disable_warnings(requests.packages.urllib3.exceptions.InsecureRequestWarning)
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=1)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._local.session = session
+        return session
+
+    def fetch(self, connote):
+        """Mengambil satu halaman tracking dan mengembalikan HTML-nya."""
+        if self.cache is not None:
+            html = self.cache.get(self.sumber, connote)
+            if html is not None:
+                metrics.observe_http(self.host, "cache", 0)
+                return html
+        connote_b64 = base64.urlsafe_b64encode(connote.encode()).decode("ascii")
+        url = self.url_template.format(connote=connote, connote_b64=connote_b64)
+        with metrics.stage("fetch", source=self.sumber):
+            start = time.perf_counter()
+            try:
+                response = self._session().get(url, timeout=self.timeout, verify=self.verify)
+            except requests.exceptions.RequestException:
+                metrics.observe_http(self.host, "error", time.perf_counter() - start)
+                raise
+            metrics.observe_http(self.host, response.status_code, time.perf_counter() - start)
+            response.raise_for_status()
+        if self.cache is not None:
+            self.cache.put(self.sumber, connote, response.text)
+        if self.archive is not None:
+            self.archive.add(self.sumber, connote, response.text)
+        return response.text
+
+    def fetch_many(self, connotes, stop_event=None):
+        """Generator (connote, html, error) dalam urutan selesai.
+
+        Hasil di-yield ke thread pemanggil, jadi logika update DB yang sudah
+        ada tetap berjalan di satu thread. Jika stop_event di-set, connote
+        yang belum mulai diambil dibatalkan.
+        """
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scrape") as executor:
+                futures = {executor.submit(self.fetch, connote): connote for connote in connotes}
+                try:
+                    for future in as_completed(futures):
+                        connote = futures[future]
+                        if stop_event is not None and stop_event.is_set():
+                            break
+                        try:
+                            yield connote, future.result(), None
+                        except Exception as e:
+                            yield connote, None, e
+                finally:
+                    for future in futures:
+                        future.cancel()
+        finally:
+            # Akhir putaran (juga jika dihentikan): halaman yang baru diambil langsung masuk arsip
+            if self.archive is not None:
+                self.archive.flush()
+
+
+def kibana_fetcher(workers=SCRAPE_WORKERS, timeout=SCRAPE_TIMEOUT, cache=None):
+    """Fetcher halaman kibana 3.php dengan cache tracking bersama."""
+    return TrackingFetcher(workers, timeout, KIBANA_URL, verify=False,
+                           cache=cache or TrackingCache(), sumber="kibana", archive=default_archive())
+
+
+def pid_fetcher(workers=SCRAPE_WORKERS, timeout=SCRAPE_TIMEOUT, cache=None):
+    """Fetcher halaman pid detail_lacak_banyak.php dengan cache tracking bersama."""
+    return TrackingFetcher(workers, timeout, PID_URL, verify=True,
+                           cache=cache or TrackingCache(), sumber="pid", archive=default_archive())
+
+
+class ScrapeEngine:
+    """Fetch -> parse -> tulis batch ke tbl_antrn, tanpa ketergantungan ke Tk.
+
+    `log(msg)` dan `progress(selesai, total)` adalah callback opsional; GUI
+    memasangnya ke widget lewat root.after, mode headless cukup print.
+    """
+
+    def __init__(self, workers=SCRAPE_WORKERS, batch_size=DB_BATCH_SIZE, log=print, progress=None, stop_event=None):
+        self.fetcher = kibana_fetcher(workers)
+        self.batch_size = batch_size
+        self.log = log
+        self.progress = progress
+        self.stop_event = stop_event or threading.Event()
+        self.fp_store = FingerprintStore('tbl_antrn')
+
+    def ensure_schema(self):
+        conn = db_pool.connect()
+        try:
+            if ensure_poll_schedule_columns(conn):
+                self.log("🛠️ Kolom jadwal cek (next_check_at, last_change_at) ditambahkan ke tbl_antrn.")
+            ensure_fingerprint_table(conn)
+        finally:
+            conn.close()
+
+    def _report_progress(self, done, total):
+        if self.progress:
+            self.progress(done, total)
+
+    def scrape(self, connotes_to_scrap, is_initial_scrap=False):
+        """Scrape baris {'connote', ...} dan tulis hasilnya. Mengembalikan (berhasil, gagal)."""
+        log = self.log
+        updated = set()
+        unchanged = set()
+        failed_count = 0
+
+        if not connotes_to_scrap:
+            log("✅ Tidak ada data untuk di-scrap pada mode ini.")
+            return 0, 0
+
+        log(f"🔍 Ditemukan {len(connotes_to_scrap)} connote untuk diproses ({self.fetcher.workers} worker).")
+
+        previous = {row['connote']: row for row in connotes_to_scrap}
+        new_fp = {}
+
+        def save_fingerprints(cursor, batch):
+            self.fp_store.save(cursor, [(connote, new_fp.pop(connote)) for connote in batch if connote in new_fp])
+
+        cycle_start = metrics.REGISTRY.snapshot()
+        conn = db_pool.connect()
+        with metrics.stage("db_read", items=len(previous), table="fingerprint"):
+            known_fp = self.fp_store.load(conn, previous)
+        writer = BatchWriter(conn, batch_size=self.batch_size, after_flush=save_fingerprints, log=log)
+
+        def drop_failed_batch(e):
+            nonlocal failed_count
+            log(f"  ❌ {e}")
+            lost = updated.intersection(e.keys)
+            updated.difference_update(lost)
+            failed_count += len(lost)
+
+        results = self.fetcher.fetch_many(list(previous), stop_event=self.stop_event)
+        for i, (connote, html, error) in enumerate(results):
+            self._report_progress(i + 1, len(previous))
+            log(f"🔄 Memproses connote: {connote}")
+
+            try:
+                if error is not None:
+                    if isinstance(error, requests.exceptions.RequestException):
+                        log(f"  ❌ Gagal mengambil data untuk {connote}. Error: {error}")
+                    else:
+                        log(f"  ❌ Terjadi error saat memproses {connote}. Error: {error}")
+                    failed_count += 1
+                    writer.add(connote, retry_fields())
+                    continue
+
+                with metrics.stage("parse", source="kibana"):
+                    data_to_update = parse_kibana(html).to_update()
+
+                if data_to_update:
+                    if is_initial_scrap and 'st' not in data_to_update:
+                        data_to_update['st'] = '33'
+                    fp = fingerprint(data_to_update)
+                    schedule = schedule_fields(previous[connote], data_to_update)
+
+                    if known_fp.get(connote) == fp:
+                        unchanged.add(connote)
+                        log(f"  💤 {connote} tidak berubah, update data dilewati.")
+                        writer.add(connote, {'next_check_at': schedule['next_check_at']})
+                    else:
+                        data_to_update.update(schedule)
+                        new_fp[connote] = fp
+                        updated.add(connote)
+                        log(f"  ✅ Data untuk {connote} masuk antrean update.")
+                        writer.add(connote, data_to_update)
+                else:
+                    log(f"  ⚠️ Tidak ada data valid yang diekstrak untuk {connote}.")
+                    failed_count += 1
+                    writer.add(connote, retry_fields())
+
+            except BatchWriteError as e:
+                drop_failed_batch(e)
+            except Exception as e:
+                log(f"  ❌ Terjadi error saat memproses {connote}. Error: {e}")
+                traceback.print_exc()
+                failed_count += 1
+
+        if self.stop_event.is_set():
+            log("🛑 Proses update dihentikan.")
+
+        try:
+            writer.flush()
+        except BatchWriteError as e:
+            drop_failed_batch(e)
+
+        conn.close()
+        log(f"📊 Berubah: {len(updated)}, Tidak berubah: {len(unchanged)}, Gagal: {failed_count}")
+        log(metrics.summary(cycle_start))
+        self._report_progress(0, 0)
+        return len(updated) + len(unchanged), failed_count
+
+    def run_cycle(self, st='33'):
+        """Satu siklus untuk satu nilai st. st='0' = scrap awal semua data baru,
+        selain itu hanya connote yang jadwal ceknya sudah jatuh tempo."""
+        if st == '0':
+            with metrics.stage("db_read", table="tbl_antrn") as read:
+                rows = db_pool.fetch_all("SELECT connote FROM tbl_antrn WHERE st = '0'", dictionary=True)
+                read.items = len(rows)
+            return self.scrape(rows, is_initial_scrap=True)
+        with metrics.stage("db_read", table="tbl_antrn") as read:
+            rows = fetch_due(st)
+            read.items = len(rows)
+        if not rows:
+            self.log(f"🤖 Auto-Update: Tidak ada connote (st={st}) yang jatuh jadwal cek.")
+            return 0, 0
+        return self.scrape(rows)
+
+    def run_forever(self, st_filters=('33',), tick=POLL_TICK_SECONDS):
+        """Loop daemon: jalankan siklus untuk setiap st, lalu tunggu `tick` detik."""
+        self.ensure_schema()
+        while not self.stop_event.is_set():
+            try:
+                for st in st_filters:
+                    updated, failed = self.run_cycle(st)
+                    self.log(f"🤖 Siklus st={st} selesai. Berhasil: {updated}, Gagal: {failed}")
+                self.log(f"😴 Menunggu {tick} detik untuk siklus berikutnya.")
+                self.stop_event.wait(tick)
+            except Exception as e:
+                self.log(f"[ERROR] Kesalahan fatal di siklus scraping: {e}")
+                traceback.print_exc()
+                self.stop_event.wait(60)
+
+
+def _print_log(msg):
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scraper tracking kibana -> tbl_antrn tanpa GUI.")
+    parser.add_argument("--workers", type=int, default=SCRAPE_WORKERS, help="jumlah fetch paralel")
+    parser.add_argument("--batch-size", type=int, default=DB_BATCH_SIZE, help="baris per transaksi DB")
+    parser.add_argument("--st", action="append", help="nilai st yang diproses (boleh berulang, default 33)")
+    parser.add_argument("--tick", type=int, default=POLL_TICK_SECONDS, help="jeda antar siklus (detik) untuk --loop")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--once", action="store_true", help="jalankan satu siklus lalu keluar (default)")
+    mode.add_argument("--loop", action="store_true", help="jalan terus sebagai daemon")
+    args = parser.parse_args(argv)
+
+    st_filters = args.st or ['33']
+    metrics.start_server(log=_print_log)
+    engine = ScrapeEngine(workers=args.workers, batch_size=args.batch_size, log=_print_log)
+    if args.loop:
+        try:
+            engine.run_forever(st_filters, tick=args.tick)
+        except KeyboardInterrupt:
+            engine.stop_event.set()
+        return 0
+
+    engine.ensure_schema()
+    total_failed = 0
+    for st in st_filters:
+        updated, failed = engine.run_cycle(st)
+        _print_log(f"🤖 Siklus st={st} selesai. Berhasil: {updated}, Gagal: {failed}")
+        total_failed += failed
+    return 1 if total_failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
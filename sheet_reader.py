@@ -0,0 +1,74 @@
+#
+# sheet_reader.py - baca .xlsx / .csv per chunk dengan memori terbatas
+#----------------------------------------------------------------------------
+#
+# .xlsx dibaca dengan openpyxl mode read-only (baris di-stream dari zip,
+# tidak seluruh workbook dimuat), .csv dengan pandas chunksize. Baris
+# pertama dianggap header, sama seperti pd.read_excel default.
+#
+import os
+import pandas as pd
+from openpyxl import load_workbook
+
+READ_CHUNK_ROWS = 5000
+PREVIEW_ROWS = 200
+
+
+def _is_csv(path):
+    return os.path.splitext(path)[1].lower() in (".csv", ".txt")
+
+
+def _iter_xlsx_rows(path):
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        for row in ws.iter_rows(values_only=True):
+            yield row
+    finally:
+        wb.close()
+
+
+def _header(values):
+    return [str(v).strip() if v is not None else f"Unnamed: {i}" for i, v in enumerate(values)]
+
+
+def iter_chunks(path, chunk_rows=READ_CHUNK_ROWS):
+    """Generator DataFrame berisi paling banyak `chunk_rows` baris."""
+    if _is_csv(path):
+        for chunk in pd.read_csv(path, chunksize=chunk_rows, dtype=object, sep=None, engine="python"):
+            yield chunk
+        return
+
+    rows = _iter_xlsx_rows(path)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = _header(header)
+    buffer = []
+    for row in rows:
+        if not any(v is not None and v != "" for v in row):
+            continue  # baris kosong di akhir sheet
+        buffer.append(tuple(row[:len(columns)]) + (None,) * (len(columns) - len(row)))
+        if len(buffer) >= chunk_rows:
+            yield pd.DataFrame(buffer, columns=columns)
+            buffer = []
+    if buffer:
+        yield pd.DataFrame(buffer, columns=columns)
+
+
+def read_preview(path, rows=PREVIEW_ROWS):
+    """DataFrame beberapa baris pertama, untuk ditampilkan sebelum upload."""
+    return next(iter_chunks(path, rows), pd.DataFrame())
+
+
+def estimate_rows(path):
+    """Perkiraan jumlah baris data (tanpa header) untuk progress bar, tanpa memuat isi file."""
+    if _is_csv(path):
+        with open(path, "rb") as f:
+            return max(sum(1 for _ in f) - 1, 0)
+    wb = load_workbook(path, read_only=True)
+    try:
+        ws = wb.worksheets[0]
+        return max((ws.max_row or 1) - 1, 0)
+    finally:
+        wb.close()
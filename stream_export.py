@@ -0,0 +1,88 @@
+#
+# stream_export.py - export hasil query ke .xlsx / .csv tanpa memuat semua baris
+#----------------------------------------------------------------------------
+#
+# Baris dibaca dari cursor unbuffered (server-side) per batch dan langsung
+# ditulis ke file: .csv lewat modul csv, .xlsx lewat openpyxl write-only.
+# Memori tetap datar berapa pun ukuran tabelnya.
+#
+import csv
+import os
+from openpyxl import Workbook
+
+EXPORT_BATCH_SIZE = 5000
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class _CsvSink:
+    def __init__(self, path, columns):
+        self.f = open(path, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.writer(self.f)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.f.close()
+
+    abort = close
+
+
+class _XlsxSink:
+    def __init__(self, path, columns):
+        self.path = path
+        self.wb = Workbook(write_only=True)
+        self.ws = self.wb.create_sheet()
+        self.ws.append(list(columns))
+
+    def write(self, rows):
+        for row in rows:
+            self.ws.append(list(row))
+
+    def close(self):
+        self.wb.save(self.path)
+
+    def abort(self):
+        # Worksheet write-only harus ditutup lewat save agar file temp-nya dilepas
+        try:
+            self.wb.save(self.path)
+        except Exception:
+            pass
+
+
+def _sink(path, columns):
+    if os.path.splitext(path)[1].lower() == ".csv":
+        return _CsvSink(path, columns)
+    return _XlsxSink(path, columns)
+
+
+def export_cursor(cursor, path, columns, batch_size=EXPORT_BATCH_SIZE, total=None, progress=None, stop_event=None):
+    """Tulis semua baris dari cursor yang sudah di-execute ke `path`. Mengembalikan jumlah baris.
+
+    `progress(selesai, total)` dipanggil per batch. Jika stop_event di-set,
+    file yang setengah jadi dihapus dan ExportCancelled di-raise.
+    """
+    sink = _sink(path, columns)
+    written = 0
+    try:
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                raise ExportCancelled()
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            sink.write(rows)
+            written += len(rows)
+            if progress:
+                progress(written, total)
+        sink.close()
+    except BaseException:
+        sink.abort()
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return written
@@ -0,0 +1,46 @@
+#
+# test_tracking_parser.py - golden file fixtures/kibana untuk kedua backend parser
+#----------------------------------------------------------------------------
+#
+import json
+import os
+
+import pytest
+
+import tracking_parser
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "kibana")
+FIXTURES = sorted(os.path.splitext(n)[0] for n in os.listdir(FIXTURE_DIR) if n.endswith(".html"))
+
+
+@pytest.fixture(params=["lxml", "html.parser"])
+def backend(request, monkeypatch):
+    if request.param == "lxml":
+        pytest.importorskip("lxml.html")
+    else:
+        monkeypatch.setattr(tracking_parser, "lxml", None)
+    return request.param
+
+
+def _load(name):
+    with open(os.path.join(FIXTURE_DIR, name + ".html"), encoding="utf-8") as f:
+        html = f.read()
+    with open(os.path.join(FIXTURE_DIR, name + ".json"), encoding="utf-8") as f:
+        return html, json.load(f)
+
+
+@pytest.mark.parametrize("name", FIXTURES)
+def test_golden(backend, name):
+    html, expected = _load(name)
+    assert tracking_parser.parse_kibana(html).to_update() == expected
+
+
+def test_th_diikuti_th_lalu_td(backend):
+    html = ("<table><tr><th>Penerima</th><th>Keterangan</th><td>BUDI, Alamat : JL MAWAR 1</td></tr>"
+            "<tr><th>STATUS AKHIR</th></tr><tr><td>bukan pasangan</td></tr></table>")
+    assert tracking_parser.extract_pairs(html) == {"Penerima": "BUDI, Alamat : JL MAWAR 1"}
+
+
+def test_td_bersarang(backend):
+    html = "<table><tr><th>Pengirim</th><td><table><tr><td>TOKO A</td></tr></table>, KUDUS</td></tr></table>"
+    assert tracking_parser.extract_pairs(html) == {"Pengirim": "TOKO A, KUDUS"}
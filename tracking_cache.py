@@ -0,0 +1,106 @@
+#
+# tracking_cache.py - cache halaman tracking bersama antar aplikasi (SQLite)
+#----------------------------------------------------------------------------
+#
+# IMPORT_R7, up_mile_app, update_app_v2 dan update_sla mengambil halaman
+# tracking connote yang sama. Halaman yang baru diambil disimpan di satu file
+# SQLite lokal; aplikasi lain yang meminta connote yang sama dalam TTL
+# memakai isi cache, bukan request baru ke server.
+#
+# Yang disimpan adalah HTML mentah (terkompresi), karena tiap aplikasi
+# mengambil field yang berbeda dari halaman yang sama (mis. status vs SLA).
+#
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TRACKING_CACHE_PATH = os.getenv(
+    "TRACKING_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "tracking.sqlite3"))
+# Detik; 0 = cache dimatikan
+TRACKING_CACHE_TTL = int(os.getenv("TRACKING_CACHE_TTL", "600"))
+
+SCHEMA = ("CREATE TABLE IF NOT EXISTS pages ("
+          " sumber TEXT NOT NULL,"
+          " connote TEXT NOT NULL,"
+          " fetched_at REAL NOT NULL,"
+          " body BLOB NOT NULL,"
+          " PRIMARY KEY (sumber, connote))")
+
+
+class TrackingCache:
+    """Cache TTL {(sumber, connote): html}. Aman dipakai banyak thread dan banyak proses."""
+
+    def __init__(self, path=TRACKING_CACHE_PATH, ttl=TRACKING_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # get() dipanggil dari banyak thread worker fetch sekaligus
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self._purged = False
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(SCHEMA)
+            self._local.conn = conn
+            if not self._purged:
+                self._purged = True
+                self.purge()
+        return conn
+
+    def get(self, sumber, connote):
+        """HTML dari cache jika masih dalam TTL, selain itu None."""
+        if not self.enabled:
+            return None
+        try:
+            row = self._conn().execute(
+                "SELECT body FROM pages WHERE sumber = ? AND connote = ? AND fetched_at >= ?",
+                (sumber, connote, time.time() - self.ttl)).fetchone()
+        except sqlite3.Error:
+            row = None
+        with self._stats_lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def stats(self):
+        """(hits, misses) yang dibaca bersamaan."""
+        with self._stats_lock:
+            return self.hits, self.misses
+
+    def put(self, sumber, connote, html):
+        if not self.enabled:
+            return
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO pages (sumber, connote, fetched_at, body) VALUES (?, ?, ?, ?)",
+                (sumber, connote, time.time(), zlib.compress(html.encode("utf-8"))))
+        except sqlite3.Error:
+            pass  # cache hanya optimasi, kegagalan tulis tidak boleh menggagalkan scrape
+
+    def purge(self):
+        """Hapus entri yang sudah lewat TTL."""
+        try:
+            self._conn().execute("DELETE FROM pages WHERE fetched_at < ?", (time.time() - self.ttl,))
+        except sqlite3.Error:
+            pass
@@ -0,0 +1,232 @@
+#
+# tracking_parser.py - parser halaman tracking kibana (3.php) sekali jalan
+#----------------------------------------------------------------------------
+#
+# Semua pasangan <th>/<td> diambil dalam satu kali lewat dokumen memakai lxml.
+# Jika lxml tidak terpasang, dipakai html.parser bawaan Python (tetap satu
+# kali lewat, tanpa BeautifulSoup).
+#
+#   python tracking_parser.py --check fixtures/kibana
+#
+# membandingkan hasil parse setiap *.html dengan *.json (golden file).
+# tests/test_tracking_parser.py menjalankan golden file yang sama dengan
+# pytest, untuk backend lxml maupun html.parser.
+#
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Optional
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+PARSER_BACKEND = "lxml" if lxml is not None else "html.parser"
+
+KIBANA_LABELS = ("Tanggal Kirim", "Pengirim", "Penerima", "STATUS AKHIR", "COD/NON COD")
+
+RE_KODEPOS = re.compile(r"\b(\d{5})\b")
+RE_TGL_STATUS = re.compile(r"tgl\s*:\s*(\d{4}-\d{2}-\d{2}\s*\d{2}:\d{2}:\d{2})")
+RE_NILAI_COD = re.compile(r"Nilai Cod\s*:\s*([0-9,.]*)")
+
+DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%d-%m-%Y %H:%M:%S", "%d-%m-%Y %H:%M")
+
+# Urutan kolom sama dengan urutan ekstraksi lama di IMPORT_R7.
+UPDATE_FIELDS = ("tgl_kirim", "pgrm", "pnrm", "al_pnrm", "status", "st",
+                 "lok_akhir", "tgl_proses", "cod", "bsu_cod")
+
+
+def parse_and_format_date(date_str):
+    if not date_str:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            pass
+    return None
+
+
+@dataclass
+class KibanaRecord:
+    """Hasil parse satu halaman tracking kibana, dengan nama kolom tbl_antrn."""
+    tgl_kirim: Optional[str] = None
+    pgrm: Optional[str] = None
+    pnrm: Optional[str] = None
+    al_pnrm: Optional[str] = None
+    status: Optional[str] = None
+    st: Optional[str] = None
+    lok_akhir: Optional[str] = None
+    tgl_proses: Optional[str] = None
+    cod: Optional[str] = None
+    bsu_cod: Optional[int] = None
+    found: set = field(default_factory=set, repr=False, compare=False)
+
+    def set(self, name, value):
+        setattr(self, name, value)
+        self.found.add(name)
+
+    def to_update(self):
+        """Dict kolom -> nilai untuk UPDATE tbl_antrn, hanya kolom yang ditemukan di halaman."""
+        return {name: getattr(self, name) for name in UPDATE_FIELDS if name in self.found}
+
+    def __bool__(self):
+        return bool(self.found)
+
+
+VOID_TAGS = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input",
+                       "link", "meta", "param", "source", "track", "wbr"))
+
+
+class _PairCollector(HTMLParser):
+    """Fallback tanpa lxml: kumpulkan teks <th> dan <td> saudara berikutnya.
+
+    Sama dengan jalur lxml (dan find_next_sibling("td") lama): elemen saudara
+    yang bukan <td>, termasuk <th> lain, dilewati sampai ketemu <td>.
+    """
+
+    def __init__(self, labels):
+        super().__init__(convert_charrefs=True)
+        self.labels = labels
+        self.pairs = {}
+        self._depth = 0
+        self._captures = []  # [tag, kedalaman, label-label tujuan, buffer]
+        self._pending = []   # (label, kedalaman induk <th>) yang menunggu <td>
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+        if tag == "th":
+            self._captures.append(["th", self._depth, None, []])
+        elif tag == "td":
+            labels = [label for label, depth in self._pending if depth == self._depth]
+            if labels:
+                self._pending = [(label, depth) for label, depth in self._pending if depth != self._depth]
+                self._captures.append(["td", self._depth, labels, []])
+        self._depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        self._depth = max(0, self._depth - 1)
+        # Induk <th> sudah ditutup: label yang belum dapat <td> gugur
+        self._pending = [(label, depth) for label, depth in self._pending if depth <= self._depth]
+        while self._captures and self._captures[-1][1] >= self._depth:
+            kind, depth, labels, buffer = self._captures.pop()
+            text = "".join(buffer).strip()
+            if kind == "th":
+                if (text in self.labels and text not in self.pairs
+                        and all(label != text for label, _ in self._pending)):
+                    self._pending.append((text, depth))
+            else:
+                for label in labels:
+                    self.pairs.setdefault(label, text)
+
+    def handle_data(self, data):
+        for capture in self._captures:
+            capture[3].append(data)
+
+
+def extract_pairs(html, labels=KIBANA_LABELS):
+    """Mengembalikan {label th: teks td berikutnya} untuk label yang diminta (kemunculan pertama)."""
+    wanted = set(labels)
+    if lxml is None:
+        collector = _PairCollector(wanted)
+        collector.feed(html)
+        collector.close()
+        return collector.pairs
+
+    pairs = {}
+    if not html or not html.strip():
+        return pairs
+    doc = lxml.html.fromstring(html)
+    for th in doc.iter("th"):
+        label = th.text_content().strip()
+        if label not in wanted or label in pairs:
+            continue
+        sibling = th.getnext()
+        while sibling is not None and sibling.tag != "td":
+            sibling = sibling.getnext()
+        if sibling is not None:
+            pairs[label] = sibling.text_content().strip()
+    return pairs
+
+
+def parse_kibana(html):
+    """Parse halaman 3.php menjadi KibanaRecord."""
+    pairs = extract_pairs(html)
+    record = KibanaRecord()
+
+    tgl_kirim_raw = pairs.get("Tanggal Kirim")
+    if tgl_kirim_raw is not None:
+        record.set("tgl_kirim", parse_and_format_date(tgl_kirim_raw))
+
+    pengirim_full = pairs.get("Pengirim")
+    if pengirim_full is not None:
+        record.set("pgrm", pengirim_full.split(',')[0].strip())
+
+    penerima_full = pairs.get("Penerima")
+    if penerima_full is not None:
+        record.set("pnrm", penerima_full.split(',')[0].strip())
+        if 'Alamat :' in penerima_full:
+            record.set("al_pnrm", penerima_full.split('Alamat :')[-1].strip())
+
+    status_full = pairs.get("STATUS AKHIR")
+    if status_full is not None:
+        status_text = status_full.split(' Di ')[0].strip()
+        record.set("status", status_text)
+
+        if "DELIVERED" in status_text.upper():
+            record.set("st", '99')
+
+        kodepos_match = RE_KODEPOS.search(status_full.split(',')[0])
+        if kodepos_match:
+            record.set("lok_akhir", kodepos_match.group(1))
+
+        date_match = RE_TGL_STATUS.search(status_full)
+        if date_match:
+            record.set("tgl_proses", parse_and_format_date(date_match.group(1)))
+
+    cod_full = pairs.get("COD/NON COD")
+    if cod_full is not None:
+        record.set("cod", cod_full.split('Nilai Cod :')[0].strip())
+        match = RE_NILAI_COD.search(cod_full)
+        if match:
+            bsu_cod_raw = match.group(1).strip().replace(',', '').replace('.', '')
+            record.set("bsu_cod", int(bsu_cod_raw) if bsu_cod_raw.isdigit() else 0)
+        else:
+            record.set("bsu_cod", 0)
+
+    return record
+
+
+def check_golden(directory, parse=parse_kibana):
+    """Parse setiap *.html di `directory` dan bandingkan dengan *.json di sebelahnya."""
+    failures = 0
+    names = sorted(n for n in os.listdir(directory) if n.endswith(".html"))
+    for name in names:
+        html_path = os.path.join(directory, name)
+        json_path = os.path.splitext(html_path)[0] + ".json"
+        with open(html_path, encoding="utf-8") as f:
+            actual = parse(f.read()).to_update()
+        with open(json_path, encoding="utf-8") as f:
+            expected = json.load(f)
+        if actual == expected:
+            print(f"OK    {name}")
+        else:
+            failures += 1
+            print(f"FAIL  {name}\n  expected: {expected}\n  actual:   {actual}")
+    print(f"{len(names) - failures}/{len(names)} cocok (backend: {PARSER_BACKEND})")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--check":
+        sys.exit(0 if check_golden(sys.argv[2]) else 1)
+    print("Pemakaian: python tracking_parser.py --check <folder fixture>")
+    sys.exit(2)
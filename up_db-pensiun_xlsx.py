@@ -1,10 +1,13 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, ttk, scrolledtext
+from tkinter import filedialog, messagebox, scrolledtext
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
-import pandas as pd
 import mysql.connector
-import os
+import db_pool
+import metrics
+import pens_upload
+import sheet_reader
+from virtual_table import VirtualTable
 from dotenv import load_dotenv
 import logging
 import threading
@@ -42,7 +45,7 @@ class App(tb.Window):
         logging.info("Application started.")
 
         self.file_path = ""
-        self.df = None
+        self.df = None  # preview (beberapa baris pertama); upload membaca file per chunk
 
         self.create_widgets()
         self.after(100, self.process_log_queue)
@@ -68,7 +71,7 @@ class App(tb.Window):
         tree_frame = tb.Labelframe(top_frame, text="Excel Data Preview", padding=15)
         tree_frame.pack(fill=BOTH, expand=True, pady=10)
 
-        self.tree = ttk.Treeview(tree_frame, show="headings")
+        self.tree = VirtualTable(tree_frame, xscroll=True)
         self.tree.pack(fill=BOTH, expand=True)
 
         # --- Progress Bar and Status ---
@@ -81,6 +84,17 @@ class App(tb.Window):
         self.progress = tb.Progressbar(progress_frame, orient=HORIZONTAL, length=300, mode='determinate')
         self.progress.pack(fill=X, expand=True)
 
+        # --- Upload Options ---
+        options_frame = tb.Frame(top_frame)
+        options_frame.pack(pady=(5, 0))
+        self.sync_var = tk.BooleanVar(value=False)
+        self.flag_missing_var = tk.BooleanVar(value=False)
+        tb.Checkbutton(options_frame, text="Sync mode (update changed rows)", variable=self.sync_var,
+                       command=self._on_sync_toggle, bootstyle="round-toggle").pack(side=LEFT, padx=(0, 15))
+        self.flag_missing_check = tb.Checkbutton(options_frame, text="Flag NOTAS missing from file (sts=0)",
+                                                 variable=self.flag_missing_var, state=DISABLED, bootstyle="round-toggle")
+        self.flag_missing_check.pack(side=LEFT)
+
         # --- Upload Button ---
         self.upload_button = tb.Button(top_frame, text="Upload to MySQL", command=self.start_upload_thread, bootstyle="success")
         self.upload_button.pack(pady=(5, 15))
@@ -91,6 +105,13 @@ class App(tb.Window):
         self.log_view = scrolledtext.ScrolledText(log_frame, height=6, state='disabled', wrap=tk.WORD)
         self.log_view.pack(fill=BOTH, expand=True)
 
+    def _on_sync_toggle(self):
+        if self.sync_var.get():
+            self.flag_missing_check.config(state=NORMAL)
+        else:
+            self.flag_missing_var.set(False)
+            self.flag_missing_check.config(state=DISABLED)
+
     def process_log_queue(self):
         while not log_queue.empty():
             record = log_queue.get()
@@ -105,7 +126,7 @@ class App(tb.Window):
         logging.info("Browsing for a file.")
         self.file_path = filedialog.askopenfilename(
             title="Select Excel File",
-            filetypes=(("Excel Files", "*.xlsx"), ("All files", "*.*" ))
+            filetypes=(("Excel / CSV Files", "*.xlsx *.csv"), ("All files", "*.*" ))
         )
         if self.file_path:
             logging.info(f"File selected: {self.file_path}")
@@ -117,24 +138,17 @@ class App(tb.Window):
 
     def load_excel_data(self):
         try:
-            logging.info("Loading Excel data.")
-            self.df = pd.read_excel(self.file_path)
+            logging.info("Loading preview data.")
+            self.df = sheet_reader.read_preview(self.file_path)
             self.display_dataframe()
-            logging.info("Excel data loaded and displayed successfully.")
+            logging.info(f"Preview of the first {len(self.df)} rows displayed; the full file is streamed during upload.")
         except Exception as e:
             logging.error(f"Failed to read Excel file: {e}", exc_info=True)
             messagebox.showerror("Error", f"Failed to read Excel file: {e}")
 
     def display_dataframe(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        self.tree["column"] = list(self.df.columns)
-        self.tree["show"] = "headings"
-        for col in self.tree["column"]:
-            self.tree.heading(col, text=col)
-            self.tree.column(col, width=100)
-        for index, row in self.df.iterrows():
-            self.tree.insert("", "end", values=list(row))
+        self.tree.set_columns([str(col) for col in self.df.columns])
+        self.tree.set_rows(self.df.itertuples(index=False, name=None))
 
     def start_upload_thread(self):
         logging.info("Upload process initiated by user.")
@@ -149,97 +163,77 @@ class App(tb.Window):
         thread.daemon = True
         thread.start()
 
+    def _set_progress(self, done, total, text):
+        def apply():
+            self.progress['maximum'] = max(total, 1)
+            self.progress['value'] = done
+            self.progress_label.config(text=text)
+        self.after(0, apply)
+
     def _upload_worker(self):
         try:
-            column_mapping = {
-                'NOTAS': 'nP', 'NOMOR_REKENING_POS': 'norek2', 'NOREK BARU': 'norek',
-                'NAMA PENERIMA': 'nmP', 'JNS': 'jP', 'ALAMAT': 'adP', 'KTB': 'ktb'
-            }
-            # Add the new fields to the mapping
-            column_mapping_db = {
-                'NOTAS': 'nP', 'NOMOR_REKENING_POS': 'norek2', 'NOREK BARU': 'norek',
-                'NAMA PENERIMA': 'nmP', 'JNS': 'jP', 'ALAMAT': 'adP', 'KTB': 'ktb',
-                'KTB': 'ktby' # Map KTB to ktby as well
-            }
-
-            required_columns = list(column_mapping.keys())
-            missing_columns = [col for col in required_columns if col not in self.df.columns]
-            if missing_columns:
-                msg = f"Missing required columns in Excel file: {', '.join(missing_columns)}"
+            missing = pens_upload.missing_columns(self.df)
+            estimated = sheet_reader.estimate_rows(self.file_path)
+            if missing:
+                msg = f"Missing required columns in Excel file: {', '.join(missing)}"
                 logging.error(msg)
-                messagebox.showerror("Error", msg)
+                self.after(0, lambda: messagebox.showerror("Error", msg))
                 return
 
             logging.info("Connecting to database...")
-            db_host = os.getenv("DB_HOST")
-            db_user = os.getenv("DB_USER")
-            db_password = os.getenv("DB_PASSWORD")
-            db_name = os.getenv("DB_NAME")
-
-            if not all([db_host, db_user, db_name]):
+            db_config = db_pool.load_db_config()
+            if not all([db_config["host"], db_config["user"], db_config["database"]]):
                 logging.error("Database configuration is missing in .env file.")
-                messagebox.showerror("Error", "Database configuration is missing in .env file.")
+                self.after(0, lambda: messagebox.showerror("Error", "Database configuration is missing in .env file."))
                 return
 
-            conn = mysql.connector.connect(
-                host=db_host, user=db_user, password=db_password, database=db_name, connection_timeout=15, use_pure=True
-            )
-            cursor = conn.cursor()
+            conn = db_pool.connect()
             logging.info("Database connection successful.")
-
-            table_name = "pens_tblpens"
-            inserted_count = 0
-            skipped_count = 0
-            total_rows = len(self.df)
-            self.progress['maximum'] = total_rows
-
-            for index, row in self.df.iterrows():
-                current_row_num = index + 1
-                notas_value = row['NOTAS']
-                self.progress['value'] = current_row_num
-                self.progress_label.config(text=f"Processing {current_row_num}/{total_rows} | Inserted: {inserted_count} | Skipped: {skipped_count}")
-                
-                cursor.execute(f"SELECT nP FROM `{table_name}` WHERE nP = %s", (notas_value,))
-                if cursor.fetchone():
-                    skipped_count += 1
-                    logging.info(f"Skipping NOTAS (duplicate): {notas_value}")
-                    continue
-
-                # Prepare data for insertion
-                db_columns = list(column_mapping_db.values()) + ['sts']
-                excel_values = [row[col] for col in column_mapping_db.keys()] + [1] # Add 1 for sts
-
-                # Build the SQL query
-                placeholders = ", ".join(["%s"] * len(db_columns))
-                sql = f"INSERT INTO `{table_name}` (`" + "`, `".join(db_columns) + "`) VALUES ({placeholders})"
-                
-                cursor.execute(sql, tuple(excel_values))
-                inserted_count += 1
-                logging.info(f"Inserted NOTAS: {notas_value}")
-
-            logging.info("Committing changes to the database.")
-            conn.commit()
-            cursor.close()
-            conn.close()
+            upload_start = metrics.REGISTRY.snapshot()
+
+            def on_chunk(read, written):
+                logging.info(f"Read {read} rows, written {written} rows.")
+                self._set_progress(read, max(estimated, read), f"Read {read}/{estimated} | Written: {written}")
+
+            sync, flag_missing = self.sync_var.get(), self.flag_missing_var.get()
+            try:
+                self._set_progress(0, 1, "Checking existing NOTAS...")
+                chunks = sheet_reader.iter_chunks(self.file_path)
+                if sync:
+                    result = pens_upload.sync_rows(conn, chunks, flag_missing=flag_missing,
+                                                   progress=on_chunk, log=logging.info)
+                else:
+                    inserted_count, skipped_count = pens_upload.upload_new(conn, chunks, progress=on_chunk)
+            finally:
+                conn.close()
             logging.info("Database connection closed.")
-
-            final_msg = f"Upload finished.\n\nSuccessfully Inserted: {inserted_count} rows.\nSkipped (Duplicates): {skipped_count} rows."
-            self.progress_label.config(text="Upload complete.")
-            logging.info(f"Final result: Inserted={inserted_count}, Skipped={skipped_count}")
-            messagebox.showinfo("Upload Complete", final_msg)
+            logging.info(metrics.summary(upload_start))
+
+            if sync:
+                final_msg = (f"Sync finished.\n\nInserted: {result['inserted']} rows.\nUpdated: {result['updated']} rows."
+                             f"\nUnchanged: {result['unchanged']} rows.\nFlagged missing (sts=0): {result['flagged']} rows.")
+                logging.info(f"Final result: {result}")
+            else:
+                final_msg = f"Upload finished.\n\nSuccessfully Inserted: {inserted_count} rows.\nSkipped (Duplicates): {skipped_count} rows."
+                logging.info(f"Final result: Inserted={inserted_count}, Skipped={skipped_count}")
+            self._set_progress(0, 1, "Upload complete.")
+            self.after(0, lambda: messagebox.showinfo("Upload Complete", final_msg))
 
         except mysql.connector.Error as err:
             logging.error(f"Database Error: {err}", exc_info=True)
-            self.progress_label.config(text="Database Error.")
-            messagebox.showerror("Database Error", f"Error: {err}")
+            err_msg = f"Error: {err}"
+            self._set_progress(0, 1, "Database Error.")
+            self.after(0, lambda: messagebox.showerror("Database Error", err_msg))
         except Exception as e:
             logging.error(f"An unexpected error occurred: {e}", exc_info=True)
-            self.progress_label.config(text="An unexpected error occurred.")
-            messagebox.showerror("Error", f"An unexpected error occurred: {e}")
+            err_msg = f"An unexpected error occurred: {e}"
+            self._set_progress(0, 1, "An unexpected error occurred.")
+            self.after(0, lambda: messagebox.showerror("Error", err_msg))
         finally:
-            self.upload_button.config(state=NORMAL)
+            self.after(0, lambda: self.upload_button.config(state=NORMAL))
             logging.info("Upload process finished. Button re-enabled.")
 
 if __name__ == "__main__":
+    metrics.start_server(log=logging.info)
     app = App()
     app.mainloop()
@@ -1,10 +1,13 @@
-import os
 import re
 import tkinter as tk
 from tkinter import messagebox, ttk
 from ttkbootstrap import Style, ScrolledText
 from dotenv import load_dotenv
-import mysql.connector
+import db_pool
+from db_schema import ensure_fingerprint_table
+from fingerprint import FingerprintStore, fingerprint
+from scrape_engine import kibana_fetcher
+from log_sink import LogSink
 import traceback
 from datetime import datetime
 import requests
@@ -17,15 +20,6 @@ from PIL import Image
 # Load environment variables from .env file
 load_dotenv()
 
-# --- Database Configuration ---
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST", "localhost"),
-    "user": os.getenv("DB_USER", "root"),
-    "password": os.getenv("DB_PASS", ""),
-    "database": os.getenv("DB_NAME", ""),
-    "use_pure": True
-}
-
 # --- Status criteria for fetching connotes ---
 STATUS_KRITERIA = ['INLOCATION', 'DELIVERYRUNSHEET', 'inBag', 'ON', 'unBag', 'INVEHICLE']
 
@@ -38,6 +32,10 @@ class MileUpdaterApp:
         self.auto_update_stop_event = threading.Event()
         self.auto_update_thread = None
         self.tray_icon = None
+        self.fp_store = FingerprintStore('tbl_db')
+        self.fp_table_ready = False
+        self.fetcher = kibana_fetcher(timeout=20)
+        self.log_sink = LogSink("up_mile_app")
 
         self.load_icons()
         try:
@@ -86,25 +84,19 @@ class MileUpdaterApp:
         log_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         self.log_text = ScrolledText(log_frame, height=10, font=("Consolas", 9), wrap=tk.WORD)
         self.log_text.pack(fill=tk.BOTH, expand=True)
+        self.log_sink.attach(self.root, self.log_text)
 
     def update_interval_display(self, value):
         self.interval_display_label.config(text=f"{int(float(value))} detik")
 
     def log(self, msg):
-        self.root.after(0, self._log_to_widget, msg)
-
-    def _log_to_widget(self, msg):
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.log_text.insert('end', f"[{now}] {msg}\n")
-        self.log_text.see('end')
+        self.log_sink.log(msg)
 
     def check_db_connection(self):
         # ... unchanged ...
         try:
-            conn = mysql.connector.connect(**DB_CONFIG)
-            if conn.is_connected(): self.log("✅ Koneksi ke database berhasil.")
+            if db_pool.check_connection(): self.log("✅ Koneksi ke database berhasil.")
             else: self.log("🔴 Gagal terhubung ke database.")
-            conn.close()
         except Exception as e: self.log(f"🔴 ERROR Koneksi DB: {e}")
 
     def set_tray_status(self, status, message="", title="Mile Updater"):
@@ -161,16 +153,19 @@ class MileUpdaterApp:
             self.log("🤖 Memulai siklus auto-update...")
         
         self.set_tray_status('busy', "Sedang mengambil dan mengupdate data...")
-        updated_count, failed_count = 0, 0
+        updated_count, failed_count, unchanged_count = 0, 0, 0
         failed_connotes = [] # List to hold failed connotes for logging
 
         try:
-            conn = mysql.connector.connect(**DB_CONFIG)
+            conn = db_pool.connect()
             cursor = conn.cursor(dictionary=True)
             status_placeholders = ', '.join(['%s'] * len(STATUS_KRITERIA))
             sql_select = f"SELECT connote FROM tbl_db WHERE status IN ({status_placeholders})"
             cursor.execute(sql_select, STATUS_KRITERIA)
             connotes_to_process = cursor.fetchall()
+            if not self.fp_table_ready:
+                ensure_fingerprint_table(conn); self.fp_table_ready = True
+            known_fp = self.fp_store.load(conn, [row['connote'] for row in connotes_to_process])
 
             if not connotes_to_process:
                 self.log("✅ Tidak ada connote baru.")
@@ -183,10 +178,7 @@ class MileUpdaterApp:
                 
                 connote = row['connote']
                 try:
-                    url = f"https://kibana.posindonesia.co.id:4433/x123449/3.php?id={connote}&6f017f90-f299-11ec-988f-6f1763dc6f47xdsdkjshhsahsaksasjsaasldsllsdjldsjsbdaksdslssjasjaa"
-                    response = requests.get(url, timeout=20, verify=False)
-                    response.raise_for_status()
-                    soup = BeautifulSoup(response.text, "html.parser")
+                    soup = BeautifulSoup(self.fetcher.fetch(connote), "html.parser")
                     status_akhir_th = soup.find("th", string=re.compile(r"^\s*STATUS AKHIR\s*$"))
                     
                     if not status_akhir_th or not status_akhir_th.find_next_sibling("td"):
@@ -205,13 +197,29 @@ class MileUpdaterApp:
                         self.log(f"  ❌ Gagal: Data dari web tidak lengkap untuk {connote}.")
                         failed_count += 1; failed_connotes.append(connote); continue
 
+                    fp = fingerprint({'status': status, 'tgl_receiving': tgl_receiving, 'kc_akhir': kc_akhir})
+                    if known_fp.get(connote) == fp:
+                        unchanged_count += 1
+                        self.log(f"  💤 {connote} tidak berubah, update dilewati.")
+                        time.sleep(0.5); continue
+
                     sql_update = "UPDATE tbl_db SET status=%s, tgl_receiving=%s, kc_akhir=%s WHERE connote=%s"
                     update_values = (status, tgl_receiving, kc_akhir, connote)
                     cursor.execute(sql_update, update_values)
 
                     if cursor.rowcount > 0:
+                        self.fp_store.save(cursor, [(connote, fp)])
                         conn.commit(); updated_count += 1
                         self.log(f"  ✅ SUKSES: Connote {connote} berhasil diupdate.")
+                        time.sleep(0.5); continue
+
+                    # rowcount mysql.connector = baris yang berubah, bukan yang cocok:
+                    # 0 juga berarti isi DB sudah sama, jadi cek dulu connote-nya ada atau tidak
+                    cursor.execute("SELECT EXISTS(SELECT 1 FROM tbl_db WHERE connote=%s) AS ada", (connote,))
+                    if cursor.fetchone()['ada']:
+                        self.fp_store.save(cursor, [(connote, fp)])
+                        conn.commit(); unchanged_count += 1
+                        self.log(f"  💤 {connote} sudah sesuai di database, sidik jari disimpan.")
                     else:
                         conn.rollback(); failed_count += 1; failed_connotes.append(connote)
                         self.log(f"  ⚠️ GAGAL: Connote {connote} tidak ditemukan saat mencoba update.")
@@ -223,7 +231,7 @@ class MileUpdaterApp:
                 time.sleep(0.5)
 
             cursor.close(); conn.close()
-            summary = f"Proses Selesai. Berhasil: {updated_count}, Gagal: {failed_count}"
+            summary = f"Proses Selesai. Berubah: {updated_count}, Tidak berubah: {unchanged_count}, Gagal: {failed_count}"
             self.log(f"🎉 {summary}")
             if is_manual_run: messagebox.showinfo("Proses Selesai", summary)
 
@@ -5,7 +5,7 @@ from tkinter import messagebox, ttk
 from ttkbootstrap import Style, ScrolledText
 from ttkbootstrap.widgets import Button
 from dotenv import load_dotenv
-import mysql.connector
+import db_pool
 import traceback
 from datetime import datetime, timedelta
 import requests
@@ -14,19 +14,18 @@ import threading
 import time
 from PIL import Image
 import pystray
+from db_batch import BatchWriter, BatchWriteError
+from scrape_engine import pid_fetcher
+from log_sink import LogSink
+import metrics
 
 # Load .env
 load_dotenv()
 
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST", ""),
-    "user": os.getenv("DB_USER", ""),
-    "password": os.getenv("DB_PASS", ""),
-    "database": os.getenv("DB_NAME", ""),
-    "use_pure": True
-}
 KODE_KANTOR = os.getenv("KODE_KANTOR", "")
 
+fetcher = pid_fetcher(timeout=15)
+
 # --- Global variables for tray and background thread ---
 icon = None
 background_thread_stop = threading.Event()
@@ -80,13 +79,9 @@ btn_frame = ttk.Frame(main_frame)
 btn_frame.pack(fill=tk.X)
 btn_frame.columnconfigure((0, 1, 2), weight=1)
 
-def log(msg):
-    root.after(0, lambda: _log_to_widget(msg))
-
-def _log_to_widget(msg):
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_text.insert('end', f"[{now}] {msg}\n")
-    log_text.see('end')
+log_sink = LogSink("update_app_v2")
+log_sink.attach(root, log_text)
+log = log_sink.log
 
 def parse_and_format_date(date_str):
     if not date_str:
@@ -98,6 +93,25 @@ def parse_and_format_date(date_str):
             pass
     return None
 
+def _update_retfs_batch(cursor, batch):
+    """before_flush: dijalankan sebelum UPDATE tbl_antrn di transaksi yang sama, jadi
+    filter ktr/status di sini sama dengan extra_where BatchWriter. Connote yang
+    update tbl_antrn-nya diblok (sudah DELIVERED, kantor lain) tidak ikut."""
+    items = [(connote, data['lok_akhir']) for connote, data in batch.items() if data.get('lok_akhir')]
+    if not items or not KODE_KANTOR:
+        return
+    derived = " UNION ALL ".join(["SELECT %s AS connote, %s AS lok_akhir"] + ["SELECT %s, %s"] * (len(items) - 1))
+    sql_update_retfs = ( "UPDATE antrn_tblretfs r JOIN tbl_antrn a ON a.connote = r.connote_rf "
+                         f"JOIN ({derived}) v ON v.connote = r.connote_rf "
+                         "SET r.lok_akhir_rf = v.lok_akhir "
+                         "WHERE r.ktr_rf = %s AND a.ktr_antrn = %s AND "
+                         "a.status NOT IN ('DELIVERED', 'DELIVERED (RETURN DELIVERY)') AND "
+                         "(r.lok_akhir_rf = %s OR r.lok_akhir_rf = '' OR r.lok_akhir_rf IS NULL)" )
+    params = [value for item in items for value in item]
+    cursor.execute(sql_update_retfs, tuple(params) + (KODE_KANTOR, KODE_KANTOR, KODE_KANTOR))
+    if cursor.rowcount > 0:
+        log(f"    ✅ lok_akhir_rf untuk {cursor.rowcount} connote di antrn_tblretfs berhasil diupdate.")
+
 def _perform_scraping_and_update(connotes_to_scrap, is_manual_run=False):
     updated_count = 0
     failed_count = 0
@@ -108,9 +122,16 @@ def _perform_scraping_and_update(connotes_to_scrap, is_manual_run=False):
 
     log(f"🔍 Ditemukan {len(connotes_to_scrap)} connote untuk diproses.")
     progress["maximum"] = len(connotes_to_scrap)
-
-    conn = mysql.connector.connect(**DB_CONFIG)
-    update_cursor = conn.cursor()
+    cycle_start = metrics.REGISTRY.snapshot()
+
+    conn = db_pool.connect()
+    writer = BatchWriter(
+        conn,
+        extra_where="t.ktr_antrn = %s AND t.status NOT IN ('DELIVERED', 'DELIVERED (RETURN DELIVERY)')",
+        extra_params=(KODE_KANTOR,),
+        before_flush=_update_retfs_batch,
+        log=log,
+    )
 
     for i, row in enumerate(connotes_to_scrap):
         progress["value"] = i + 1
@@ -125,80 +146,48 @@ def _perform_scraping_and_update(connotes_to_scrap, is_manual_run=False):
         log(f"🔄 Memproses connote: {connote}")
         
         try:
-            import base64
-            encoded_connote = base64.urlsafe_b64encode(connote.encode()).decode('ascii')
-            url = f"https://pid.posindonesia.co.id/lacak/admin/detail_lacak_banyak.php?id={encoded_connote}"
-            
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-            content = response.text
-            soup = BeautifulSoup(content, "html.parser")
+            content = fetcher.fetch(connote)
+            with metrics.stage("parse", source="pid"):
+                soup = BeautifulSoup(content, "html.parser")
             
-            data_to_update = {}
-
-            def get_value_from_table(header_text):
-                header_tag = soup.find(lambda tag: tag.name == "td" and header_text in tag.get_text(strip=True))
-                if header_tag and header_tag.find_next_sibling("td"):
-                    return header_tag.find_next_sibling("td").get_text(separator=' ', strip=True)
-                return None
-
-            status_full = get_value_from_table("STATUS AKHIR")
-            if status_full:
-                status_match = re.search(r"^(\w+)", status_full)
-                if status_match:
-                    status_text = status_match.group(1).strip()
-                    data_to_update['status'] = status_text
-                    if "DELIVERED" in status_text.upper():
-                        data_to_update['st'] = '99'
-
-                tgl_match = re.search(r"Tanggal\s*:\s*(\d{4}-\d{2}-\d{2}\s*\d{2}:\d{2}:\d{2})", status_full, re.IGNORECASE)
-                if tgl_match:
-                    data_to_update['tgl_proses'] = parse_and_format_date(tgl_match.group(1))
-
-                kodepos_match = re.search(r"\b(\d{5})\b", status_full)
-                if kodepos_match:
-                    data_to_update['lok_akhir'] = kodepos_match.group(1)
+                data_to_update = {}
+
+                def get_value_from_table(header_text):
+                    header_tag = soup.find(lambda tag: tag.name == "td" and header_text in tag.get_text(strip=True))
+                    if header_tag and header_tag.find_next_sibling("td"):
+                        return header_tag.find_next_sibling("td").get_text(separator=' ', strip=True)
+                    return None
+
+                status_full = get_value_from_table("STATUS AKHIR")
+                if status_full:
+                    status_match = re.search(r"^(\w+)", status_full)
+                    if status_match:
+                        status_text = status_match.group(1).strip()
+                        data_to_update['status'] = status_text
+                        if "DELIVERED" in status_text.upper():
+                            data_to_update['st'] = '99'
+
+                    tgl_match = re.search(r"Tanggal\s*:\s*(\d{4}-\d{2}-\d{2}\s*\d{2}:\d{2}:\d{2})", status_full, re.IGNORECASE)
+                    if tgl_match:
+                        data_to_update['tgl_proses'] = parse_and_format_date(tgl_match.group(1))
+
+                    kodepos_match = re.search(r"\b(\d{5})\b", status_full)
+                    if kodepos_match:
+                        data_to_update['lok_akhir'] = kodepos_match.group(1)
 
             if data_to_update:
                 if 'st' not in data_to_update:
                     data_to_update['st'] = '33'
-                
-                set_clauses = ", ".join([f"{key}=%s" for key in data_to_update.keys()])
-                sql_update_antrn = (f"UPDATE tbl_antrn SET {set_clauses} "
-                                    f"WHERE connote = %s AND ktr_antrn = %s AND status NOT IN ('DELIVERED', 'DELIVERED (RETURN DELIVERY)')")
-                
-                update_values = list(data_to_update.values())
-                update_values.extend([connote, KODE_KANTOR])
-                
-                update_cursor.execute(sql_update_antrn, tuple(update_values))
-                
-                if update_cursor.rowcount > 0:
-                    log(f"  ✅ Data untuk {connote} berhasil diupdate di tbl_antrn.")
-                    updated_count += 1
-
-                    if 'lok_akhir' in data_to_update and KODE_KANTOR:
-                        select_sql_retfs = ( "SELECT 1 FROM antrn_tblretfs "
-                                           "WHERE connote_rf = %s AND ktr_rf = %s AND "
-                                           "(lok_akhir_rf = %s OR lok_akhir_rf = '' OR lok_akhir_rf IS NULL) LIMIT 1" )
-                        select_values_retfs = (connote, KODE_KANTOR, KODE_KANTOR)
-                        update_cursor.execute(select_sql_retfs, select_values_retfs)
-                        row_to_update = update_cursor.fetchone()
-
-                        if row_to_update:
-                            log(f"  ℹ️ Connote {connote} ditemukan di antrn_tblretfs, mencoba update.")
-                            sql_update_retfs = ( "UPDATE antrn_tblretfs SET lok_akhir_rf = %s "
-                                               "WHERE connote_rf = %s AND ktr_rf = %s AND "
-                                               "(lok_akhir_rf = %s OR lok_akhir_rf = '' OR lok_akhir_rf IS NULL)" )
-                            
-                            update_values_retfs = (data_to_update['lok_akhir'], connote, KODE_KANTOR, KODE_KANTOR)
-                            update_cursor.execute(sql_update_retfs, update_values_retfs)
-
-                            if update_cursor.rowcount > 0:
-                                log(f"    ✅ lok_akhir_rf untuk {connote} berhasil diupdate menjadi {data_to_update['lok_akhir']}.")
+
+                log(f"  ✅ Data untuk {connote} masuk antrean update tbl_antrn.")
+                writer.add(connote, data_to_update)
             else:
                 log(f"  ⚠️ Tidak ada data valid yang diekstrak untuk {connote}.")
                 failed_count += 1
 
+        except BatchWriteError as e:
+            log(f"  ❌ {e}")
+            failed_count += len(e.keys)
         except requests.exceptions.RequestException as e:
             log(f"  ❌ Gagal mengambil data untuk {connote}. Error: {e}")
             failed_count += 1
@@ -206,10 +195,16 @@ def _perform_scraping_and_update(connotes_to_scrap, is_manual_run=False):
             log(f"  ❌ Terjadi error saat memproses {connote}. Error: {e}")
             traceback.print_exc()
             failed_count += 1
-    
-    conn.commit()
-    update_cursor.close()
+
+    try:
+        writer.flush()
+    except BatchWriteError as e:
+        log(f"  ❌ {e}")
+        failed_count += len(e.keys)
+    updated_count = writer.affected
+
     conn.close()
+    log(metrics.summary(cycle_start))
     progress["value"] = 0
     progress_label_var.set("")
     return updated_count, failed_count
@@ -221,12 +216,9 @@ def _background_update_task():
             root.after(0, lambda: auto_update_status_var.set("Auto-Update: 🏃‍♂️ Sedang berjalan..."))
             log(" ऑटो-अपडेट शुरू हो रहा है... (Memulai auto-update...)")
             
-            conn = mysql.connector.connect(**DB_CONFIG)
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("SELECT connote FROM tbl_antrn WHERE st = '0' OR st = '33' OR status = 'FAILEDTODELIVERED'")
-            connotes_to_update = cursor.fetchall()
-            cursor.close()
-            conn.close()
+            with metrics.stage("db_read", table="tbl_antrn") as read:
+                connotes_to_update = db_pool.fetch_all("SELECT connote FROM tbl_antrn WHERE st = '0' OR st = '33' OR status = 'FAILEDTODELIVERED'", dictionary=True)
+                read.items = len(connotes_to_update)
 
             if connotes_to_update:
                 updated, failed = _perform_scraping_and_update(connotes_to_update)
@@ -254,12 +246,7 @@ def run_manual_update():
         def run():
             try:
                 log("🚀 Memulai proses update manual...")
-                conn = mysql.connector.connect(**DB_CONFIG)
-                cursor = conn.cursor(dictionary=True)
-                cursor.execute("SELECT connote FROM tbl_antrn WHERE st = '0' OR st = '33' OR status = 'FAILEDTODELIVERED'")
-                connotes_to_scrap = cursor.fetchall()
-                cursor.close()
-                conn.close()
+                connotes_to_scrap = db_pool.fetch_all("SELECT connote FROM tbl_antrn WHERE st = '0' OR st = '33' OR status = 'FAILEDTODELIVERED'", dictionary=True)
                 
                 if not connotes_to_scrap:
                     log("✅ Tidak ada data baru untuk di-scrap.")
@@ -283,11 +270,9 @@ def run_manual_update():
 
 def cek_koneksi():
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        if conn.is_connected():
+        if db_pool.check_connection():
             label_koneksi_var.set("🟢 Koneksi DB: Berhasil")
             koneksi_label.config(bootstyle="success")
-            conn.close()
             log("✅ Koneksi ke database berhasil.")
         else:
             label_koneksi_var.set("🔴 Gagal koneksi DB")
@@ -301,7 +286,7 @@ def cek_koneksi():
 def check_data_to_update():
     log("🔍 Memeriksa data yang akan diupdate...")
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = db_pool.connect()
         cursor = conn.cursor()
 
         # Hitung tbl_antrn
@@ -390,6 +375,7 @@ if __name__ == "__main__":
     Button(btn_frame, text="▶️ Jalankan Update Manual", command=run_manual_update, bootstyle="success").grid(row=0, column=2, sticky="ew", padx=(5, 0))
     
     cek_koneksi()
+    metrics.start_server(log=log)
     
     update_thread = threading.Thread(target=_background_update_task, daemon=True)
     update_thread.start()
@@ -6,56 +6,53 @@ from ttkbootstrap.constants import *
 import threading
 import queue
 import sys
-import os
-import pymysql
+import mysql.connector
+import db_pool
+import metrics
 import requests
 import re
-import base64
 from dotenv import load_dotenv
+from db_batch import BatchWriter, BatchWriteError
+from scrape_engine import pid_fetcher
 
 # Load environment variables from .env file
 load_dotenv()
 
+fetcher = pid_fetcher(timeout=10)
+
 # --- Logic from update_sla.py ---
 
 def get_db_connection(log_queue):
-    """Establishes a database connection."""
+    """Takes a connection from the shared pool."""
     try:
-        conn = pymysql.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASS"),
-            database=os.getenv("DB_NAME"),
-            port=int(os.getenv("DB_PORT", 3306)),
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        conn = db_pool.connect()
         log_queue.put("INFO: Database connection successful.")
         return conn
-    except pymysql.MySQLError as e:
+    except mysql.connector.Error as e:
         log_queue.put(f"ERROR: Error connecting to MySQL: {e}")
         return None
 
 def fetch_connotes_to_process(conn, log_queue):
     """Fetches connotes from tbl_antrn where st = 33."""
     try:
-        with conn.cursor() as cursor:
+        with metrics.stage("db_read", table="tbl_antrn") as read:
+            cursor = conn.cursor(dictionary=True)
             cursor.execute("SELECT connote FROM tbl_antrn WHERE sla = '0'")
             results = cursor.fetchall()
-            return [row['connote'] for row in results]
-    except pymysql.MySQLError as e:
+            cursor.close()
+            read.items = len(results)
+        return [row['connote'] for row in results]
+    except mysql.connector.Error as e:
         log_queue.put(f"ERROR: Error fetching connotes: {e}")
         return []
 
 def get_sla_from_web(connote, log_queue):
     """Scrapes the SLA value for a given connote."""
     try:
-        encoded_connote = base64.urlsafe_b64encode(connote.encode()).decode('ascii')
-        url = f"https://pid.posindonesia.co.id/lacak/admin/detail_lacak_banyak.php?id={encoded_connote}"
-        
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        html = fetcher.fetch(connote)
 
-        match = re.search(r"SLA\s*:\s*(\d+)\s*hari", response.text)
+        with metrics.stage("parse", source="pid"):
+            match = re.search(r"SLA\s*:\s*(\d+)\s*hari", html)
         if match:
             sla_value = int(match.group(1))
             log_queue.put(f"SUCCESS: Connote {connote} -> SLA: {sla_value}")
@@ -67,23 +64,12 @@ def get_sla_from_web(connote, log_queue):
         log_queue.put(f"ERROR: Could not fetch data for connote {connote}. Reason: {e}")
         return None
 
-def update_sla_in_db(conn, connote, sla_value, log_queue):
-    """Updates the SLA value for a connote in the database."""
-    try:
-        with conn.cursor() as cursor:
-            sql = "UPDATE tbl_antrn SET sla = %s WHERE connote = %s"
-            cursor.execute(sql, (sla_value, connote))
-        conn.commit()
-        # log_queue.put(f"DB_UPDATE: Updated SLA for {connote}")
-    except pymysql.MySQLError as e:
-        log_queue.put(f"ERROR: Error updating database for connote {connote}: {e}")
-        conn.rollback()
-
 def run_update_process(log_queue, status_var, progress_callback):
     """Main function to run the SLA update process."""
     try:
         status_var.set("Running...")
         log_queue.put("Starting SLA update process...")
+        cycle_start = metrics.REGISTRY.snapshot()
         db_conn = get_db_connection(log_queue)
         if not db_conn:
             status_var.set("Finished with errors.")
@@ -102,14 +88,23 @@ def run_update_process(log_queue, status_var, progress_callback):
         log_queue.put(f"Found {total_connotes} connote(s) to process.")
         progress_callback(0, total_connotes)
 
+        writer = BatchWriter(db_conn, log=log_queue.put)
         for i, connote in enumerate(connotes):
             sla = get_sla_from_web(connote, log_queue)
             if sla is not None:
-                update_sla_in_db(db_conn, connote, sla, log_queue)
+                try:
+                    writer.add(connote, {'sla': sla})
+                except BatchWriteError as e:
+                    log_queue.put(f"ERROR: Error updating database: {e}")
             # Update progress after each item is processed
             progress_callback(i + 1, total_connotes)
+        try:
+            writer.flush()
+        except BatchWriteError as e:
+            log_queue.put(f"ERROR: Error updating database: {e}")
 
         db_conn.close()
+        log_queue.put(metrics.summary(cycle_start))
         log_queue.put("SLA update process finished.")
         status_var.set("Finished.")
     except Exception as e:
@@ -203,6 +198,7 @@ class SlaUpdaterApp:
 
 
 if __name__ == "__main__":
+    metrics.start_server()
     root = ttk.Window(themename="cosmo")
     app = SlaUpdaterApp(root)
     root.mainloop()
@@ -0,0 +1,203 @@
+#
+# virtual_table.py - tabel Treeview tervirtualisasi untuk data besar
+#----------------------------------------------------------------------------
+#
+# Data disimpan sebagai list tuple (model), Treeview hanya berisi item
+# sebanyak baris yang terlihat. Saat scroll, isi item-item itu diganti
+# dengan potongan model yang sesuai, jadi puluhan ribu baris tetap ringan.
+# Klik judul kolom untuk mengurutkan (klik lagi untuk membalik urutan).
+# Pilihan disimpan sebagai indeks model, bukan item Treeview, karena item
+# yang sama dipakai ulang untuk baris lain saat scroll.
+#
+import tkinter as tk
+from tkinter import ttk
+
+DEFAULT_ROW_HEIGHT = 20
+
+
+def _cell(value):
+    return "" if value is None else str(value)
+
+
+def _sort_key(value):
+    """Urutkan None di akhir, angka sebagai angka, sisanya sebagai teks."""
+    if value is None or value == "":
+        return (2, "")
+    if isinstance(value, (int, float)):
+        return (0, value)
+    text = str(value)
+    try:
+        return (0, float(text))
+    except ValueError:
+        return (1, text.lower())
+
+
+class VirtualTable(ttk.Frame):
+    """Pengganti Treeview + scrollbar untuk tabel read-only yang besar.
+
+    `rows` adalah model (list tuple) dan boleh dibaca langsung oleh pemanggil.
+    `widths` berupa dict {kolom: lebar}, `headings` list teks judul per kolom.
+    """
+
+    def __init__(self, master, columns=(), widths=None, headings=None, xscroll=False, **kwargs):
+        super().__init__(master, **kwargs)
+        self.rows = []
+        self.offset = 0
+        self._slots = 1
+        self._selected = None  # indeks model baris yang dipilih
+        self._sort_column = None
+        self._sort_reverse = False
+
+        self.tree = ttk.Treeview(self, show="headings", selectmode="browse", height=1)
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        if xscroll:
+            self.hsb = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+            self.tree.configure(xscrollcommand=self.hsb.set)
+            self.hsb.pack(side=tk.BOTTOM, fill=tk.X)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self._slots))
+        self.tree.bind("<Next>", lambda e: self.scroll(self._slots))
+        self.tree.bind("<Up>", lambda e: self._on_arrow(-1))
+        self.tree.bind("<Down>", lambda e: self._on_arrow(1))
+        self.tree.bind("<Home>", lambda e: self.scroll_to(0))
+        self.tree.bind("<End>", lambda e: self.scroll_to(len(self.rows)))
+
+        if columns:
+            self.set_columns(columns, widths, headings)
+
+    # --- kolom dan data -----------------------------------------------------
+
+    def set_columns(self, columns, widths=None, headings=None):
+        self.columns = tuple(columns)
+        self.tree["columns"] = self.columns
+        for i, col in enumerate(self.columns):
+            text = headings[i] if headings else col
+            self.tree.heading(col, text=text, command=lambda c=col: self.sort_by(c))
+            self.tree.column(col, width=(widths or {}).get(col, 100), anchor="center")
+        self._sort_column = None
+        self.render()
+
+    def column(self, col, **kwargs):
+        self.tree.column(col, **kwargs)
+
+    def set_rows(self, rows):
+        self.rows = [tuple(r) for r in rows]
+        self.offset = 0
+        self._selected = None
+        self._sort_column = None
+        self.render()
+
+    def append_rows(self, rows):
+        self.rows.extend(tuple(r) for r in rows)
+        self.render()
+
+    def clear(self):
+        self.set_rows([])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def sort_by(self, col):
+        """Urutkan model menurut kolom; dipanggil saat judul kolom diklik."""
+        idx = self.columns.index(col)
+        self._sort_reverse = not self._sort_reverse if self._sort_column == col else False
+        self._sort_column = col
+        selected = self.selected_row()
+        self.rows.sort(key=lambda r: _sort_key(r[idx] if idx < len(r) else None), reverse=self._sort_reverse)
+        if selected is not None:
+            # Pilihan ikut barisnya ke posisi baru (dicari per objek, bukan per nilai)
+            self._selected = next(i for i, r in enumerate(self.rows) if r is selected)
+        self.render()
+
+    def selected_row(self):
+        """Tuple baris yang sedang dipilih, atau None."""
+        if self._selected is None or self._selected >= len(self.rows):
+            return None
+        return self.rows[self._selected]
+
+    def _on_select(self, event=None):
+        # Selection kosong juga muncul saat render melepas pilihan yang
+        # sedang di luar layar; itu bukan pilihan baru dari pengguna.
+        selection = self.tree.selection()
+        if selection:
+            self._selected = self.offset + self.tree.index(selection[0])
+
+    # --- scroll dan render --------------------------------------------------
+
+    def scroll(self, delta):
+        self.scroll_to(self.offset + delta)
+
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), max(len(self.rows) - self._slots, 0)))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * len(self.rows))
+        elif action == "scroll":
+            step = self._slots if unit == "pages" else 1
+            self.scroll(int(amount) * step)
+
+    def _on_wheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _on_arrow(self, delta):
+        """Panah atas/bawah di tepi jendela: geser model, pilihan tetap di baris tepi."""
+        items = self.tree.get_children()
+        selection = self.tree.selection()
+        if items and selection and selection[0] == (items[0] if delta < 0 else items[-1]):
+            offset = self.offset
+            self._selected = max(0, min(self.offset + self.tree.index(selection[0]) + delta, len(self.rows) - 1))
+            self.scroll(delta)
+            if self.offset == offset:
+                self._selected = offset + self.tree.index(selection[0])
+            return "break"
+        return None
+
+    def _on_resize(self, event):
+        style = ttk.Style()
+        row_height = int(style.lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT)
+        # kurangi tinggi baris judul
+        slots = max(1, (event.height - row_height - 4) // row_height)
+        if slots != self._slots:
+            self._slots = slots
+            self.scroll_to(self.offset)
+            self.render()
+
+    def render(self):
+        """Isi item Treeview dengan potongan model yang terlihat."""
+        visible = self.rows[self.offset:self.offset + self._slots]
+        items = self.tree.get_children()
+        for i, row in enumerate(visible):
+            values = [_cell(v) for v in row]
+            if i < len(items):
+                self.tree.item(items[i], values=values)
+            else:
+                self.tree.insert("", "end", values=values)
+        if len(items) > len(visible):
+            self.tree.delete(*items[len(visible):])
+
+        items = self.tree.get_children()
+        slot = None if self._selected is None else self._selected - self.offset
+        if slot is not None and 0 <= slot < len(items):
+            if self.tree.selection() != (items[slot],):
+                self.tree.selection_set(items[slot])
+            self.tree.focus(items[slot])
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        total = len(self.rows)
+        if total:
+            self.vsb.set(self.offset / total, min((self.offset + self._slots) / total, 1.0))
+        else:
+            self.vsb.set(0.0, 1.0)